@@ -0,0 +1,86 @@
+"""
+Benchmark de Alocações por Consulta (tracemalloc)
+
+Executa consultas completas (BaseFatos + GerenciadorFatosAluno +
+MotorInferencia.inferir + get_explicacao_completa) para alunos sintéticos
+e mede, com tracemalloc, para cada consulta:
+- pico: maior quantidade de memória alocada ao mesmo tempo durante a consulta
+- retidos: blocos/bytes ainda vivos ao final (resultado, base de fatos e
+  histórico de inferência), enquanto a consulta é mantida em memória
+
+Imprime as medianas e os arquivos que mais retêm blocos.
+
+Uso:
+    python benchmarks/alocacoes.py --consultas 300
+"""
+import argparse
+import statistics
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from facts_base.student_facts import BaseFatos, GerenciadorFatosAluno
+from inference_engine.engine import MotorInferencia
+from inferencia_lote import _snapshots_sinteticos
+
+
+def _consulta(snapshot):
+    base_fatos = BaseFatos()
+    gerenciador = GerenciadorFatosAluno(base_fatos)
+    gerenciador.inicializar_aluno_do_snapshot(snapshot)
+    motor = MotorInferencia(base_fatos, gerenciador)
+    resultado = motor.inferir()
+    return motor, resultado, motor.get_explicacao_completa()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Alocações de memória por consulta")
+    parser.add_argument("--consultas", type=int, default=300)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--top", type=int, default=5,
+                        help="Arquivos que mais retêm blocos a exibir")
+    args = parser.parse_args(argv)
+
+    snapshots = _snapshots_sinteticos(args.consultas, args.semente)
+    # Aquece caches do processo (currículo, regras, rede) fora da medição
+    _consulta(snapshots[0])
+
+    picos, retidos_kib, retidos_blocos = [], [], []
+    por_arquivo = {}
+    tracemalloc.start()
+    for snapshot in snapshots:
+        antes = tracemalloc.take_snapshot()
+        atual_antes, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+
+        consulta = _consulta(snapshot)
+
+        atual, pico = tracemalloc.get_traced_memory()
+        depois = tracemalloc.take_snapshot()
+        diferencas = depois.compare_to(antes, "filename")
+        picos.append((pico - atual_antes) / 1024)
+        retidos_kib.append((atual - atual_antes) / 1024)
+        retidos_blocos.append(sum(d.count_diff for d in diferencas))
+        for d in diferencas:
+            nome = d.traceback[0].filename
+            if "tracemalloc" not in nome:
+                por_arquivo[nome] = por_arquivo.get(nome, 0) + d.count_diff
+        del consulta
+    tracemalloc.stop()
+
+    print(f"{args.consultas} consultas (medianas por consulta)")
+    print(f"  pico            {statistics.median(picos):8.1f} KiB")
+    print(f"  retidos         {statistics.median(retidos_kib):8.1f} KiB"
+          f" | {statistics.median(retidos_blocos):6.0f} blocos")
+    print("  blocos retidos por arquivo (média):")
+    raiz = str(Path(__file__).parent.parent)
+    for nome, blocos in sorted(por_arquivo.items(), key=lambda x: -x[1])[:args.top]:
+        print(f"    {blocos / args.consultas:8.0f}  {nome.replace(raiz, '.')}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
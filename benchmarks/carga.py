@@ -0,0 +1,194 @@
+"""
+Teste de Carga - Flask (gunicorn) x ASGI (uvicorn) com a mesma concorrência
+
+Para cada modo, sobe o servidor em um subprocesso sobre uma cópia do banco,
+dispara --requisicoes requisições com --concorrencia clientes simultâneos
+(cada um com uma conexão HTTP persistente) e mede a latência de cada uma.
+A mistura é de consultas (POST /api/consultar com alunos sintéticos) e
+leituras (GET /api/aluno/<id> dos alunos já consultados).
+
+Imprime, por modo: vazão, p50, p99 e erros.
+
+Uso:
+    python benchmarks/carga.py --concorrencia 16 --requisicoes 2000
+    python benchmarks/carga.py --modos asgi --workers 2
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from inferencia_lote import _snapshots_sinteticos
+
+RAIZ = Path(__file__).parent.parent
+
+
+def _payload(snapshot) -> dict:
+    """Corpo de /api/consultar equivalente ao snapshot"""
+    return {
+        "aluno_id": snapshot.aluno["id"],
+        "nome": snapshot.aluno["nome"],
+        "ano_atual": snapshot.aluno["ano_atual"],
+        "tipo": snapshot.aluno["tipo"],
+        "aprovadas": [{"id": d["id"], "nota": d["nota"]} for d in snapshot.historico["aprovadas"]],
+        "reprovadas": [{"id": d["id"], "nota": d["nota"]} for d in snapshot.historico["reprovadas"]],
+    }
+
+
+def _requisicoes(quantidade: int, leituras: float, concorrencia: int, semente: int) -> list:
+    """
+    (método, url, corpo) em ordem fixa para os dois modos. Leituras só usam
+    alunos consultados pelo menos `concorrencia` requisições antes (a
+    consulta já terminou quando a leitura é disparada).
+    """
+    rng = random.Random(semente)
+    snapshots = _snapshots_sinteticos(max(quantidade // 4, 1), semente)
+    consultados = []
+    lista = []
+    for _ in range(quantidade):
+        if len(consultados) > concorrencia and rng.random() < leituras:
+            lista.append(("GET", f"/api/aluno/{rng.choice(consultados[:-concorrencia])}", None))
+        else:
+            snapshot = rng.choice(snapshots)
+            consultados.append(snapshot.aluno["id"])
+            lista.append(("POST", "/api/consultar", json.dumps(_payload(snapshot))))
+    return lista
+
+
+def _comando(modo: str, porta: int, workers: int, threads: int) -> list:
+    comando = [sys.executable, str(RAIZ / "main.py"), "--porta", str(porta), "--workers", str(workers)]
+    if modo == "flask":
+        return comando + ["--producao", "--threads", str(threads)]
+    return comando + ["--asgi"]
+
+
+def _aguardar(porta: int, limite: float = 60.0) -> None:
+    """Espera o servidor responder em /api/regras"""
+    prazo = time.monotonic() + limite
+    while time.monotonic() < prazo:
+        try:
+            conexao = http.client.HTTPConnection("127.0.0.1", porta, timeout=2)
+            conexao.request("GET", "/api/regras")
+            if conexao.getresponse().status == 200:
+                conexao.close()
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"servidor não respondeu na porta {porta}")
+
+
+def _disparar(porta: int, requisicoes: list, concorrencia: int) -> tuple:
+    """Executa as requisições com `concorrencia` clientes; retorna latências, erros e duração"""
+    latencias, erros = [], 0
+    lock = threading.Lock()
+    proxima = iter(requisicoes)
+
+    def cliente():
+        nonlocal erros
+        conexao = http.client.HTTPConnection("127.0.0.1", porta, timeout=60)
+        minhas, meus_erros = [], 0
+        while True:
+            with lock:
+                item = next(proxima, None)
+            if item is None:
+                break
+            metodo, url, corpo = item
+            cabecalhos = {"Content-Type": "application/json"} if corpo else {}
+            inicio = time.perf_counter()
+            try:
+                conexao.request(metodo, url, body=corpo, headers=cabecalhos)
+                resposta = conexao.getresponse()
+                resposta.read()
+                if resposta.status >= 400:
+                    meus_erros += 1
+            except (OSError, http.client.HTTPException):
+                meus_erros += 1
+                conexao.close()
+                conexao = http.client.HTTPConnection("127.0.0.1", porta, timeout=60)
+                continue
+            minhas.append(time.perf_counter() - inicio)
+        conexao.close()
+        with lock:
+            latencias.extend(minhas)
+            erros += meus_erros
+
+    clientes = [threading.Thread(target=cliente) for _ in range(concorrencia)]
+    inicio = time.perf_counter()
+    for c in clientes:
+        c.start()
+    for c in clientes:
+        c.join()
+    return latencias, erros, time.perf_counter() - inicio
+
+
+def _percentil(valores: list, p: float) -> float:
+    return statistics.quantiles(valores, n=100, method="inclusive")[int(p) - 1]
+
+
+def _medir(modo: str, args, requisicoes: list, banco_origem: Path, pasta: Path) -> dict:
+    banco = pasta / f"{modo}.db"
+    shutil.copy(banco_origem, banco)
+    ambiente = dict(os.environ, UNIADVISOR_DB=str(banco))
+    processo = subprocess.Popen(
+        _comando(modo, args.porta, args.workers, args.threads), cwd=RAIZ, env=ambiente,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        _aguardar(args.porta)
+        # Aquecimento: caches e conexões de todos os workers
+        _disparar(args.porta, requisicoes[:args.concorrencia * 4], args.concorrencia)
+        latencias, erros, duracao = _disparar(args.porta, requisicoes, args.concorrencia)
+    finally:
+        processo.send_signal(signal.SIGTERM)
+        processo.wait(timeout=60)
+    return {
+        "modo": modo,
+        "vazao": len(latencias) / duracao,
+        "p50": _percentil(latencias, 50) * 1000,
+        "p99": _percentil(latencias, 99) * 1000,
+        "erros": erros,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Teste de carga Flask x ASGI")
+    parser.add_argument("--modos", default="flask,asgi")
+    parser.add_argument("--concorrencia", type=int, default=16)
+    parser.add_argument("--requisicoes", type=int, default=2000)
+    parser.add_argument("--leituras", type=float, default=0.3,
+                        help="Fração de GET /api/aluno/<id> na mistura")
+    parser.add_argument("--workers", type=int, default=1, help="Processos do servidor")
+    parser.add_argument("--threads", type=int, default=8,
+                        help="Threads por processo do gunicorn (modo flask)")
+    parser.add_argument("--porta", type=int, default=5099)
+    parser.add_argument("--banco", default=str(RAIZ / "uniadvisor.db"),
+                        help="Banco de origem (o teste usa uma cópia)")
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    requisicoes = _requisicoes(args.requisicoes, args.leituras, args.concorrencia, args.semente)
+    print(f"{args.requisicoes} requisições | concorrência {args.concorrencia}"
+          f" | {args.workers} processo(s) por servidor")
+    with tempfile.TemporaryDirectory() as pasta:
+        for modo in args.modos.split(","):
+            r = _medir(modo, args, requisicoes, Path(args.banco), Path(pasta))
+            print(f"  {r['modo']:6} {r['vazao']:7.0f} req/s | p50 {r['p50']:7.1f} ms"
+                  f" | p99 {r['p99']:7.1f} ms | erros {r['erros']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
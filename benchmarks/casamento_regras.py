@@ -0,0 +1,149 @@
+"""
+Benchmark de Casamento de Regras - lambdas x rede de discriminação
+
+Para alunos sintéticos (semente fixa), avalia todas as regras contra todas
+as disciplinas até o ano seguinte ao do aluno, de duas formas:
+- ingenuo: monta {**fatos_aluno, **fatos_disciplina} e chama cada lambda
+- rede: uma SessaoRede por aluno, trocando apenas o contexto da disciplina
+
+Com --regras-extras N, acrescenta N heurísticas sintéticas do tipo
+"área == X e disciplina do ano do aluno" para ver como cada forma escala
+com o tamanho da base de regras.
+
+Antes de medir, confere que as duas formas disparam exatamente o mesmo
+conjunto de regras em cada par (aluno, disciplina); diverge -> código 1.
+
+Uso:
+    python benchmarks/casamento_regras.py --alunos 2000
+    python benchmarks/casamento_regras.py --regras-extras 200
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from facts_base.student_facts import BaseFatos, GerenciadorFatosAluno
+from inference_engine.rete import RedeDiscriminacao
+from knowledge_base.curriculo import obter_curriculo
+from knowledge_base.rules import Condicao, Regra, TipoRegra, get_todas_regras
+
+
+def _alunos_sinteticos(quantidade: int, semente: int) -> list:
+    """Gera (fatos_aluno, [fatos_disciplina, ...]) para alunos aleatórios"""
+    rng = random.Random(semente)
+    ids = [d["id"] for d in obter_curriculo().disciplinas]
+    alunos = []
+    for i in range(quantidade):
+        ano = rng.randint(1, 3)
+        aprovadas = [x for x in ids if rng.random() < rng.random()]
+        reprovadas = [x for x in ids if x not in aprovadas and rng.random() < 0.15]
+
+        base = BaseFatos()
+        gerenciador = GerenciadorFatosAluno(base)
+        gerenciador.inicializar_aluno(f"B{i}", "Bench", ano, rng.random() < 0.1)
+        for x in aprovadas:
+            gerenciador.registrar_aprovacao(x, round(rng.uniform(5, 10), 1))
+        for x in reprovadas:
+            gerenciador.registrar_reprovacao(x, round(rng.uniform(0, 5), 1))
+        gerenciador.calcular_fatos_derivados()
+
+        contextos = [
+            gerenciador.preparar_fatos_disciplina(d["id"])
+            for d in gerenciador.get_curriculo() if d["ano"] <= ano + 1
+        ]
+        alunos.append((base.get_todos_fatos(), contextos))
+    return alunos
+
+
+def _regras_extras(quantidade: int) -> list:
+    """Heurísticas sintéticas por área (parte delas casa com áreas reais)"""
+    areas = sorted({d["area"] for d in obter_curriculo().disciplinas})
+    regras = []
+    for k in range(quantidade):
+        area = areas[k] if k < len(areas) else f"Area {k}"
+        regras.append(Regra(
+            id=f"X{k}",
+            nome=f"Sintética {k}",
+            tipo=TipoRegra.HEURISTICA,
+            descricao=f"Disciplina de {area} no ano do aluno",
+            acao=lambda f: {"bonus_prioridade": 0, "mensagem": ""},
+            prioridade=0,
+            condicoes=(
+                Condicao("area", "==", area),
+                Condicao("mesmo_ano_aluno", "==", True, padrao=False),
+            )
+        ))
+    return regras
+
+
+def _ingenuo(alunos: list, regras) -> list:
+    disparos = []
+    for fatos, contextos in alunos:
+        for contexto in contextos:
+            completos = {**fatos, **contexto}
+            disparos.append([r.id for r in regras if r.avaliar(completos)])
+    return disparos
+
+
+def _rede(alunos: list, rede) -> list:
+    disparos = []
+    for fatos, contextos in alunos:
+        sessao = rede.sessao(fatos)
+        for contexto in contextos:
+            sessao.definir_contexto(contexto)
+            disparos.append([r.id for r in sessao.ativas()])
+    return disparos
+
+
+def _medir(funcao, execucoes: int) -> list:
+    tempos = []
+    for _ in range(execucoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return tempos
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark do casamento de regras")
+    parser.add_argument("--alunos", type=int, default=1000)
+    parser.add_argument("--execucoes", type=int, default=5)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--regras-extras", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    alunos = _alunos_sinteticos(args.alunos, args.semente)
+    regras = list(get_todas_regras()) + _regras_extras(args.regras_extras)
+    rede = RedeDiscriminacao(regras)
+    pares = sum(len(c) for _, c in alunos)
+
+    ingenuo = _ingenuo(alunos, regras)
+    pela_rede = _rede(alunos, rede)
+    divergencias = sum(sorted(a) != sorted(b) for a, b in zip(ingenuo, pela_rede))
+    if divergencias:
+        print(f"❌ {divergencias} de {pares} pares com regras disparadas diferentes")
+        return 1
+    print(f"✓ Mesmo conjunto de regras disparadas em {pares} pares (aluno, disciplina)")
+
+    sessao = rede.sessao(alunos[0][0])
+    for contexto in alunos[0][1]:
+        sessao.definir_contexto(contexto)
+    print(f"  rede: {len(rede.alfas)} nós alfa para {len(regras)} regras; "
+          f"{sessao.testes_alfa} testes alfa no 1º aluno "
+          f"(ingênuo: {len(regras) * len(alunos[0][1])} avaliações de regra)")
+
+    for nome, funcao in (("ingenuo", lambda: _ingenuo(alunos, regras)),
+                         ("rede", lambda: _rede(alunos, rede))):
+        tempos = _medir(funcao, args.execucoes)
+        mediana = statistics.median(tempos)
+        print(f"{nome:<10} mediana {mediana * 1000:8.1f} ms"
+              f" | {mediana / pares * 1e6:6.2f} µs por par")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+Benchmark de Inferência Incremental - inferir_incremental x recálculo completo
+
+Para alunos sintéticos (semente fixa), lança --notas notas aleatórias em
+sequência (aprovação ou reprovação em uma disciplina qualquer) e, a cada
+nota, compara:
+- incremental: MotorInferencia.inferir_incremental sobre o resultado anterior
+- completo: motor novo com o mesmo histórico + as mesmas notas, inferir()
+
+Qualquer diferença no ResultadoInferencia, nas regras disparadas ou nos
+fatos finais encerra com código 1.
+
+Uso:
+    python benchmarks/inferencia_incremental.py --alunos 2000 --notas 3
+"""
+import argparse
+import dataclasses
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from facts_base.student_facts import BaseFatos, GerenciadorFatosAluno
+from inference_engine.engine import MotorInferencia
+from knowledge_base.curriculo import obter_curriculo
+from inferencia_lote import _snapshots_sinteticos
+
+
+def _motor(snapshot) -> MotorInferencia:
+    base_fatos = BaseFatos()
+    gerenciador = GerenciadorFatosAluno(base_fatos)
+    gerenciador.inicializar_aluno_do_snapshot(snapshot)
+    return MotorInferencia(base_fatos, gerenciador)
+
+
+def _estado(motor: MotorInferencia, resultado) -> tuple:
+    explicacao = motor.get_explicacao_completa()
+    return dataclasses.asdict(resultado), explicacao["regras_disparadas"], explicacao["fatos_finais"]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark da inferência incremental")
+    parser.add_argument("--alunos", type=int, default=1000)
+    parser.add_argument("--notas", type=int, default=3,
+                        help="Notas lançadas em sequência por aluno")
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.semente)
+    ids = [d["id"] for d in obter_curriculo().disciplinas]
+    casos = divergencias = 0
+    t_incremental = t_completo = 0.0
+
+    for snapshot in _snapshots_sinteticos(args.alunos, args.semente):
+        motor = _motor(snapshot)
+        resultado = motor.inferir()
+        notas = []
+        for _ in range(args.notas):
+            aprovada = rng.random() < 0.7
+            nota = round(rng.uniform(5, 10) if aprovada else rng.uniform(0, 5), 1)
+            notas.append((rng.choice(ids), aprovada, nota))
+
+            inicio = time.perf_counter()
+            resultado = motor.inferir_incremental(resultado, *notas[-1])
+            t_incremental += time.perf_counter() - inicio
+
+            completo = _motor(snapshot)
+            for disciplina_id, aprovou, valor in notas:
+                registrar = (completo.gerenciador.registrar_aprovacao if aprovou
+                             else completo.gerenciador.registrar_reprovacao)
+                registrar(disciplina_id, valor)
+            inicio = time.perf_counter()
+            esperado = completo.inferir()
+            t_completo += time.perf_counter() - inicio
+
+            casos += 1
+            divergencias += _estado(motor, resultado) != _estado(completo, esperado)
+
+    if divergencias:
+        print(f"❌ {divergencias} de {casos} notas com resultado diferente do recálculo completo")
+        return 1
+    print(f"✓ Resultado idêntico ao recálculo completo em {casos} notas")
+    print(f"incremental {t_incremental / casos * 1e6:7.0f} µs por nota"
+          f" | completo {t_completo / casos * 1e6:7.0f} µs por nota"
+          f" | {t_completo / t_incremental:4.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
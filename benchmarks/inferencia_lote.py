@@ -0,0 +1,146 @@
+"""
+Benchmark de Inferência em Lote - MotorInferencia.inferir_lote x inferir()
+
+Gera alunos sintéticos (semente fixa) como StudentSnapshot e mede a vazão
+(alunos/s) de duas formas:
+- individual: BaseFatos + GerenciadorFatosAluno + MotorInferencia por aluno
+- lote: MotorInferencia.inferir_lote, em blocos de --lote alunos
+- lote+cache (com --cache): o mesmo, com um CacheInferencia; como os
+  --distintos snapshots se repetem em ciclo, mede o ganho com históricos
+  repetidos (nível RESUMO: a explicação COMPLETA não usa o cache)
+
+Antes de medir, confere que os dois caminhos produzem exatamente o mesmo
+ResultadoInferencia para os primeiros --verificar alunos.
+
+Uso:
+    python benchmarks/inferencia_lote.py --tamanhos 1000,10000,100000
+"""
+import argparse
+import dataclasses
+import itertools
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from database import StudentSnapshot
+from facts_base.student_facts import BaseFatos, GerenciadorFatosAluno
+from inference_engine.cache import CacheInferencia
+from inference_engine.engine import MotorInferencia, NivelExplicacao
+from knowledge_base.curriculo import obter_curriculo
+
+
+def _snapshots_sinteticos(quantidade: int, semente: int) -> list:
+    """Gera snapshots de alunos aleatórios (sem tocar no banco)"""
+    rng = random.Random(semente)
+    ids = [d["id"] for d in obter_curriculo().disciplinas]
+    snapshots = []
+    for i in range(quantidade):
+        aprovadas = [x for x in ids if rng.random() < rng.random()]
+        reprovadas = [x for x in ids if x not in aprovadas and rng.random() < 0.15]
+        snapshot = StudentSnapshot(aluno={
+            "id": f"S{i}",
+            "nome": f"Aluno {i}",
+            "ano_atual": rng.randint(1, 3),
+            "tipo": "novo" if rng.random() < 0.1 else "veterano",
+        })
+        for chave, lista, faixa in (("aprovadas", aprovadas, (5, 10)),
+                                    ("reprovadas", reprovadas, (0, 5))):
+            for d_id in lista:
+                nota = round(rng.uniform(*faixa), 1)
+                snapshot.historico[chave].append({"id": d_id, "nota": nota, "ano_cursado": 2025})
+                snapshot.notas[d_id] = nota
+        snapshots.append(snapshot)
+    return snapshots
+
+
+def _individual(snapshot: StudentSnapshot):
+    base_fatos = BaseFatos()
+    gerenciador = GerenciadorFatosAluno(base_fatos)
+    gerenciador.inicializar_aluno_do_snapshot(snapshot)
+    return MotorInferencia(base_fatos, gerenciador).inferir()
+
+
+def _verificar(snapshots: list) -> int:
+    """Número de alunos cujo resultado em lote difere do individual"""
+    lote = MotorInferencia.inferir_lote(snapshots)
+    return sum(
+        dataclasses.asdict(a) != dataclasses.asdict(_individual(s))
+        for a, s in zip(lote, snapshots)
+    )
+
+
+def _vazao(funcao, alunos: int) -> float:
+    inicio = time.perf_counter()
+    funcao()
+    return alunos / (time.perf_counter() - inicio)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de inferência em lote")
+    parser.add_argument("--tamanhos", default="1000,10000,100000",
+                        help="Tamanhos de turma separados por vírgula")
+    parser.add_argument("--lote", type=int, default=1000,
+                        help="Alunos por chamada de inferir_lote")
+    parser.add_argument("--distintos", type=int, default=2000,
+                        help="Snapshots distintos gerados (reutilizados em ciclo)")
+    parser.add_argument("--verificar", type=int, default=1000)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--cache", action="store_true",
+                        help="Mede também inferir_lote com cache de resultados")
+    args = parser.parse_args(argv)
+
+    base = _snapshots_sinteticos(args.distintos, args.semente)
+
+    divergentes = _verificar(base[:args.verificar])
+    if divergentes:
+        print(f"❌ {divergentes} aluno(s) com resultado diferente entre lote e individual")
+        return 1
+    print(f"✓ Resultados idênticos em {min(args.verificar, len(base))} alunos")
+
+    for tamanho in (int(t) for t in args.tamanhos.split(",")):
+        def turma():
+            return itertools.islice(itertools.cycle(base), tamanho)
+
+        # Os dois caminhos guardam os resultados de um bloco inteiro, como
+        # faria quem consome o lote (ex.: gravar no banco)
+        def blocos():
+            alunos = turma()
+            while True:
+                bloco = list(itertools.islice(alunos, args.lote))
+                if not bloco:
+                    return
+                yield bloco
+
+        def individual():
+            for bloco in blocos():
+                [_individual(snapshot) for snapshot in bloco]
+
+        def em_lote():
+            for bloco in blocos():
+                MotorInferencia.inferir_lote(bloco)
+
+        v_individual = _vazao(individual, tamanho)
+        v_lote = _vazao(em_lote, tamanho)
+        linha = (f"{tamanho:>7} alunos | individual {v_individual:8.0f} alunos/s"
+                 f" | lote {v_lote:8.0f} alunos/s | {v_lote / v_individual:4.2f}x")
+
+        if args.cache:
+            cache = CacheInferencia(max_itens=args.distintos)
+
+            def com_cache():
+                for bloco in blocos():
+                    MotorInferencia.inferir_lote(bloco, cache=cache,
+                                                 nivel_explicacao=NivelExplicacao.RESUMO)
+
+            v_cache = _vazao(com_cache, tamanho)
+            linha += (f" | cache {v_cache:8.0f} alunos/s ({v_cache / v_individual:4.2f}x,"
+                      f" acertos {cache.estatisticas()['taxa_acerto']:.0%})")
+        print(linha)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+Benchmark de Inicialização - mede o custo de importar main.py a frio
+
+Cada execução roda em um processo Python novo (sem cache de módulos em
+memória), apontando para uma cópia temporária do banco:
+- importacao_database: tempo de `import database` (scripts e workers)
+- importacao: tempo de `import main`
+- primeira_requisicao: `import main` + GET /api/curriculo via test client
+
+Uso:
+    python benchmarks/inicializacao.py --execucoes 15
+    python benchmarks/inicializacao.py --importtime   # maiores módulos (-X importtime)
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+RAIZ = Path(__file__).parent.parent
+
+_SCRIPT_IMPORTACAO = """
+import time
+t = time.perf_counter()
+import main
+print(time.perf_counter() - t)
+"""
+
+_SCRIPT_IMPORTACAO_DATABASE = """
+import time
+t = time.perf_counter()
+import database
+print(time.perf_counter() - t)
+"""
+
+_SCRIPT_PRIMEIRA_REQUISICAO = """
+import time
+t = time.perf_counter()
+import main
+main.app.test_client().get('/api/curriculo')
+print(time.perf_counter() - t)
+"""
+
+
+def _medir(script: str, execucoes: int, banco: Path) -> list:
+    """Roda o script em processos novos e retorna os tempos em segundos"""
+    env = dict(os.environ, UNIADVISOR_DB=str(banco))
+    tempos = []
+    for _ in range(execucoes):
+        saida = subprocess.run(
+            [sys.executable, "-c", script], cwd=RAIZ, env=env,
+            capture_output=True, text=True, check=True
+        ).stdout.strip().splitlines()
+        tempos.append(float(saida[-1]))
+    return tempos
+
+
+def _resumo(nome: str, tempos: list) -> None:
+    print(f"{nome:<22} mediana {statistics.median(tempos) * 1000:8.1f} ms"
+          f" | mín {min(tempos) * 1000:8.1f} ms | máx {max(tempos) * 1000:8.1f} ms")
+
+
+def _importtime(banco: Path, top: int = 15) -> None:
+    """Lista os módulos com maior tempo cumulativo de importação"""
+    env = dict(os.environ, UNIADVISOR_DB=str(banco))
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=RAIZ, env=env, capture_output=True, text=True, check=True
+    ).stderr
+    linhas = []
+    for linha in stderr.splitlines():
+        if not linha.startswith("import time:") or "cumulative" in linha:
+            continue
+        _, cumulativo, modulo = linha[len("import time:"):].split("|", 2)
+        linhas.append((int(cumulativo), modulo.strip()))
+    for cumulativo, modulo in sorted(linhas, reverse=True)[:top]:
+        print(f"{cumulativo / 1000:8.1f} ms  {modulo}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de inicialização do main.py")
+    parser.add_argument("--execucoes", type=int, default=10)
+    parser.add_argument("--importtime", action="store_true",
+                        help="Mostra os módulos mais caros de importar")
+    args = parser.parse_args(argv)
+
+    origem = RAIZ / "uniadvisor.db"
+    with tempfile.TemporaryDirectory() as tmp:
+        banco = Path(tmp) / "bench.db"
+        if origem.exists():
+            shutil.copy(origem, banco)
+
+        if args.importtime:
+            _importtime(banco)
+            return 0
+
+        # Aquecimento: a primeira execução aplica migrações pendentes
+        # e popula o cache de bytecode
+        _medir(_SCRIPT_IMPORTACAO, 1, banco)
+
+        print(f"Python {sys.version.split()[0]} | {args.execucoes} execuções por cenário")
+        _resumo("importacao_database", _medir(_SCRIPT_IMPORTACAO_DATABASE, args.execucoes, banco))
+        _resumo("importacao", _medir(_SCRIPT_IMPORTACAO, args.execucoes, banco))
+        _resumo("primeira_requisicao", _medir(_SCRIPT_PRIMEIRA_REQUISICAO, args.execucoes, banco))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,36 @@
 from .db import (
     inicializar_banco,
     get_connection,
+    unidade_de_trabalho,
+    ponto_de_restauracao,
+    configurar_banco,
+    estatisticas_pool,
+    fechar_conexoes,
+    StudentSnapshot,
     AlunoRepository,
     HistoricoRepository,
     MatriculaRepository,
-    LogRepository
+    LogRepository,
+    RecalculoRepository
 )
+from .log_assincrono import EscritorLog, escritor_log
+from .pool import inteiro_env
 
 __all__ = [
     'inicializar_banco',
     'get_connection',
+    'unidade_de_trabalho',
+    'ponto_de_restauracao',
+    'configurar_banco',
+    'estatisticas_pool',
+    'fechar_conexoes',
+    'StudentSnapshot',
     'AlunoRepository',
     'HistoricoRepository',
     'MatriculaRepository',
-    'LogRepository'
+    'LogRepository',
+    'RecalculoRepository',
+    'EscritorLog',
+    'escritor_log',
+    'inteiro_env'
 ]
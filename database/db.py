@@ -4,91 +4,388 @@ Módulo de Banco de Dados - Persistência com SQLite
 Gerencia o armazenamento persistente do histórico dos alunos,
 disciplinas cursadas, notas e status de matrícula.
 """
+import json
+import os
 import sqlite3
+import zlib
+from collections import Counter
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterator, List, Any, Optional, Tuple, Union
 from contextlib import contextmanager
+from dataclasses import dataclass, field
 from datetime import datetime
 
+from .pool import PoolConexoes, criar_pool_padrao
 
-DATABASE_PATH = Path(__file__).parent.parent / "uniadvisor.db"
+
+DATABASE_PATH = Path(os.environ.get(
+    "UNIADVISOR_DB", Path(__file__).parent.parent / "uniadvisor.db"
+))
+
+# O schema é migrado de forma preguiçosa, na primeira conexão do pool
+# (migrar_schema é definida mais abaixo, por isso o lambda).
+_pool: PoolConexoes = criar_pool_padrao(DATABASE_PATH, inicializador=lambda conn: migrar_schema(conn))
 
 
 @contextmanager
 def get_connection():
-    """Context manager para conexão com o banco"""
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row
+    """
+    Context manager para conexão com o banco.
+
+    A conexão vem do pool e é reutilizada entre chamadas. Blocos aninhados
+    na mesma thread compartilham a conexão e o commit/rollback acontece
+    apenas ao sair do bloco mais externo.
+    """
+    conn = _pool.adquirir()
     try:
         yield conn
-        conn.commit()
+        if _pool.eh_externo():
+            conn.commit()
     except Exception as e:
-        conn.rollback()
+        if _pool.eh_externo():
+            conn.rollback()
         raise e
     finally:
-        conn.close()
+        _pool.liberar()
+
+
+@contextmanager
+def unidade_de_trabalho():
+    """
+    Agrupa várias operações dos repositórios em uma única transação.
+
+    Todas as chamadas feitas dentro do bloco (na mesma thread) usam a mesma
+    conexão e são confirmadas com um único commit ao final. A transação é
+    aberta com BEGIN IMMEDIATE para reservar o lock de escrita logo no início,
+    evitando falhas de "database is locked" ao promover uma leitura a escrita.
+    """
+    with get_connection() as conn:
+        if not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE")
+        yield conn
+
 
+@contextmanager
+def ponto_de_restauracao(nome: str = "item"):
+    """
+    Isola um trecho dentro de uma unidade_de_trabalho (SAVEPOINT).
 
-def inicializar_banco():
-    """Cria as tabelas do banco de dados se não existirem"""
+    Se o bloco falhar, só as operações dele são desfeitas e a exceção é
+    propagada; o restante da transação continua e é confirmado normalmente.
+    """
     with get_connection() as conn:
+        conn.execute(f"SAVEPOINT {nome}")
+        try:
+            yield conn
+        except Exception:
+            conn.execute(f"ROLLBACK TO {nome}")
+            conn.execute(f"RELEASE {nome}")
+            raise
+        conn.execute(f"RELEASE {nome}")
+
+
+def configurar_banco(caminho: Union[str, Path] = None, **opcoes) -> PoolConexoes:
+    """
+    Substitui o pool de conexões (por exemplo, para apontar outro arquivo).
+
+    As opções aceitas são as de PoolConexoes (max_ociosas, busy_timeout_ms,
+    cache_kib, mmap_bytes).
+    """
+    global DATABASE_PATH, _pool
+    if caminho is not None:
+        DATABASE_PATH = Path(caminho)
+    _pool.fechar_todas()
+    if opcoes:
+        _pool = PoolConexoes(DATABASE_PATH, inicializador=migrar_schema, **opcoes)
+    else:
+        _pool = criar_pool_padrao(DATABASE_PATH, inicializador=migrar_schema)
+    return _pool
+
+
+def estatisticas_pool() -> Dict[str, int]:
+    """Retorna as estatísticas do pool de conexões"""
+    return _pool.estatisticas()
+
+
+def fechar_conexoes() -> int:
+    """Fecha as conexões ociosas do pool"""
+    return _pool.fechar_todas()
+
+
+def criar_tabelas(cursor) -> None:
+    """Cria as tabelas principais se não existirem"""
+    # Tabela de Alunos
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS alunos (
+            id TEXT PRIMARY KEY,
+            nome TEXT NOT NULL,
+            ano_atual INTEGER NOT NULL DEFAULT 1,
+            tipo TEXT NOT NULL DEFAULT 'novo',
+            data_cadastro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            data_atualizacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # Tabela de Histórico de Disciplinas
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS historico_disciplinas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            aluno_id TEXT NOT NULL,
+            disciplina_id TEXT NOT NULL,
+            status TEXT NOT NULL,
+            nota REAL,
+            ano_cursado INTEGER,
+            semestre INTEGER,
+            data_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (aluno_id) REFERENCES alunos(id),
+            UNIQUE(aluno_id, disciplina_id, ano_cursado)
+        )
+    """)
+    
+    # Tabela de Matrículas Ativas
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS matriculas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            aluno_id TEXT NOT NULL,
+            disciplina_id TEXT NOT NULL,
+            ano_letivo INTEGER NOT NULL,
+            data_matricula TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            status TEXT DEFAULT 'ativa',
+            FOREIGN KEY (aluno_id) REFERENCES alunos(id),
+            UNIQUE(aluno_id, disciplina_id, ano_letivo)
+        )
+    """)
+    
+    # Tabela de Log de Inferências (para auditoria)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS log_inferencias (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            aluno_id TEXT NOT NULL,
+            regras_disparadas TEXT,
+            resultado TEXT,
+            data_consulta TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (aluno_id) REFERENCES alunos(id)
+        )
+    """)
+
+
+# Índices secundários (idempotentes). Cobrem as buscas por aluno + status,
+# a listagem ordenada por nome e as consultas do log por aluno/data.
+INDICES = [
+    """CREATE INDEX IF NOT EXISTS idx_alunos_nome_id
+       ON alunos (nome, id)""",
+    """CREATE INDEX IF NOT EXISTS idx_historico_aluno_status
+       ON historico_disciplinas (aluno_id, status, disciplina_id, nota, ano_cursado)""",
+    """CREATE INDEX IF NOT EXISTS idx_matriculas_aluno_status
+       ON matriculas (aluno_id, status, disciplina_id)""",
+    """CREATE INDEX IF NOT EXISTS idx_log_aluno_data
+       ON log_inferencias (aluno_id, data_consulta)""",
+    """CREATE INDEX IF NOT EXISTS idx_log_data
+       ON log_inferencias (data_consulta)""",
+]
+
+
+def criar_indices(cursor) -> None:
+    """Cria os índices secundários se ainda não existirem"""
+    for ddl in INDICES:
+        cursor.execute(ddl)
+
+
+def criar_schema_retencao(cursor) -> None:
+    """Cria (de forma idempotente) as estruturas usadas pela retenção do log"""
+    colunas = {row[1] for row in cursor.execute("PRAGMA table_info(log_inferencias)")}
+    if "resultado_comprimido" not in colunas:
+        cursor.execute("ALTER TABLE log_inferencias ADD COLUMN resultado_comprimido BLOB")
+
+    # Quantas consultas dispararam cada regra, por dia
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS log_rollup_diario (
+            dia TEXT NOT NULL,
+            regra_id TEXT NOT NULL,
+            disparos INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (dia, regra_id)
+        ) WITHOUT ROWID
+    """)
+
+    # Marcas d'água dos jobs de manutenção
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS manutencao_estado (
+            chave TEXT PRIMARY KEY,
+            valor TEXT
+        )
+    """)
+
+
+def criar_schema_recalculo(cursor) -> None:
+    """Cria as tabelas do recálculo em massa (resultados e checkpoints)"""
+    # Último resultado da inferência de cada aluno
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS resultados_inferencia (
+            aluno_id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            novo_ano INTEGER,
+            disciplinas_elegiveis TEXT NOT NULL,
+            disciplinas_sugeridas TEXT NOT NULL,
+            regras_disparadas TEXT NOT NULL,
+            execucao TEXT,
+            data_calculo TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (aluno_id) REFERENCES alunos(id)
+        )
+    """)
+
+    # Progresso de cada execução do recálculo (para retomar de onde parou)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS recalculo_checkpoint (
+            execucao TEXT PRIMARY KEY,
+            ultimo_aluno_id TEXT,
+            processados INTEGER NOT NULL DEFAULT 0,
+            concluido INTEGER NOT NULL DEFAULT 0,
+            atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def criar_schema_consultas(cursor) -> None:
+    """Identificador e entrada de cada consulta no log (para refazer a explicação)"""
+    colunas = {row[1] for row in cursor.execute("PRAGMA table_info(log_inferencias)")}
+    if "consulta_id" not in colunas:
+        cursor.execute("ALTER TABLE log_inferencias ADD COLUMN consulta_id TEXT")
+    if "entrada" not in colunas:
+        cursor.execute("ALTER TABLE log_inferencias ADD COLUMN entrada TEXT")
+    cursor.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_log_consulta
+        ON log_inferencias (consulta_id) WHERE consulta_id IS NOT NULL
+    """)
+
+
+# Versões do schema, gravadas em PRAGMA user_version. Cada passo é
+# idempotente, então bancos antigos (sem versão gravada) migram com segurança.
+MIGRACOES = [
+    (1, criar_tabelas),
+    (2, criar_indices),
+    (3, criar_schema_retencao),
+    (4, criar_schema_recalculo),
+    (5, criar_schema_consultas),
+]
+
+SCHEMA_VERSION = MIGRACOES[-1][0]
+
+
+def migrar_schema(conn: sqlite3.Connection) -> bool:
+    """
+    Aplica as migrações pendentes em uma conexão.
+
+    Retorna False sem tocar no banco quando o arquivo já está na versão
+    atual; caso contrário aplica os passos faltantes em uma transação.
+    """
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+        return False
+
+    if not conn.in_transaction:
+        conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Outro processo pode ter migrado enquanto esperávamos o lock
+        versao = conn.execute("PRAGMA user_version").fetchone()[0]
+        if versao >= SCHEMA_VERSION:
+            conn.commit()
+            return False
+
         cursor = conn.cursor()
-        
-        # Tabela de Alunos
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS alunos (
-                id TEXT PRIMARY KEY,
-                nome TEXT NOT NULL,
-                ano_atual INTEGER NOT NULL DEFAULT 1,
-                tipo TEXT NOT NULL DEFAULT 'novo',
-                data_cadastro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                data_atualizacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Tabela de Histórico de Disciplinas
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS historico_disciplinas (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                aluno_id TEXT NOT NULL,
-                disciplina_id TEXT NOT NULL,
-                status TEXT NOT NULL,
-                nota REAL,
-                ano_cursado INTEGER,
-                semestre INTEGER,
-                data_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (aluno_id) REFERENCES alunos(id),
-                UNIQUE(aluno_id, disciplina_id, ano_cursado)
-            )
-        """)
-        
-        # Tabela de Matrículas Ativas
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS matriculas (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                aluno_id TEXT NOT NULL,
-                disciplina_id TEXT NOT NULL,
-                ano_letivo INTEGER NOT NULL,
-                data_matricula TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                status TEXT DEFAULT 'ativa',
-                FOREIGN KEY (aluno_id) REFERENCES alunos(id),
-                UNIQUE(aluno_id, disciplina_id, ano_letivo)
-            )
-        """)
-        
-        # Tabela de Log de Inferências (para auditoria)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS log_inferencias (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                aluno_id TEXT NOT NULL,
-                regras_disparadas TEXT,
-                resultado TEXT,
-                data_consulta TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (aluno_id) REFERENCES alunos(id)
-            )
-        """)
-        
-        print("✅ Banco de dados inicializado com sucesso!")
+        for numero, passo in MIGRACOES:
+            if numero > versao:
+                passo(cursor)
+        cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    print("✅ Banco de dados inicializado com sucesso!")
+    return True
+
+
+def inicializar_banco() -> bool:
+    """
+    Garante que o schema do banco está na versão atual.
+
+    Não é mais necessário chamar esta função explicitamente: o pool aplica
+    as migrações na primeira conexão com cada arquivo de banco.
+    Retorna True se alguma migração foi aplicada nesta chamada.
+    """
+    with get_connection() as conn:
+        return migrar_schema(conn)
+
+
+@dataclass
+class StudentSnapshot:
+    """
+    Retrato completo de um aluno carregado em um único round trip:
+    dados cadastrais, histórico separado por status e notas por disciplina.
+    """
+    aluno: Dict[str, Any]
+    historico: Dict[str, List[Dict]] = field(default_factory=lambda: {
+        "aprovadas": [], "reprovadas": [], "cursando": []
+    })
+    notas: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def aluno_id(self) -> str:
+        return self.aluno["id"]
+
+    def ids_por_status(self, chave: str) -> List[str]:
+        """Retorna os IDs das disciplinas de uma chave do histórico"""
+        return [d["id"] for d in self.historico[chave]]
+
+
+_CHAVE_POR_STATUS = {
+    "aprovado": "aprovadas",
+    "reprovado": "reprovadas",
+    "cursando": "cursando",
+}
+
+
+def _montar_snapshots(rows) -> Dict[str, StudentSnapshot]:
+    """Agrupa as linhas de alunos LEFT JOIN historico_disciplinas por aluno"""
+    snapshots: Dict[str, StudentSnapshot] = {}
+    for row in rows:
+        snapshot = snapshots.get(row["id"])
+        if snapshot is None:
+            snapshot = StudentSnapshot(aluno={
+                "id": row["id"],
+                "nome": row["nome"],
+                "ano_atual": row["ano_atual"],
+                "tipo": row["tipo"],
+                "data_cadastro": row["data_cadastro"],
+                "data_atualizacao": row["data_atualizacao"],
+            })
+            snapshots[row["id"]] = snapshot
+
+        disciplina_id = row["h_disciplina_id"]
+        if disciplina_id is None:
+            continue
+
+        chave = _CHAVE_POR_STATUS.get(row["h_status"])
+        if chave:
+            snapshot.historico[chave].append({
+                "id": disciplina_id,
+                "nota": row["h_nota"],
+                "ano_cursado": row["h_ano_cursado"]
+            })
+        if row["h_nota"] is not None:
+            snapshot.notas[disciplina_id] = row["h_nota"]
+
+    return snapshots
+
+
+LIMITE_PAGINA_MAX = 500
+
+_SQL_SNAPSHOT = """
+    SELECT a.id, a.nome, a.ano_atual, a.tipo, a.data_cadastro, a.data_atualizacao,
+           h.disciplina_id AS h_disciplina_id, h.status AS h_status,
+           h.nota AS h_nota, h.ano_cursado AS h_ano_cursado
+    FROM alunos a
+    LEFT JOIN historico_disciplinas h ON h.aluno_id = a.id
+"""
 
 
 class AlunoRepository:
@@ -96,7 +393,7 @@ class AlunoRepository:
     
     @staticmethod
     def criar_ou_atualizar(aluno_id: str, nome: str, ano: int, tipo: str = 'veterano') -> Dict:
-        """Cria ou atualiza um aluno no banco"""
+        """Cria ou atualiza um aluno no banco (retorna a linha gravada via RETURNING)"""
         with get_connection() as conn:
             cursor = conn.cursor()
             
@@ -108,9 +405,11 @@ class AlunoRepository:
                     ano_atual = excluded.ano_atual,
                     tipo = excluded.tipo,
                     data_atualizacao = excluded.data_atualizacao
+                RETURNING *
             """, (aluno_id, nome, ano, tipo, datetime.now()))
             
-            return AlunoRepository.buscar_por_id(aluno_id)
+            row = cursor.fetchone()
+            return dict(row) if row else None
     
     @staticmethod
     def buscar_por_id(aluno_id: str) -> Optional[Dict]:
@@ -121,6 +420,53 @@ class AlunoRepository:
             row = cursor.fetchone()
             return dict(row) if row else None
     
+    @staticmethod
+    def buscar_snapshot(aluno_id: str) -> Optional[StudentSnapshot]:
+        """Carrega aluno, histórico e notas em uma única consulta"""
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(_SQL_SNAPSHOT + """
+                WHERE a.id = ?
+                ORDER BY h.ano_cursado, h.disciplina_id
+            """, (aluno_id,))
+            return _montar_snapshots(cursor.fetchall()).get(aluno_id)
+
+    @staticmethod
+    def buscar_snapshots(aluno_ids: List[str]) -> List[StudentSnapshot]:
+        """
+        Carrega vários alunos (com histórico e notas) em uma única consulta.
+        Retorna na ordem de `aluno_ids`, ignorando ids inexistentes.
+        """
+        if not aluno_ids:
+            return []
+        marcadores = ", ".join("?" * len(aluno_ids))
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(_SQL_SNAPSHOT + f"""
+                WHERE a.id IN ({marcadores})
+                ORDER BY a.id, h.ano_cursado, h.disciplina_id
+            """, list(aluno_ids))
+            snapshots = _montar_snapshots(cursor.fetchall())
+        return [snapshots[a_id] for a_id in aluno_ids if a_id in snapshots]
+
+    @staticmethod
+    def listar_ids(apos: str = "", limite: int = 500) -> List[str]:
+        """IDs dos alunos em ordem, a partir do id seguinte a `apos` (keyset)"""
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT id FROM alunos WHERE id > ? ORDER BY id LIMIT ?
+            """, (apos, limite))
+            return [row["id"] for row in cursor.fetchall()]
+
+    @staticmethod
+    def contar(apos: str = "") -> int:
+        """Quantidade de alunos com id maior que `apos`"""
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM alunos WHERE id > ?", (apos,))
+            return cursor.fetchone()[0]
+    
     @staticmethod
     def listar_todos() -> List[Dict]:
         """Lista todos os alunos"""
@@ -129,6 +475,52 @@ class AlunoRepository:
             cursor.execute("SELECT * FROM alunos ORDER BY nome")
             return [dict(row) for row in cursor.fetchall()]
     
+    @staticmethod
+    def listar_pagina(limite: int = 50, apos: Optional[Tuple[str, str]] = None
+                      ) -> Tuple[List[Dict], Optional[Tuple[str, str]]]:
+        """
+        Lista uma página de alunos ordenada por (nome, id) usando keyset.
+
+        `apos` é o cursor (nome, id) do último aluno da página anterior.
+        Retorna os alunos da página e o cursor da próxima (None na última).
+        """
+        limite = max(1, min(int(limite), LIMITE_PAGINA_MAX))
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            if apos is None:
+                cursor.execute("""
+                    SELECT * FROM alunos
+                    ORDER BY nome, id
+                    LIMIT ?
+                """, (limite + 1,))
+            else:
+                cursor.execute("""
+                    SELECT * FROM alunos
+                    WHERE (nome, id) > (?, ?)
+                    ORDER BY nome, id
+                    LIMIT ?
+                """, (apos[0], apos[1], limite + 1))
+            alunos = [dict(row) for row in cursor.fetchall()]
+
+        if len(alunos) > limite:
+            alunos = alunos[:limite]
+            ultimo = alunos[-1]
+            return alunos, (ultimo["nome"], ultimo["id"])
+        return alunos, None
+    
+    @staticmethod
+    def iterar_todos(tamanho_lote: int = 500) -> Iterator[Dict]:
+        """
+        Percorre todos os alunos em ordem de (nome, id) sem carregar a tabela
+        inteira: busca uma página por vez e não segura a conexão entre páginas.
+        """
+        apos = None
+        while True:
+            alunos, apos = AlunoRepository.listar_pagina(tamanho_lote, apos)
+            yield from alunos
+            if apos is None:
+                return
+    
     @staticmethod
     def deletar(aluno_id: str) -> bool:
         """Remove um aluno e seu histórico"""
@@ -136,6 +528,7 @@ class AlunoRepository:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM historico_disciplinas WHERE aluno_id = ?", (aluno_id,))
             cursor.execute("DELETE FROM matriculas WHERE aluno_id = ?", (aluno_id,))
+            cursor.execute("DELETE FROM resultados_inferencia WHERE aluno_id = ?", (aluno_id,))
             cursor.execute("DELETE FROM alunos WHERE id = ?", (aluno_id,))
             return cursor.rowcount > 0
 
@@ -168,18 +561,26 @@ class HistoricoRepository:
     
     @staticmethod
     def registrar_multiplas(aluno_id: str, disciplinas: List[Dict]) -> int:
-        """Registra múltiplas disciplinas de uma vez"""
-        count = 0
-        for disc in disciplinas:
-            HistoricoRepository.registrar_disciplina(
-                aluno_id=aluno_id,
-                disciplina_id=disc['id'],
-                status=disc.get('status', 'aprovado'),
-                nota=disc.get('nota'),
-                ano_cursado=disc.get('ano_cursado')
-            )
-            count += 1
-        return count
+        """Registra múltiplas disciplinas de uma vez (um único executemany)"""
+        ano_padrao = datetime.now().year
+        linhas = [
+            (aluno_id, disc['id'], disc.get('status', 'aprovado'),
+             disc.get('nota'), disc.get('ano_cursado') or ano_padrao)
+            for disc in disciplinas
+        ]
+        if not linhas:
+            return 0
+
+        with get_connection() as conn:
+            conn.executemany("""
+                INSERT INTO historico_disciplinas (aluno_id, disciplina_id, status, nota, ano_cursado)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(aluno_id, disciplina_id, ano_cursado) DO UPDATE SET
+                    status = excluded.status,
+                    nota = excluded.nota,
+                    data_registro = CURRENT_TIMESTAMP
+            """, linhas)
+        return len(linhas)
     
     @staticmethod
     def buscar_historico_aluno(aluno_id: str) -> Dict[str, List]:
@@ -271,12 +672,21 @@ class MatriculaRepository:
     
     @staticmethod
     def registrar_multiplas(aluno_id: str, disciplinas: List[str], ano_letivo: int = None) -> int:
-        """Registra múltiplas matrículas"""
-        count = 0
-        for disc_id in disciplinas:
-            MatriculaRepository.registrar_matricula(aluno_id, disc_id, ano_letivo)
-            count += 1
-        return count
+        """Registra múltiplas matrículas (um único executemany)"""
+        ano = ano_letivo or datetime.now().year
+        linhas = [(aluno_id, disc_id, ano) for disc_id in disciplinas]
+        if not linhas:
+            return 0
+
+        with get_connection() as conn:
+            conn.executemany("""
+                INSERT INTO matriculas (aluno_id, disciplina_id, ano_letivo)
+                VALUES (?, ?, ?)
+                ON CONFLICT(aluno_id, disciplina_id, ano_letivo) DO UPDATE SET
+                    status = 'ativa',
+                    data_matricula = CURRENT_TIMESTAMP
+            """, linhas)
+        return len(linhas)
     
     @staticmethod
     def obter_matriculas_ativas(aluno_id: str) -> List[str]:
@@ -290,21 +700,303 @@ class MatriculaRepository:
             return [row["disciplina_id"] for row in cursor.fetchall()]
 
 
+def _decodificar_resultado(row) -> Dict:
+    """Lê o resultado de uma linha do log, comprimido ou não"""
+    if row["resultado"] is not None:
+        return json.loads(row["resultado"])
+    if row["resultado_comprimido"] is not None:
+        return json.loads(zlib.decompress(row["resultado_comprimido"]).decode("utf-8"))
+    return {}
+
+
+_CHAVE_ROLLUP = "rollup_ultimo_id"
+_CHAVE_COMPRESSAO = "compressao_ultimo_id"
+
+
+def _ler_marca(conn, chave: str) -> int:
+    """Lê uma marca d'água (último id processado) da manutenção do log"""
+    row = conn.execute("SELECT valor FROM manutencao_estado WHERE chave = ?", (chave,)).fetchone()
+    return int(row["valor"]) if row else 0
+
+
+def _gravar_marca(conn, chave: str, valor: int) -> None:
+    """Grava uma marca d'água da manutenção do log"""
+    conn.execute("""
+        INSERT INTO manutencao_estado (chave, valor) VALUES (?, ?)
+        ON CONFLICT(chave) DO UPDATE SET valor = excluded.valor
+    """, (chave, str(valor)))
+
+
 class LogRepository:
     """Repositório para log de inferências"""
     
     @staticmethod
-    def registrar_consulta(aluno_id: str, regras: List[str], resultado: Dict) -> int:
+    def registrar_consulta(aluno_id: str, regras: List[str], resultado: Dict,
+                           consulta_id: Optional[str] = None, entrada: Optional[Dict] = None) -> int:
         """Registra uma consulta de inferência"""
-        import json
         with get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                INSERT INTO log_inferencias (aluno_id, regras_disparadas, resultado)
-                VALUES (?, ?, ?)
-            """, (aluno_id, json.dumps(regras), json.dumps(resultado)))
+                INSERT INTO log_inferencias
+                    (aluno_id, regras_disparadas, resultado, consulta_id, entrada)
+                VALUES (?, ?, ?, ?, ?)
+            """, (aluno_id, json.dumps(regras), json.dumps(resultado), consulta_id,
+                  json.dumps(entrada) if entrada is not None else None))
             return cursor.lastrowid
+    
+    @staticmethod
+    def registrar_lote(consultas: List[tuple]) -> int:
+        """
+        Registra várias consultas de uma vez (usado pelo escritor assíncrono).
+
+        Cada item é uma tupla (aluno_id, regras, resultado) ou
+        (aluno_id, regras, resultado, consulta_id, entrada).
+        """
+        linhas = []
+        for item in consultas:
+            aluno_id, regras, resultado = item[:3]
+            consulta_id, entrada = item[3:5] if len(item) > 3 else (None, None)
+            linhas.append((aluno_id, json.dumps(regras), json.dumps(resultado), consulta_id,
+                           json.dumps(entrada) if entrada is not None else None))
+        with get_connection() as conn:
+            conn.executemany("""
+                INSERT INTO log_inferencias
+                    (aluno_id, regras_disparadas, resultado, consulta_id, entrada)
+                VALUES (?, ?, ?, ?, ?)
+            """, linhas)
+        return len(linhas)
+
+    @staticmethod
+    def buscar_consulta(consulta_id: str) -> Optional[Dict]:
+        """Consulta registrada com este identificador, incluindo a entrada original"""
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT id, aluno_id, regras_disparadas, resultado, resultado_comprimido,
+                       entrada, data_consulta
+                FROM log_inferencias
+                WHERE consulta_id = ?
+            """, (consulta_id,))
+            row = cursor.fetchone()
+            if not row:
+                return None
+            return {
+                "id": row["id"],
+                "aluno_id": row["aluno_id"],
+                "data_consulta": row["data_consulta"],
+                "regras_disparadas": json.loads(row["regras_disparadas"] or "[]"),
+                "resultado": _decodificar_resultado(row),
+                "entrada": json.loads(row["entrada"]) if row["entrada"] else None
+            }
+    
+    @staticmethod
+    def listar_por_aluno(aluno_id: str, limite: int = 20) -> List[Dict]:
+        """Retorna as consultas mais recentes de um aluno"""
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT id, aluno_id, regras_disparadas, resultado, resultado_comprimido, data_consulta
+                FROM log_inferencias
+                WHERE aluno_id = ?
+                ORDER BY data_consulta DESC
+                LIMIT ?
+            """, (aluno_id, limite))
+            return [
+                {
+                    "id": row["id"],
+                    "aluno_id": row["aluno_id"],
+                    "data_consulta": row["data_consulta"],
+                    "regras_disparadas": json.loads(row["regras_disparadas"] or "[]"),
+                    "resultado": _decodificar_resultado(row)
+                }
+                for row in cursor.fetchall()
+            ]
+    
+    @staticmethod
+    def contar_por_periodo(inicio: str, fim: str) -> int:
+        """Conta as consultas registradas em um intervalo de datas"""
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT COUNT(*) FROM log_inferencias
+                WHERE data_consulta >= ? AND data_consulta < ?
+            """, (inicio, fim))
+            return cursor.fetchone()[0]
+
+    
+    @staticmethod
+    def consolidar_lote(tamanho_lote: int = 500) -> int:
+        """
+        Acumula no rollup diário as regras disparadas do próximo lote de
+        consultas ainda não consolidadas. Retorna quantas consultas processou.
+        """
+        with unidade_de_trabalho() as conn:
+            ultimo_id = _ler_marca(conn, _CHAVE_ROLLUP)
+
+            rows = conn.execute("""
+                SELECT id, date(data_consulta) AS dia, regras_disparadas
+                FROM log_inferencias
+                WHERE id > ?
+                ORDER BY id
+                LIMIT ?
+            """, (ultimo_id, tamanho_lote)).fetchall()
+            if not rows:
+                return 0
+
+            contagem = Counter()
+            for row in rows:
+                for regra_id in set(json.loads(row["regras_disparadas"] or "[]")):
+                    contagem[(row["dia"], regra_id)] += 1
+
+            conn.executemany("""
+                INSERT INTO log_rollup_diario (dia, regra_id, disparos)
+                VALUES (?, ?, ?)
+                ON CONFLICT(dia, regra_id) DO UPDATE SET
+                    disparos = disparos + excluded.disparos
+            """, [(dia, regra_id, n) for (dia, regra_id), n in contagem.items()])
+
+            _gravar_marca(conn, _CHAVE_ROLLUP, rows[-1]["id"])
+            return len(rows)
+    
+    @staticmethod
+    def comprimir_lote(dias: int, tamanho_lote: int = 500) -> int:
+        """
+        Comprime (zlib) o resultado das consultas com mais de `dias` dias.
+
+        Percorre o log em ordem de id a partir da última marca d'água e para
+        na primeira consulta mais recente que o corte, então cada lote lê no
+        máximo `tamanho_lote` linhas. Retorna quantas linhas antigas percorreu
+        (0 quando não há mais nada a comprimir).
+        """
+        with unidade_de_trabalho() as conn:
+            ultimo_id = _ler_marca(conn, _CHAVE_COMPRESSAO)
+            rows = conn.execute("""
+                SELECT id, resultado, data_consulta < datetime('now', ?) AS antiga
+                FROM log_inferencias
+                WHERE id > ?
+                ORDER BY id
+                LIMIT ?
+            """, (f"-{int(dias)} days", ultimo_id, tamanho_lote)).fetchall()
+
+            comprimir = []
+            percorridas = 0
+            for row in rows:
+                if not row["antiga"]:
+                    break
+                ultimo_id = row["id"]
+                percorridas += 1
+                if row["resultado"] is not None:
+                    comprimir.append((zlib.compress(row["resultado"].encode("utf-8"), 9), row["id"]))
 
+            conn.executemany("""
+                UPDATE log_inferencias
+                SET resultado_comprimido = ?, resultado = NULL
+                WHERE id = ?
+            """, comprimir)
+            _gravar_marca(conn, _CHAVE_COMPRESSAO, ultimo_id)
+            return percorridas
+    
+    @staticmethod
+    def expurgar_lote(dias: int, tamanho_lote: int = 500) -> int:
+        """
+        Remove consultas com mais de `dias` dias que já foram consolidadas
+        no rollup diário. Retorna quantas linhas removeu.
+        """
+        with unidade_de_trabalho() as conn:
+            ultimo_id = _ler_marca(conn, _CHAVE_ROLLUP)
 
-# Inicializar banco ao importar o módulo
-inicializar_banco()
+            cursor = conn.execute("""
+                DELETE FROM log_inferencias
+                WHERE id IN (
+                    SELECT id FROM log_inferencias
+                    WHERE data_consulta < datetime('now', ?)
+                      AND id <= ?
+                    LIMIT ?
+                )
+            """, (f"-{int(dias)} days", ultimo_id, tamanho_lote))
+            return cursor.rowcount
+    
+    @staticmethod
+    def obter_rollup(dia_inicio: str, dia_fim: str) -> List[Dict]:
+        """Retorna os disparos de regras por dia no intervalo [dia_inicio, dia_fim]"""
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT dia, regra_id, disparos FROM log_rollup_diario
+                WHERE dia BETWEEN ? AND ?
+                ORDER BY dia, regra_id
+            """, (dia_inicio, dia_fim))
+            return [dict(row) for row in cursor.fetchall()]
+
+
+class RecalculoRepository:
+    """Repositório para resultados e checkpoints do recálculo em massa"""
+
+    @staticmethod
+    def gravar_resultados(resultados: List[tuple]) -> int:
+        """
+        Grava (ou substitui) os resultados de vários alunos em uma transação.
+
+        Cada item é uma tupla (aluno_id, status, novo_ano, elegiveis,
+        sugeridas, regras_disparadas, execucao); listas/dicts viram JSON.
+        """
+        linhas = [
+            (aluno_id, status, novo_ano, json.dumps(elegiveis), json.dumps(sugeridas),
+             json.dumps(regras), execucao)
+            for aluno_id, status, novo_ano, elegiveis, sugeridas, regras, execucao in resultados
+        ]
+        with unidade_de_trabalho() as conn:
+            conn.executemany("""
+                INSERT INTO resultados_inferencia
+                    (aluno_id, status, novo_ano, disciplinas_elegiveis,
+                     disciplinas_sugeridas, regras_disparadas, execucao, data_calculo)
+                VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(aluno_id) DO UPDATE SET
+                    status = excluded.status,
+                    novo_ano = excluded.novo_ano,
+                    disciplinas_elegiveis = excluded.disciplinas_elegiveis,
+                    disciplinas_sugeridas = excluded.disciplinas_sugeridas,
+                    regras_disparadas = excluded.regras_disparadas,
+                    execucao = excluded.execucao,
+                    data_calculo = excluded.data_calculo
+            """, linhas)
+        return len(linhas)
+
+    @staticmethod
+    def buscar_resultado(aluno_id: str) -> Optional[Dict]:
+        """Último resultado calculado para um aluno"""
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM resultados_inferencia WHERE aluno_id = ?", (aluno_id,))
+            row = cursor.fetchone()
+            if not row:
+                return None
+            resultado = dict(row)
+            for coluna in ("disciplinas_elegiveis", "disciplinas_sugeridas", "regras_disparadas"):
+                resultado[coluna] = json.loads(resultado[coluna])
+            return resultado
+
+    @staticmethod
+    def obter_checkpoint(execucao: str) -> Optional[Dict]:
+        """Progresso gravado de uma execução (None se nunca rodou)"""
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM recalculo_checkpoint WHERE execucao = ?", (execucao,))
+            row = cursor.fetchone()
+            return dict(row) if row else None
+
+    @staticmethod
+    def salvar_checkpoint(execucao: str, ultimo_aluno_id: Optional[str],
+                          processados: int, concluido: bool = False) -> None:
+        """Registra até qual aluno (em ordem de id) a execução já terminou"""
+        with get_connection() as conn:
+            conn.execute("""
+                INSERT INTO recalculo_checkpoint
+                    (execucao, ultimo_aluno_id, processados, concluido, atualizado_em)
+                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(execucao) DO UPDATE SET
+                    ultimo_aluno_id = excluded.ultimo_aluno_id,
+                    processados = excluded.processados,
+                    concluido = excluded.concluido,
+                    atualizado_em = excluded.atualizado_em
+            """, (execucao, ultimo_aluno_id, processados, int(concluido)))
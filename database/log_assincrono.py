@@ -0,0 +1,195 @@
+"""
+Escritor Assíncrono do Log de Inferências
+
+Tira a gravação de auditoria (log_inferencias) do caminho crítico da
+consulta: os registros entram em uma fila em memória e uma thread de
+fundo os grava em lotes (executemany + um único commit por lote).
+
+O lote é gravado quando atinge `tamanho_lote` itens ou quando
+`intervalo_flush` segundos se passam desde o primeiro item pendente.
+Ao encerrar o processo a fila é drenada.
+"""
+import atexit
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from .db import LogRepository
+from .pool import inteiro_env
+
+
+_PARAR = object()
+_FLUSH = object()
+
+
+class EscritorLog:
+    """Fila limitada + thread escritora para o log de inferências"""
+
+    def __init__(self, tamanho_lote: int = 100, intervalo_flush: float = 0.5,
+                 capacidade: int = 10000):
+        self.tamanho_lote = tamanho_lote
+        self.intervalo_flush = intervalo_flush
+        self.capacidade = capacidade
+
+        self._fila: "queue.Queue" = queue.Queue(maxsize=capacidade)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        # Itens enfileirados e processados (gravados ou com falha), em ordem
+        # de chegada: flush() espera só os que entraram antes da chamada
+        self._processados = threading.Condition(self._lock)
+        self._seq_enfileirado = 0
+        self._seq_processado = 0
+        # consulta_id ainda na fila (buscar antes de gravar não os encontra)
+        self._ids_pendentes: Set[str] = set()
+        self._stats = {
+            "enfileirados": 0,
+            "gravados": 0,
+            "descartados": 0,
+            "lotes": 0,
+            "falhas": 0,
+        }
+
+    def _garantir_thread(self) -> None:
+        """Inicia a thread escritora (também após um fork)"""
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                # Fila e thread do processo pai não sobrevivem ao fork
+                self._pid = os.getpid()
+                self._fila = queue.Queue(maxsize=self.capacidade)
+                self._thread = None
+                self._seq_enfileirado = self._seq_processado = 0
+                self._ids_pendentes = set()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._executar, name="uniadvisor-log", daemon=True
+                )
+                self._thread.start()
+
+    def registrar(self, aluno_id: str, regras: List[str], resultado: Dict[str, Any],
+                  consulta_id: Optional[str] = None, entrada: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Enfileira uma consulta para gravação.
+
+        `consulta_id` e `entrada` (os dados enviados na consulta) permitem
+        refazer a explicação depois; a serialização acontece na thread escritora.
+
+        Não bloqueia: se a fila estiver cheia o registro é descartado e
+        contabilizado em `descartados`. Retorna True se foi enfileirado.
+        """
+        self._garantir_thread()
+        with self._lock:
+            try:
+                self._fila.put_nowait((aluno_id, list(regras), dict(resultado), consulta_id, entrada))
+            except queue.Full:
+                self._stats["descartados"] += 1
+                return False
+            self._stats["enfileirados"] += 1
+            self._seq_enfileirado += 1
+            if consulta_id is not None:
+                self._ids_pendentes.add(consulta_id)
+        return True
+
+    def _executar(self) -> None:
+        """Laço da thread escritora"""
+        fila = self._fila
+        lote: List[tuple] = []
+        prazo = None
+
+        while True:
+            espera = None if prazo is None else max(0.0, prazo - time.monotonic())
+            try:
+                item = fila.get(timeout=espera)
+            except queue.Empty:
+                item = None
+
+            controle = item is _PARAR or item is _FLUSH
+            if item is not None and not controle:
+                lote.append(item)
+                if prazo is None:
+                    prazo = time.monotonic() + self.intervalo_flush
+
+            if lote and (controle or len(lote) >= self.tamanho_lote
+                         or time.monotonic() >= prazo):
+                self._gravar(lote)
+                lote = []
+                prazo = None
+
+            if item is _PARAR:
+                return
+
+    def _gravar(self, lote: List[tuple]) -> None:
+        """Grava um lote (serialização JSON feita aqui, fora da requisição)"""
+        if not lote:
+            return
+        try:
+            LogRepository.registrar_lote(lote)
+            sucesso = True
+        except Exception as e:
+            print(f"Erro ao gravar lote do log de inferências: {e}")
+            sucesso = False
+        with self._lock:
+            if sucesso:
+                self._stats["gravados"] += len(lote)
+                self._stats["lotes"] += 1
+            else:
+                self._stats["falhas"] += len(lote)
+            self._ids_pendentes.difference_update(item[3] for item in lote if item[3] is not None)
+            self._seq_processado += len(lote)
+            self._processados.notify_all()
+
+    def pendente(self, consulta_id: str) -> bool:
+        """True se a consulta foi enfileirada neste processo e ainda não foi gravada"""
+        with self._lock:
+            return consulta_id in self._ids_pendentes
+
+    def flush(self, timeout: float = 1.0) -> bool:
+        """
+        Espera (no máximo `timeout` segundos) a gravação dos itens
+        enfileirados antes desta chamada; os que chegarem depois não
+        atrasam a espera. Retorna True se todos foram processados.
+        """
+        if self._thread is None or not self._thread.is_alive() or self._pid != os.getpid():
+            return False
+        with self._lock:
+            alvo = self._seq_enfileirado
+            if self._seq_processado >= alvo:
+                return True
+        try:
+            # Grava o lote parcial sem esperar intervalo_flush; com a fila
+            # cheia a escritora já está gravando lotes completos
+            self._fila.put_nowait(_FLUSH)
+        except queue.Full:
+            pass
+        with self._lock:
+            return self._processados.wait_for(lambda: self._seq_processado >= alvo, timeout)
+
+    def parar(self, timeout: float = 5.0) -> None:
+        """Drena a fila e encerra a thread escritora"""
+        thread = self._thread
+        if thread is None or not thread.is_alive() or self._pid != os.getpid():
+            return
+        self._fila.put(_PARAR)
+        thread.join(timeout)
+        self._thread = None
+
+    def estatisticas(self) -> Dict[str, int]:
+        """Retorna contadores do escritor (inclui itens ainda na fila)"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["pendentes"] = self._fila.qsize()
+        stats["capacidade"] = self.capacidade
+        return stats
+
+
+escritor_log = EscritorLog(
+    tamanho_lote=inteiro_env("UNIADVISOR_LOG_LOTE", 100),
+    intervalo_flush=inteiro_env("UNIADVISOR_LOG_FLUSH_MS", 500) / 1000,
+    capacidade=inteiro_env("UNIADVISOR_LOG_CAPACIDADE", 10000),
+)
+
+atexit.register(escritor_log.parar)
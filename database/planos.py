@@ -0,0 +1,155 @@
+"""
+Verificação de Planos de Consulta
+
+Executa todos os métodos dos repositórios sobre um banco temporário,
+captura o SQL emitido e roda EXPLAIN QUERY PLAN em cada comando.
+Falha se algum deles fizer varredura completa de tabela (SCAN), exceto
+os métodos de VARREDURAS_PERMITIDAS.
+
+Uso:
+    python -m database.planos
+"""
+import re
+import sys
+import tempfile
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from database import db
+from database.db import (
+    AlunoRepository, HistoricoRepository, MatriculaRepository, LogRepository,
+    RecalculoRepository
+)
+
+
+REPOSITORIOS = [
+    AlunoRepository, HistoricoRepository, MatriculaRepository, LogRepository,
+    RecalculoRepository
+]
+
+# Uma chamada de exemplo para cada método público dos repositórios.
+# A ordem importa: as remoções ficam por último.
+CHAMADAS: Dict[str, Callable[[], object]] = {
+    "AlunoRepository.criar_ou_atualizar": lambda: AlunoRepository.criar_ou_atualizar("P1", "Plano", 1, "novo"),
+    "AlunoRepository.buscar_por_id": lambda: AlunoRepository.buscar_por_id("P1"),
+    "AlunoRepository.buscar_snapshot": lambda: AlunoRepository.buscar_snapshot("P1"),
+    "AlunoRepository.listar_todos": lambda: AlunoRepository.listar_todos(),
+    "AlunoRepository.listar_pagina": lambda: AlunoRepository.listar_pagina(10, ("Plano", "P0")),
+    "AlunoRepository.iterar_todos": lambda: list(AlunoRepository.iterar_todos()),
+    "AlunoRepository.buscar_snapshots": lambda: AlunoRepository.buscar_snapshots(["P1", "P2"]),
+    "AlunoRepository.listar_ids": lambda: AlunoRepository.listar_ids("P0", 10),
+    "AlunoRepository.contar": lambda: AlunoRepository.contar("P0"),
+    "HistoricoRepository.registrar_disciplina": lambda: HistoricoRepository.registrar_disciplina("P1", "MAT1", "aprovado", 8.0),
+    "HistoricoRepository.registrar_multiplas": lambda: HistoricoRepository.registrar_multiplas("P1", [{"id": "FIS1", "nota": 7.0}]),
+    "HistoricoRepository.buscar_historico_aluno": lambda: HistoricoRepository.buscar_historico_aluno("P1"),
+    "HistoricoRepository.obter_disciplinas_aprovadas": lambda: HistoricoRepository.obter_disciplinas_aprovadas("P1"),
+    "HistoricoRepository.obter_notas": lambda: HistoricoRepository.obter_notas("P1"),
+    "MatriculaRepository.registrar_matricula": lambda: MatriculaRepository.registrar_matricula("P1", "MAT2"),
+    "MatriculaRepository.registrar_multiplas": lambda: MatriculaRepository.registrar_multiplas("P1", ["FIS2"]),
+    "MatriculaRepository.obter_matriculas_ativas": lambda: MatriculaRepository.obter_matriculas_ativas("P1"),
+    "LogRepository.registrar_consulta": lambda: LogRepository.registrar_consulta("P1", ["R1"], {"status": "ok"}),
+    "LogRepository.registrar_lote": lambda: LogRepository.registrar_lote([("P1", ["R2"], {"status": "ok"})]),
+    "LogRepository.listar_por_aluno": lambda: LogRepository.listar_por_aluno("P1"),
+    "LogRepository.buscar_consulta": lambda: LogRepository.buscar_consulta("c0ffee"),
+    "LogRepository.contar_por_periodo": lambda: LogRepository.contar_por_periodo("2000-01-01", "2100-01-01"),
+    "LogRepository.consolidar_lote": lambda: LogRepository.consolidar_lote(),
+    "LogRepository.obter_rollup": lambda: LogRepository.obter_rollup("2000-01-01", "2100-01-01"),
+    "LogRepository.comprimir_lote": lambda: LogRepository.comprimir_lote(0),
+    "LogRepository.expurgar_lote": lambda: LogRepository.expurgar_lote(0),
+    "RecalculoRepository.gravar_resultados": lambda: RecalculoRepository.gravar_resultados([("P1", "aguardando", 1, [], [], [], "plano")]),
+    "RecalculoRepository.buscar_resultado": lambda: RecalculoRepository.buscar_resultado("P1"),
+    "RecalculoRepository.salvar_checkpoint": lambda: RecalculoRepository.salvar_checkpoint("plano", "P1", 1),
+    "RecalculoRepository.obter_checkpoint": lambda: RecalculoRepository.obter_checkpoint("plano"),
+    "HistoricoRepository.limpar_historico": lambda: HistoricoRepository.limpar_historico("P1"),
+    "AlunoRepository.deletar": lambda: AlunoRepository.deletar("P1"),
+}
+
+_COMANDOS_IGNORADOS = ("PRAGMA", "BEGIN", "COMMIT", "ROLLBACK", "CREATE", "SAVEPOINT", "RELEASE")
+# Toda linha SCAN percorre a tabela inteira, com ou sem índice
+# ("SCAN alunos USING INDEX ...") e em qualquer versão do SQLite
+# ("SCAN TABLE alunos" antes da 3.36). SCAN CONSTANT ROW não lê tabela.
+_SCAN_COMPLETO = re.compile(r"^SCAN (?!CONSTANT ROW)")
+
+# Métodos cuja função é ler a tabela inteira (em ordem de índice)
+VARREDURAS_PERMITIDAS = frozenset({
+    "AlunoRepository.listar_todos",
+    "AlunoRepository.iterar_todos",
+})
+
+
+def metodos_publicos() -> List[str]:
+    """Lista os métodos públicos de todos os repositórios"""
+    return [
+        f"{repo.__name__}.{nome}"
+        for repo in REPOSITORIOS
+        for nome, valor in vars(repo).items()
+        if not nome.startswith("_") and isinstance(valor, staticmethod)
+    ]
+
+
+def coletar_consultas() -> Dict[str, List[str]]:
+    """Executa as chamadas de exemplo e retorna o SQL emitido por método"""
+    faltando = sorted(set(metodos_publicos()) - set(CHAMADAS))
+    if faltando:
+        raise RuntimeError(f"Métodos sem chamada de exemplo em CHAMADAS: {', '.join(faltando)}")
+
+    consultas: Dict[str, List[str]] = {}
+    with db.get_connection() as conn:
+        for nome, chamada in CHAMADAS.items():
+            emitidos: List[str] = []
+            conn.set_trace_callback(emitidos.append)
+            try:
+                chamada()
+            finally:
+                conn.set_trace_callback(None)
+            consultas[nome] = [
+                sql for sql in emitidos
+                if not sql.lstrip().upper().startswith(_COMANDOS_IGNORADOS)
+            ]
+    return consultas
+
+
+def verificar_planos() -> List[Dict]:
+    """
+    Roda EXPLAIN QUERY PLAN em todas as consultas dos repositórios.
+
+    Retorna a lista de violações (vazia quando nenhuma consulta faz
+    varredura completa de tabela).
+    """
+    caminho_original = db.DATABASE_PATH
+    with tempfile.TemporaryDirectory() as tmp:
+        db.configurar_banco(Path(tmp) / "planos.db")
+        try:
+            db.inicializar_banco()
+            consultas = coletar_consultas()
+
+            violacoes = []
+            with db.get_connection() as conn:
+                for metodo, comandos in consultas.items():
+                    if metodo in VARREDURAS_PERMITIDAS:
+                        continue
+                    for sql in comandos:
+                        for linha in conn.execute("EXPLAIN QUERY PLAN " + sql).fetchall():
+                            detalhe = linha[3]
+                            if _SCAN_COMPLETO.match(detalhe):
+                                violacoes.append({
+                                    "metodo": metodo,
+                                    "sql": " ".join(sql.split()),
+                                    "plano": detalhe
+                                })
+            return violacoes
+        finally:
+            db.configurar_banco(caminho_original)
+
+
+if __name__ == "__main__":
+    violacoes = verificar_planos()
+    if violacoes:
+        print(f"✗ {len(violacoes)} consulta(s) com varredura completa de tabela:")
+        for v in violacoes:
+            print(f"  • {v['metodo']}: {v['plano']}")
+            print(f"    {v['sql']}")
+        sys.exit(1)
+    print(f"✓ Nenhuma varredura completa em {len(CHAMADAS)} métodos dos repositórios")
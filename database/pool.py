@@ -0,0 +1,202 @@
+"""
+Pool de Conexões SQLite
+
+Mantém conexões persistentes e reutilizáveis em vez de abrir uma conexão
+nova a cada operação dos repositórios. Cada thread recebe uma conexão
+emprestada do pool; chamadas aninhadas na mesma thread reutilizam essa
+mesma conexão e só a devolvem quando o bloco mais externo termina.
+
+Cada conexão é configurada com:
+- journal_mode=WAL (leitores não bloqueiam o escritor)
+- busy_timeout (espera pelo lock em vez de falhar com "database is locked")
+- synchronous=NORMAL (seguro em modo WAL, evita fsync a cada commit)
+- cache de páginas e mmap ajustados
+"""
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+
+class PoolConexoes:
+    """
+    Pool de conexões SQLite com empréstimo por thread.
+
+    As conexões ociosas ficam numa pilha limitada por `max_ociosas`;
+    conexões excedentes são fechadas ao serem devolvidas.
+
+    `inicializador`, se informado, é chamado uma única vez com a primeira
+    conexão emprestada (usado para migrar o schema de forma preguiçosa).
+    """
+
+    def __init__(self, caminho: Union[str, Path], max_ociosas: int = 8,
+                 busy_timeout_ms: int = 5000, cache_kib: int = 16384,
+                 mmap_bytes: int = 64 * 1024 * 1024,
+                 inicializador: Optional[Callable[[sqlite3.Connection], object]] = None):
+        self.caminho = Path(caminho)
+        self.inicializador = inicializador
+        self.max_ociosas = max_ociosas
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cache_kib = cache_kib
+        self.mmap_bytes = mmap_bytes
+
+        self._lock = threading.Lock()
+        self._lock_inicializacao = threading.Lock()
+        self._inicializado = inicializador is None
+        self._local = threading.local()
+        self._ociosas: List[sqlite3.Connection] = []
+        self._pid = os.getpid()
+        self._stats = {
+            "criadas": 0,
+            "reutilizadas": 0,
+            "emprestimos": 0,
+            "devolvidas": 0,
+            "descartadas": 0,
+            "em_uso": 0,
+        }
+
+    def _criar_conexao(self) -> sqlite3.Connection:
+        """Abre e configura uma nova conexão"""
+        conn = sqlite3.connect(
+            self.caminho,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        conn.execute(f"PRAGMA cache_size=-{int(self.cache_kib)}")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_bytes)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    def _verificar_fork(self) -> None:
+        """Descarta conexões herdadas de um processo pai após fork()"""
+        if os.getpid() != self._pid:
+            self._pid = os.getpid()
+            self._lock = threading.Lock()
+            self._lock_inicializacao = threading.Lock()
+            self._local = threading.local()
+            self._ociosas = []
+            self._stats["em_uso"] = 0
+
+    def adquirir(self) -> sqlite3.Connection:
+        """
+        Empresta uma conexão para a thread atual.
+
+        Se a thread já possui uma conexão emprestada, retorna a mesma
+        (aninhamento), apenas incrementando a profundidade.
+        """
+        self._verificar_fork()
+        conn = getattr(self._local, "conexao", None)
+        if conn is not None:
+            self._local.profundidade += 1
+            return conn
+
+        with self._lock:
+            self._stats["emprestimos"] += 1
+            if self._ociosas:
+                conn = self._ociosas.pop()
+                self._stats["reutilizadas"] += 1
+            else:
+                conn = None
+            self._stats["em_uso"] += 1
+
+        if conn is None:
+            try:
+                conn = self._criar_conexao()
+            except Exception:
+                with self._lock:
+                    self._stats["em_uso"] -= 1
+                raise
+            with self._lock:
+                self._stats["criadas"] += 1
+
+        self._local.conexao = conn
+        self._local.profundidade = 1
+
+        if not self._inicializado:
+            try:
+                self._inicializar(conn)
+            except Exception:
+                self.liberar()
+                raise
+        return conn
+
+    def _inicializar(self, conn: sqlite3.Connection) -> None:
+        """Executa o inicializador uma única vez por pool"""
+        with self._lock_inicializacao:
+            if not self._inicializado:
+                self.inicializador(conn)
+                self._inicializado = True
+
+    def liberar(self) -> bool:
+        """
+        Devolve a conexão da thread atual ao pool.
+
+        Retorna True quando o bloco mais externo foi encerrado
+        (ou seja, quando é o momento de fazer commit/rollback).
+        """
+        conn = getattr(self._local, "conexao", None)
+        if conn is None:
+            return True
+
+        self._local.profundidade -= 1
+        if self._local.profundidade > 0:
+            return False
+
+        self._local.conexao = None
+        with self._lock:
+            self._stats["em_uso"] -= 1
+            self._stats["devolvidas"] += 1
+            if len(self._ociosas) < self.max_ociosas:
+                self._ociosas.append(conn)
+                conn = None
+            else:
+                self._stats["descartadas"] += 1
+
+        if conn is not None:
+            conn.close()
+        return True
+
+    def eh_externo(self) -> bool:
+        """Indica se a thread atual está no bloco mais externo do empréstimo"""
+        return getattr(self._local, "profundidade", 0) <= 1
+
+    def fechar_todas(self) -> int:
+        """Fecha todas as conexões ociosas. Retorna quantas foram fechadas."""
+        with self._lock:
+            ociosas, self._ociosas = self._ociosas, []
+        for conn in ociosas:
+            conn.close()
+        return len(ociosas)
+
+    def estatisticas(self) -> Dict[str, int]:
+        """Retorna as estatísticas de uso do pool"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["ociosas"] = len(self._ociosas)
+        stats["max_ociosas"] = self.max_ociosas
+        return stats
+
+
+def inteiro_env(nome: str, padrao: int) -> int:
+    """Lê uma configuração inteira de variável de ambiente (vazia ou ausente: o padrão)"""
+    valor: Optional[str] = os.environ.get(nome)
+    return int(valor) if valor else padrao
+
+
+def criar_pool_padrao(caminho: Union[str, Path],
+                      inicializador: Optional[Callable[[sqlite3.Connection], object]] = None
+                      ) -> PoolConexoes:
+    """Cria o pool usando as configurações das variáveis de ambiente"""
+    return PoolConexoes(
+        caminho,
+        inicializador=inicializador,
+        max_ociosas=inteiro_env("UNIADVISOR_DB_POOL", 8),
+        busy_timeout_ms=inteiro_env("UNIADVISOR_DB_BUSY_TIMEOUT_MS", 5000),
+        cache_kib=inteiro_env("UNIADVISOR_DB_CACHE_KIB", 16384),
+        mmap_bytes=inteiro_env("UNIADVISOR_DB_MMAP_BYTES", 64 * 1024 * 1024),
+    )
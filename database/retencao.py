@@ -0,0 +1,164 @@
+"""
+Retenção do Log de Inferências
+
+Job de manutenção incremental para a tabela log_inferencias:
+1. Consolidação: acumula as regras disparadas em log_rollup_diario
+2. Compressão: guarda o resultado de consultas antigas comprimido (zlib)
+3. Expurgo: remove consultas além do prazo de retenção (já consolidadas)
+4. Vacuum: devolve ao sistema as páginas liberadas (PRAGMA incremental_vacuum),
+   se o banco estiver em auto_vacuum=INCREMENTAL (ver --ativar-vacuum-incremental)
+
+Cada etapa trabalha em lotes pequenos, cada lote em sua própria transação
+curta, com uma pausa entre lotes para não segurar o lock de escrita e
+deixar as consultas da aplicação passarem.
+
+Uso:
+    python -m database.retencao --dias-retencao 365 --dias-compressao 30
+    python -m database.retencao --ativar-vacuum-incremental   # uma vez, em janela de manutenção
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from database.db import LogRepository, get_connection
+
+
+def ativar_vacuum_incremental() -> bool:
+    """
+    Passa o banco para auto_vacuum=INCREMENTAL, necessário para a etapa de
+    vacuum devolver páginas. Num banco existente o modo só muda com um
+    VACUUM completo, que reescreve o arquivo com o lock exclusivo: rode uma
+    única vez, com a aplicação parada. Retorna False se já estava ativo.
+    """
+    with get_connection() as conn:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            return False
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        return True
+
+
+class ManutencaoLog:
+    """Executa consolidação, compressão e expurgo do log em lotes"""
+
+    def __init__(self, dias_retencao: int = 365, dias_compressao: int = 30,
+                 tamanho_lote: int = 500, pausa: float = 0.05,
+                 max_lotes: int = None):
+        self.dias_retencao = dias_retencao
+        self.dias_compressao = dias_compressao
+        self.tamanho_lote = tamanho_lote
+        self.pausa = pausa
+        self.max_lotes = max_lotes
+
+    def _em_lotes(self, etapa: Callable[[], int]) -> Dict[str, int]:
+        """Repete uma etapa até não haver mais trabalho (ou atingir max_lotes)"""
+        total = 0
+        lotes = 0
+        while self.max_lotes is None or lotes < self.max_lotes:
+            processados = etapa()
+            if processados == 0:
+                break
+            total += processados
+            lotes += 1
+            time.sleep(self.pausa)
+        return {"linhas": total, "lotes": lotes}
+
+    def consolidar(self) -> Dict[str, int]:
+        """Atualiza o rollup diário de disparos por regra"""
+        return self._em_lotes(lambda: LogRepository.consolidar_lote(self.tamanho_lote))
+
+    def comprimir(self) -> Dict[str, int]:
+        """Comprime o resultado das consultas mais antigas que dias_compressao"""
+        return self._em_lotes(
+            lambda: LogRepository.comprimir_lote(self.dias_compressao, self.tamanho_lote)
+        )
+
+    def expurgar(self) -> Dict[str, int]:
+        """Remove consultas mais antigas que dias_retencao"""
+        return self._em_lotes(
+            lambda: LogRepository.expurgar_lote(self.dias_retencao, self.tamanho_lote)
+        )
+
+    def devolver_paginas(self) -> Dict[str, int]:
+        """Devolve ao sistema as páginas livres do arquivo (auto_vacuum=INCREMENTAL)"""
+        lotes = self._em_lotes(self._devolver_lote)
+        return {"paginas": lotes["linhas"], "lotes": lotes["lotes"]}
+
+    def _devolver_lote(self) -> int:
+        with get_connection() as conn:
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                return 0
+            livres = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if not livres:
+                return 0
+            # execute() avança o pragma um passo só (uma página); executescript roda até o fim
+            conn.executescript(f"PRAGMA incremental_vacuum({self.tamanho_lote});")
+            return livres - conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+    def executar(self) -> Dict[str, Dict[str, int]]:
+        """
+        Executa as etapas na ordem correta.
+
+        A consolidação vem antes do expurgo: só são removidas consultas
+        que já foram contabilizadas no rollup.
+        """
+        relatorio = {
+            "consolidacao": self.consolidar(),
+            "compressao": self.comprimir(),
+            "expurgo": self.expurgar(),
+            "vacuum": self.devolver_paginas(),
+        }
+
+        # Transfere o WAL para o arquivo principal sem bloquear leitores
+        with get_connection() as conn:
+            conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+        return relatorio
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Manutenção do log de inferências")
+    parser.add_argument("--dias-retencao", type=int, default=365,
+                        help="Remove consultas com mais de N dias (padrão: 365)")
+    parser.add_argument("--dias-compressao", type=int, default=30,
+                        help="Comprime o resultado de consultas com mais de N dias (padrão: 30)")
+    parser.add_argument("--lote", type=int, default=500,
+                        help="Linhas por transação (padrão: 500)")
+    parser.add_argument("--pausa-ms", type=int, default=50,
+                        help="Pausa entre lotes em milissegundos (padrão: 50)")
+    parser.add_argument("--max-lotes", type=int, default=None,
+                        help="Limite de lotes por etapa nesta execução")
+    parser.add_argument("--ativar-vacuum-incremental", action="store_true",
+                        help="Só ativa auto_vacuum=INCREMENTAL (VACUUM completo, lock exclusivo) e sai")
+    args = parser.parse_args(argv)
+
+    if args.ativar_vacuum_incremental:
+        if ativar_vacuum_incremental():
+            print("✓ auto_vacuum=INCREMENTAL ativado")
+        else:
+            print("✓ auto_vacuum=INCREMENTAL já estava ativo")
+        return 0
+
+    manutencao = ManutencaoLog(
+        dias_retencao=args.dias_retencao,
+        dias_compressao=args.dias_compressao,
+        tamanho_lote=args.lote,
+        pausa=args.pausa_ms / 1000,
+        max_lotes=args.max_lotes,
+    )
+    relatorio = manutencao.executar()
+
+    for etapa, dados in relatorio.items():
+        if "paginas" in dados:
+            print(f"✓ {etapa}: {dados['paginas']} página(s) devolvida(s) em {dados['lotes']} lote(s)")
+        else:
+            print(f"✓ {etapa}: {dados['linhas']} linha(s) em {dados['lotes']} lote(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,3 @@
-from .student_facts import BaseFatos, GerenciadorFatosAluno
+from .student_facts import BaseFatos, GerenciadorFatosAluno, VisaoFatos
 
-__all__ = ['BaseFatos', 'GerenciadorFatosAluno']
+__all__ = ['BaseFatos', 'GerenciadorFatosAluno', 'VisaoFatos']
@@ -10,16 +10,79 @@ CORREÇÕES REALIZADAS:
 3. Método preparar_fatos_disciplina corrigido
 4. Cálculo correto de pré-requisitos faltantes
 """
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterator, List, Any, Mapping, Optional, Sequence, Set
 from dataclasses import dataclass, field
-import json
 from pathlib import Path
 import sys
 
 # Adicionar diretório pai ao path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from database import HistoricoRepository, AlunoRepository
+from database import AlunoRepository, StudentSnapshot
+from knowledge_base.curriculo import obter_curriculo
+
+
+# Fatos derivados que atualizar_fatos_derivados pode alterar (além de area_forte_*)
+_FATOS_INCREMENTAIS = (
+    "reprovacoes_ano", "critico_reprovacoes", "passou_todas_ano_atual",
+    "aprovadas_no_ano", "medias_por_area", "_mascara_dependencias",
+    "lista_dependencias", "tem_dependencia", "quantidade_dependencias",
+)
+
+
+class VisaoFatos(Mapping):
+    """
+    Visão somente leitura de fatos em camadas, sem copiar dicionários.
+
+    Cada camada sobrepõe as anteriores (ex.: fatos do aluno e, por cima, os
+    da disciplina em avaliação). A visão lê as camadas diretamente, então
+    alterações feitas nelas aparecem na visão.
+    """
+    __slots__ = ("_camadas",)
+
+    def __init__(self, *camadas: Mapping[str, Any]):
+        self._camadas = camadas
+
+    def com_camada(self, camada: Mapping[str, Any]) -> "VisaoFatos":
+        """Nova visão com `camada` por cima das atuais"""
+        return VisaoFatos(*self._camadas, camada)
+
+    def selecionar(self, chaves) -> Dict[str, Any]:
+        """Cópia só dos fatos em `chaves`, na mesma ordem de iteração da visão"""
+        selecionados: Dict[str, Any] = {}
+        for camada in self._camadas:
+            selecionados.update({k: v for k, v in camada.items() if k in chaves})
+        return selecionados
+
+    def __getitem__(self, chave: str) -> Any:
+        for camada in reversed(self._camadas):
+            if chave in camada:
+                return camada[chave]
+        raise KeyError(chave)
+
+    def get(self, chave: str, default: Any = None) -> Any:
+        for camada in reversed(self._camadas):
+            if chave in camada:
+                return camada[chave]
+        return default
+
+    def __contains__(self, chave: object) -> bool:
+        return any(chave in camada for camada in self._camadas)
+
+    def __iter__(self) -> Iterator[str]:
+        # Mesma ordem de {**camada1, **camada2, ...}
+        vistas = set()
+        for camada in self._camadas:
+            for chave in camada:
+                if chave not in vistas:
+                    vistas.add(chave)
+                    yield chave
+
+    def __len__(self) -> int:
+        return len(set().union(*self._camadas))
+
+    def __repr__(self) -> str:
+        return f"VisaoFatos({dict(self)!r})"
 
 
 @dataclass
@@ -30,15 +93,20 @@ class BaseFatos:
     """
     fatos: Dict[str, Any] = field(default_factory=dict)
     historico_inferencia: List[Dict] = field(default_factory=list)
+    # Incrementada a cada alteração feita pelos métodos desta classe
+    versao: int = field(default=0, compare=False)
+    _fatos_publicos: Optional[tuple] = field(default=None, repr=False, compare=False)
     
     def adicionar_fato(self, chave: str, valor: Any) -> None:
         """Adiciona ou atualiza um fato"""
         self.fatos[chave] = valor
+        self.versao += 1
     
     def remover_fato(self, chave: str) -> None:
         """Remove um fato"""
         if chave in self.fatos:
             del self.fatos[chave]
+            self.versao += 1
     
     def get_fato(self, chave: str, default: Any = None) -> Any:
         """Obtém um fato pelo nome"""
@@ -52,17 +120,31 @@ class BaseFatos:
         """Limpa todos os fatos"""
         self.fatos.clear()
         self.historico_inferencia.clear()
+        self.versao += 1
     
     def get_todos_fatos(self) -> Dict[str, Any]:
         """Retorna cópia de todos os fatos"""
         return self.fatos.copy()
+
+    def visao(self, contexto: Optional[Mapping[str, Any]] = None) -> VisaoFatos:
+        """Visão somente leitura dos fatos (sem cópia), opcionalmente com um contexto por cima"""
+        return VisaoFatos(self.fatos, contexto) if contexto else VisaoFatos(self.fatos)
     
     def registrar_inferencia(self, regra_id: str, resultado: Dict) -> None:
-        """Registra uma inferência realizada para explicação"""
+        """
+        Registra uma inferência realizada para explicação.
+
+        Os fatos utilizados são copiados uma vez por versão da base: disparos
+        seguidos sem alteração de fatos compartilham o mesmo dicionário
+        (somente leitura).
+        """
+        if self._fatos_publicos is None or self._fatos_publicos[0] != self.versao:
+            publicos = {k: v for k, v in self.fatos.items()
+                        if not k.startswith('_')}  # Excluir internos
+            self._fatos_publicos = (self.versao, publicos)
         self.historico_inferencia.append({
             "regra": regra_id,
-            "fatos_utilizados": {k: v for k, v in self.fatos.items() 
-                               if not k.startswith('_')},  # Excluir internos
+            "fatos_utilizados": self._fatos_publicos[1],
             "resultado": resultado
         })
     
@@ -84,21 +166,12 @@ class GerenciadorFatosAluno:
         self._carregar_curriculo()
     
     def _carregar_curriculo(self) -> None:
-        """Carrega o currículo do arquivo JSON"""
-        caminho = Path(__file__).parent.parent / "knowledge_base" / "curriculum.json"
-        with open(caminho, "r", encoding="utf-8") as f:
-            self.curriculo = json.load(f)
-        
-        # Indexar por ID para acesso rápido
-        self.disciplinas_por_id = {d["id"]: d for d in self.curriculo}
-        
-        # Indexar por ano
-        self.disciplinas_por_ano = {}
-        for d in self.curriculo:
-            ano = d["ano"]
-            if ano not in self.disciplinas_por_ano:
-                self.disciplinas_por_ano[ano] = []
-            self.disciplinas_por_ano[ano].append(d)
+        """Obtém o currículo compilado (compartilhado por todo o processo)"""
+        compilado = obter_curriculo()
+        self.compilado = compilado
+        self.curriculo = compilado.disciplinas
+        self.disciplinas_por_id = compilado.por_id
+        self.disciplinas_por_ano = compilado.por_ano
     
     def inicializar_aluno(self, aluno_id: str, nome: str, ano: int, novo: bool = False) -> None:
         """Inicializa os fatos básicos do aluno"""
@@ -110,40 +183,56 @@ class GerenciadorFatosAluno:
         self.base_fatos.adicionar_fato("disciplinas_reprovadas", [])
         self.base_fatos.adicionar_fato("disciplinas_cursando", [])
         self.base_fatos.adicionar_fato("notas", {})
+        self._sincronizar_mascaras()
     
     def inicializar_aluno_do_banco(self, aluno_id: str) -> bool:
-        """Carrega dados do aluno do banco de dados"""
-        aluno = AlunoRepository.buscar_por_id(aluno_id)
-        if not aluno:
+        """Carrega dados do aluno do banco de dados (uma única consulta)"""
+        snapshot = AlunoRepository.buscar_snapshot(aluno_id)
+        if not snapshot:
             return False
-        
+
+        self.inicializar_aluno_do_snapshot(snapshot)
+        return True
+
+    def inicializar_aluno_do_snapshot(self, snapshot: StudentSnapshot) -> None:
+        """Carrega os fatos do aluno a partir de um StudentSnapshot já lido do banco"""
+        aluno = snapshot.aluno
+
         # Carregar dados básicos
         self.base_fatos.adicionar_fato("aluno_id", aluno["id"])
         self.base_fatos.adicionar_fato("aluno_nome", aluno["nome"])
         self.base_fatos.adicionar_fato("aluno_ano", aluno["ano_atual"])
         self.base_fatos.adicionar_fato("aluno_novo", aluno["tipo"] == "novo")
-        
-        # Carregar histórico do banco
-        historico = HistoricoRepository.buscar_historico_aluno(aluno_id)
-        
-        aprovadas_ids = [d["id"] for d in historico["aprovadas"]]
-        reprovadas_ids = [d["id"] for d in historico["reprovadas"]]
-        
-        self.base_fatos.adicionar_fato("disciplinas_aprovadas", aprovadas_ids)
-        self.base_fatos.adicionar_fato("disciplinas_reprovadas", reprovadas_ids)
-        self.base_fatos.adicionar_fato("disciplinas_cursando", 
-                                       [d["id"] for d in historico["cursando"]])
-        
-        # Carregar notas
-        notas = HistoricoRepository.obter_notas(aluno_id)
-        self.base_fatos.adicionar_fato("notas", notas)
-        
-        return True
-    
+
+        # Carregar histórico e notas
+        self.base_fatos.adicionar_fato("disciplinas_aprovadas", snapshot.ids_por_status("aprovadas"))
+        self.base_fatos.adicionar_fato("disciplinas_reprovadas", snapshot.ids_por_status("reprovadas"))
+        self.base_fatos.adicionar_fato("disciplinas_cursando", snapshot.ids_por_status("cursando"))
+        self.base_fatos.adicionar_fato("notas", dict(snapshot.notas))
+        self._sincronizar_mascaras()
+
+    def _sincronizar_mascaras(self) -> int:
+        """
+        Converte as listas de ids (formato da API/banco) nas máscaras de bits
+        usadas internamente. Retorna a máscara de aprovadas.
+        """
+        mascara_aprovadas = self.compilado.mascara(
+            self.base_fatos.get_fato("disciplinas_aprovadas", [])
+        )
+        self.base_fatos.adicionar_fato("_mascara_aprovadas", mascara_aprovadas)
+        return mascara_aprovadas
+
     def registrar_aprovacao(self, disciplina_id: str, nota: float) -> None:
         """Registra aprovação em uma disciplina"""
         aprovadas = self.base_fatos.get_fato("disciplinas_aprovadas", [])
-        if disciplina_id not in aprovadas:
+        mascara = self.base_fatos.get_fato("_mascara_aprovadas", 0)
+        bit = self.compilado.bit(disciplina_id)
+        if bit:
+            if not mascara & bit:
+                aprovadas.append(disciplina_id)
+                self.base_fatos.adicionar_fato("_mascara_aprovadas", mascara | bit)
+        elif disciplina_id not in aprovadas:
+            # Disciplina fora do currículo: não tem posição na máscara
             aprovadas.append(disciplina_id)
         self.base_fatos.adicionar_fato("disciplinas_aprovadas", aprovadas)
         
@@ -170,6 +259,7 @@ class GerenciadorFatosAluno:
         """
         ano_atual = self.base_fatos.get_fato("aluno_ano", 1)
         aprovadas = self.base_fatos.get_fato("disciplinas_aprovadas", [])
+        mascara_aprovadas = self._sincronizar_mascaras()
         reprovadas = self.base_fatos.get_fato("disciplinas_reprovadas", [])
         notas = self.base_fatos.get_fato("notas", {})
 
@@ -182,14 +272,13 @@ class GerenciadorFatosAluno:
         self.base_fatos.adicionar_fato("critico_reprovacoes", reprovacoes_ano > 3)
 
         # --- R2: Verificar se passou em todas do ano atual ---
-        disciplinas_ano = self.disciplinas_por_ano.get(ano_atual, [])
-        ids_ano = [d["id"] for d in disciplinas_ano]
-        passou_todas = all(d_id in aprovadas for d_id in ids_ano) if ids_ano else False
+        mascara_ano = self.compilado.mascara_ano.get(ano_atual, 0)
+        passou_todas = bool(mascara_ano) and not mascara_ano & ~mascara_aprovadas
         self.base_fatos.adicionar_fato("passou_todas_ano_atual", passou_todas)
         
         # --- Estatísticas do ano atual ---
-        total_ano = len(ids_ano)
-        aprovadas_ano = sum(1 for d_id in ids_ano if d_id in aprovadas)
+        total_ano = len(self.disciplinas_por_ano.get(ano_atual, ()))
+        aprovadas_ano = (mascara_ano & mascara_aprovadas).bit_count()
         self.base_fatos.adicionar_fato("total_disciplinas_ano", total_ano)
         self.base_fatos.adicionar_fato("aprovadas_no_ano", aprovadas_ano)
         
@@ -204,16 +293,80 @@ class GerenciadorFatosAluno:
 
         # --- R9: Lista de dependências ---
         # Dependências são disciplinas de anos anteriores não aprovadas
-        lista_dep = []
+        mascara_dep = 0
         for ano in range(1, ano_atual):
-            for d in self.disciplinas_por_ano.get(ano, []):
-                if d["id"] not in aprovadas:
-                    lista_dep.append(d["id"])
+            mascara_dep |= self.compilado.mascara_ano.get(ano, 0)
+        mascara_dep &= ~mascara_aprovadas
+        lista_dep = self.compilado.ids_da_mascara(mascara_dep)
 
+        self.base_fatos.adicionar_fato("_mascara_dependencias", mascara_dep)
         self.base_fatos.adicionar_fato("lista_dependencias", lista_dep)
         self.base_fatos.adicionar_fato("tem_dependencia", len(lista_dep) > 0)
         self.base_fatos.adicionar_fato("quantidade_dependencias", len(lista_dep))
 
+    def atualizar_fatos_derivados(self, disciplina_id: str) -> Set[str]:
+        """
+        Atualiza apenas os fatos derivados afetados por uma nota nova em
+        `disciplina_id` (depois de registrar_aprovacao/registrar_reprovacao).
+
+        Parte de fatos já calculados por calcular_fatos_derivados e chega aos
+        mesmos valores que um recálculo completo. Retorna os nomes dos fatos
+        derivados cujo valor mudou.
+        """
+        disciplina = self.disciplinas_por_id.get(disciplina_id)
+        if disciplina is None:
+            # Fora do currículo: não entra em contagens, médias nem dependências
+            return set()
+
+        fatos = self.base_fatos
+        ano_atual = fatos.get_fato("aluno_ano", 1)
+        mascara_aprovadas = fatos.get_fato("_mascara_aprovadas", 0)
+        area = disciplina.get("area", "Outros")
+        chave_forte = f"area_forte_{area}"
+        antes = {chave: fatos.get_fato(chave) for chave in _FATOS_INCREMENTAIS + (chave_forte,)}
+
+        # --- R5/R2: contagens do ano atual ---
+        if disciplina.get("ano") == ano_atual:
+            reprovacoes_ano = sum(
+                1 for d_id in fatos.get_fato("disciplinas_reprovadas", [])
+                if self.disciplinas_por_id.get(d_id, {}).get("ano") == ano_atual
+            )
+            fatos.adicionar_fato("reprovacoes_ano", reprovacoes_ano)
+            fatos.adicionar_fato("critico_reprovacoes", reprovacoes_ano > 3)
+
+            mascara_ano = self.compilado.mascara_ano.get(ano_atual, 0)
+            passou_todas = bool(mascara_ano) and not mascara_ano & ~mascara_aprovadas
+            fatos.adicionar_fato("passou_todas_ano_atual", passou_todas)
+            fatos.adicionar_fato("aprovadas_no_ano", (mascara_ano & mascara_aprovadas).bit_count())
+
+        # --- R8: média só da área da disciplina (mesma ordem de soma do cálculo completo) ---
+        notas = fatos.get_fato("notas", {})
+        soma, quantidade = 0, 0
+        for d_id in fatos.get_fato("disciplinas_aprovadas", []):
+            if d_id in notas and self.disciplinas_por_id.get(d_id, {}).get("area", "Outros") == area:
+                soma += notas[d_id]
+                quantidade += 1
+        if quantidade:
+            medias_area = dict(fatos.get_fato("medias_por_area", {}))
+            medias_area[area] = round(soma / quantidade, 2)
+            fatos.adicionar_fato("medias_por_area", medias_area)
+            if medias_area[area] >= 8.0:
+                fatos.adicionar_fato(chave_forte, True)
+            else:
+                fatos.remover_fato(chave_forte)
+
+        # --- R9: dependências (só muda ao aprovar disciplina de ano anterior) ---
+        mascara_dep = fatos.get_fato("_mascara_dependencias", 0)
+        if mascara_dep & mascara_aprovadas:
+            mascara_dep &= ~mascara_aprovadas
+            lista_dep = self.compilado.ids_da_mascara(mascara_dep)
+            fatos.adicionar_fato("_mascara_dependencias", mascara_dep)
+            fatos.adicionar_fato("lista_dependencias", lista_dep)
+            fatos.adicionar_fato("tem_dependencia", len(lista_dep) > 0)
+            fatos.adicionar_fato("quantidade_dependencias", len(lista_dep))
+
+        return {chave for chave, valor in antes.items() if fatos.get_fato(chave) != valor}
+
     def _calcular_medias_por_area(self, aprovadas: List[str], notas: Dict[str, float]) -> Dict[str, float]:
         """Calcula a média de notas por área de conhecimento"""
         areas_soma = {}
@@ -237,15 +390,19 @@ class GerenciadorFatosAluno:
         CORREÇÃO: Agora retorna TODOS os fatos necessários para as regras R4-R11
         """
         disciplina = self.disciplinas_por_id.get(disciplina_id, {})
-        aprovadas = self.base_fatos.get_fato("disciplinas_aprovadas", [])
+        mascara_aprovadas = self.base_fatos.get_fato("_mascara_aprovadas", 0)
         ano_aluno = self.base_fatos.get_fato("aluno_ano", 1)
-        lista_dep = self.base_fatos.get_fato("lista_dependencias", [])
+        mascara_dep = self.base_fatos.get_fato("_mascara_dependencias", 0)
+        bit = self.compilado.bit(disciplina_id)
 
         pre_requisitos = disciplina.get("pre_requisitos", [])
         
-        # Calcular pré-requisitos faltantes
-        pre_requisitos_faltantes = [pr for pr in pre_requisitos if pr not in aprovadas]
-        prereqs_cumpridos = len(pre_requisitos_faltantes) == 0
+        # Calcular pré-requisitos faltantes (um AND sobre as máscaras)
+        pendentes = self.compilado.mascara_pre_requisitos.get(disciplina_id, 0) & ~mascara_aprovadas
+        pre_requisitos_faltantes = [
+            pr for pr in pre_requisitos if self.compilado.bit(pr) & pendentes
+        ] if pendentes else []
+        prereqs_cumpridos = not pendentes
 
         # Verificar se a área é forte
         area = disciplina.get("area", "Outros")
@@ -270,14 +427,14 @@ class GerenciadorFatosAluno:
             "pre_requisitos_faltantes": pre_requisitos_faltantes,
             
             # Status
-            "ja_aprovada": disciplina_id in aprovadas,
-            "eh_dependencia": disciplina_id in lista_dep,
+            "ja_aprovada": bool(mascara_aprovadas & bit),
+            "eh_dependencia": bool(mascara_dep & bit),
             
             # Heurísticas
             "area_forte": area_forte
         }
 
-    def get_curriculo(self) -> List[Dict]:
+    def get_curriculo(self) -> Sequence[Dict]:
         """Retorna o currículo completo"""
         return self.curriculo
     
@@ -285,9 +442,9 @@ class GerenciadorFatosAluno:
         """Retorna dados de uma disciplina específica"""
         return self.disciplinas_por_id.get(disciplina_id)
     
-    def get_disciplinas_ano(self, ano: int) -> List[Dict]:
+    def get_disciplinas_ano(self, ano: int) -> Sequence[Dict]:
         """Retorna disciplinas de um ano específico"""
-        return self.disciplinas_por_ano.get(ano, [])
+        return self.disciplinas_por_ano.get(ano, ())
     
     def get_estatisticas_aluno(self) -> Dict[str, Any]:
         """Retorna estatísticas do progresso do aluno"""
@@ -1,3 +1,5 @@
-from .engine import MotorInferencia, StatusInferencia, ResultadoInferencia
+from .engine import MotorInferencia, StatusInferencia, ResultadoInferencia, NivelExplicacao
+from .cache import CacheInferencia, cache_inferencia
 
-__all__ = ['MotorInferencia', 'StatusInferencia', 'ResultadoInferencia']
+__all__ = ['MotorInferencia', 'StatusInferencia', 'ResultadoInferencia', 'NivelExplicacao',
+           'CacheInferencia', 'cache_inferencia']
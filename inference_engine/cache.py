@@ -0,0 +1,141 @@
+"""
+Cache de Resultados da Inferência
+
+Alunos com o mesmo ano, o mesmo tipo (novo/veterano) e o mesmo histórico
+(aprovadas, reprovadas, cursando e notas) recebem exatamente a mesma
+recomendação. O cache guarda o resultado do MotorInferencia indexado por
+uma impressão digital canônica desses fatos, junto com as versões do
+currículo e das regras usadas - mudar qualquer um dos dois gera chaves
+novas, e as entradas antigas saem por LRU ou TTL.
+
+Identidade do aluno (id e nome) não entra na chave: nenhum campo do
+resultado depende dela.
+
+As entradas ficam serializadas (pickle): cada leitura devolve uma cópia
+nova, então quem recebe o resultado pode alterá-lo sem afetar o cache.
+"""
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+from database import inteiro_env
+
+
+def impressao_digital(fatos: Mapping[str, Any], versao_curriculo: str,
+                      versao_regras: str, nivel_explicacao: str = "") -> str:
+    """
+    Chave canônica dos fatos que afetam a inferência.
+
+    O nível de explicação também entra: o resultado guardado inclui as
+    explicações capturadas naquele nível.
+
+    Listas de disciplinas entram ordenadas (a ordem de registro não muda o
+    resultado), mas com repetições (reprovações repetidas contam). As notas
+    mantêm a ordem de registro: a média geral é uma soma de floats e pode
+    arredondar diferente em outra ordem.
+    """
+    notas = fatos.get("notas", {})
+    canonico = (
+        fatos.get("aluno_ano", 1),
+        bool(fatos.get("aluno_novo", False)),
+        tuple(sorted(fatos.get("disciplinas_aprovadas", ()))),
+        tuple(sorted(fatos.get("disciplinas_reprovadas", ()))),
+        tuple(sorted(fatos.get("disciplinas_cursando", ()))),
+        tuple(notas.items()),
+        versao_curriculo,
+        versao_regras,
+        nivel_explicacao,
+    )
+    return hashlib.blake2b(repr(canonico).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class CacheInferencia:
+    """
+    Cache LRU com expiração (TTL) para resultados da inferência.
+
+    `max_itens` limita o número de entradas (a menos usada recentemente é
+    removida); `ttl_segundos` expira entradas antigas (None = sem expiração).
+    Seguro para uso por várias threads.
+    """
+
+    def __init__(self, max_itens: int = 1024, ttl_segundos: Optional[float] = 600.0,
+                 relogio: Callable[[], float] = time.monotonic):
+        if max_itens < 1:
+            raise ValueError("max_itens deve ser pelo menos 1")
+        self.max_itens = max_itens
+        self.ttl_segundos = ttl_segundos
+        self._relogio = relogio
+        self._lock = threading.Lock()
+        # chave -> (instante em que expira, entrada serializada)
+        self._entradas: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._stats = {"acertos": 0, "faltas": 0, "remocoes": 0, "expiradas": 0}
+
+    def obter(self, chave: str) -> Optional[Any]:
+        """Cópia da entrada guardada, ou None se ausente/expirada"""
+        with self._lock:
+            item = self._entradas.get(chave)
+            if item is None:
+                self._stats["faltas"] += 1
+                return None
+            expira, dados = item
+            if expira <= self._relogio():
+                del self._entradas[chave]
+                self._stats["expiradas"] += 1
+                self._stats["faltas"] += 1
+                return None
+            self._entradas.move_to_end(chave)
+            self._stats["acertos"] += 1
+        return pickle.loads(dados)
+
+    def guardar(self, chave: str, valor: Any) -> None:
+        """Guarda uma cópia de `valor` (alterações posteriores não afetam o cache)"""
+        dados = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+        expira = self._relogio() + self.ttl_segundos if self.ttl_segundos else float("inf")
+        with self._lock:
+            self._entradas[chave] = (expira, dados)
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.max_itens:
+                self._entradas.popitem(last=False)
+                self._stats["remocoes"] += 1
+
+    def limpar(self) -> int:
+        """Remove todas as entradas; retorna quantas havia"""
+        with self._lock:
+            quantidade = len(self._entradas)
+            self._entradas.clear()
+            return quantidade
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+    def estatisticas(self) -> Dict[str, Any]:
+        """Acertos, faltas, remoções (LRU), expiradas e taxa de acerto"""
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["itens"] = len(self._entradas)
+        consultas = stats["acertos"] + stats["faltas"]
+        stats["taxa_acerto"] = round(stats["acertos"] / consultas, 3) if consultas else 0.0
+        stats["max_itens"] = self.max_itens
+        stats["ttl_segundos"] = self.ttl_segundos
+        return stats
+
+
+def _ttl_do_ambiente() -> Optional[float]:
+    """UNIADVISOR_CACHE_TTL em segundos (vazia ou ausente: 600; 0: sem expiração)"""
+    valor = os.environ.get("UNIADVISOR_CACHE_TTL")
+    ttl = float(valor) if valor else 600.0
+    return ttl if ttl > 0 else None
+
+
+# Cache compartilhado pelo processo (configurável por variáveis de ambiente)
+cache_inferencia = CacheInferencia(
+    max_itens=inteiro_env("UNIADVISOR_CACHE_ITENS", 1024),
+    ttl_segundos=_ttl_do_ambiente(),
+)
+
+
+__all__ = ['CacheInferencia', 'cache_inferencia', 'impressao_digital']
@@ -11,12 +11,24 @@ CORREÇÕES REALIZADAS:
 4. Sistema de recomendação completo com ranking
 5. Explicações detalhadas para cada decisão
 """
-from typing import Dict, List, Any, Tuple
+from typing import Dict, Iterable, List, Any, Mapping, Optional, Tuple
+import gc
 from dataclasses import dataclass, field
 from enum import Enum
 
-from knowledge_base.rules import Regra, TipoRegra, get_todas_regras, get_regras_por_tipo
-from facts_base.student_facts import BaseFatos, GerenciadorFatosAluno
+from knowledge_base.rules import Regra, TipoRegra, get_todas_regras
+from database import StudentSnapshot
+from facts_base.student_facts import BaseFatos, GerenciadorFatosAluno, VisaoFatos
+from inference_engine.rete import SessaoRede, obter_rede
+from inference_engine.cache import CacheInferencia, impressao_digital
+
+
+# Fatos exibidos no contexto de cada explicação
+_FATOS_EXPLICACAO = frozenset({
+    'id', 'nome', 'aluno_ano', 'tem_pre_requisito',
+    'pre_requisitos_cumpridos', 'eh_dependencia',
+    'area_forte', 'mesmo_ano_aluno', 'area'
+})
 
 
 class StatusInferencia(Enum):
@@ -28,6 +40,13 @@ class StatusInferencia(Enum):
     CURSO_CONCLUIDO = "curso_concluido"
 
 
+class NivelExplicacao(Enum):
+    """Quanto da explicação o motor captura a cada disparo de regra"""
+    NENHUMA = "nenhuma"    # só os ids das regras disparadas
+    RESUMO = "resumo"      # regra, mensagem e disciplina (sem fatos)
+    COMPLETA = "completa"  # contexto de fatos e histórico na BaseFatos
+
+
 @dataclass
 class ResultadoInferencia:
     """Resultado do processo de inferência"""
@@ -51,10 +70,17 @@ class MotorInferencia:
     para derivar novos fatos até que não haja mais regras aplicáveis.
     """
 
-    def __init__(self, base_fatos: BaseFatos, gerenciador: GerenciadorFatosAluno):
+    def __init__(self, base_fatos: BaseFatos, gerenciador: GerenciadorFatosAluno,
+                 cache: Optional[CacheInferencia] = None,
+                 nivel_explicacao: NivelExplicacao = NivelExplicacao.COMPLETA):
         self.base_fatos = base_fatos
         self.gerenciador = gerenciador
+        self.cache = cache
+        self.nivel_explicacao = nivel_explicacao
         self.regras = get_todas_regras()
+        self.rede = obter_rede()
+        self._sessao: SessaoRede = None
+        self._lidos_heuristicas = False
         self.regras_disparadas: List[str] = []
         self.explicacoes: List[Dict] = []
 
@@ -68,7 +94,32 @@ class MotorInferencia:
         3. Avalia cada disciplina (bloqueio, elegibilidade)
         4. Aplica heurísticas para sugestões
         5. Retorna resultado com explicação
+
+        Com um cache, alunos com os mesmos fatos de entrada (e mesmas versões
+        de currículo e regras) reaproveitam o resultado já calculado. O nível
+        COMPLETA não usa o cache: ele também preenche o histórico da
+        BaseFatos, que leva a identidade do aluno (fora da chave).
         """
+        if self.cache is None or self.nivel_explicacao is NivelExplicacao.COMPLETA:
+            return self._inferir()
+
+        chave = impressao_digital(
+            self.base_fatos.fatos, self.gerenciador.compilado.versao, self.rede.versao,
+            self.nivel_explicacao.value
+        )
+        guardado = self.cache.obter(chave)
+        if guardado is not None:
+            resultado, self.regras_disparadas, self.explicacoes = guardado
+            # Mantém a base de fatos no mesmo estado de uma inferência completa
+            self.gerenciador.calcular_fatos_derivados()
+            return resultado
+
+        resultado = self._inferir()
+        self.cache.guardar(chave, (resultado, self.regras_disparadas, self.explicacoes))
+        return resultado
+
+    def _inferir(self) -> ResultadoInferencia:
+        """Inferência completa (sem cache)"""
         # Passo 1: Calcular fatos derivados
         self.gerenciador.calcular_fatos_derivados()
 
@@ -125,6 +176,10 @@ class MotorInferencia:
         )
 
         # Passo 5: Determinar status final
+        return self._concluir(resultado)
+
+    def _concluir(self, resultado: ResultadoInferencia) -> ResultadoInferencia:
+        """Define status final, explicação e estatísticas de uma seleção de disciplinas"""
         if resultado.disciplinas_elegiveis:
             resultado.status = StatusInferencia.SELECAO_MANUAL
             qtd = len(resultado.disciplinas_elegiveis)
@@ -138,9 +193,206 @@ class MotorInferencia:
 
         return resultado
 
+    def inferir_incremental(self, anterior: ResultadoInferencia, disciplina_id: str,
+                            aprovada: bool, nota: float) -> ResultadoInferencia:
+        """
+        Atualiza `anterior` após uma única nota nova (aprovação ou reprovação
+        em `disciplina_id`), com o mesmo resultado de um recálculo completo.
+
+        A base de fatos deste motor deve estar no estado que produziu
+        `anterior` (ex.: logo após inferir()). Só os fatos derivados afetados
+        são atualizados e só são reavaliadas a própria disciplina, as que
+        dependem dela e os demais pré-requisitos destas (o grafo de
+        pré-requisitos), além das disciplinas da área cuja "área forte" mudou;
+        as demais entradas são reaproveitadas de `anterior`.
+
+        Se a situação geral muda (reprovação de ano, matrícula automática,
+        curso concluído) ou `anterior` não era uma seleção de disciplinas,
+        recalcula tudo.
+        """
+        compilado = self.gerenciador.compilado
+        bit = compilado.bit(disciplina_id)
+        mudou_aprovacao = False
+        if aprovada:
+            mudou_aprovacao = bool(bit) and not self.base_fatos.get_fato("_mascara_aprovadas", 0) & bit
+            self.gerenciador.registrar_aprovacao(disciplina_id, nota)
+        else:
+            self.gerenciador.registrar_reprovacao(disciplina_id, nota)
+
+        alterados = self.gerenciador.atualizar_fatos_derivados(disciplina_id)
+
+        self.regras_disparadas = []
+        self.explicacoes = []
+        if anterior.status not in (StatusInferencia.SELECAO_MANUAL, StatusInferencia.AGUARDANDO):
+            return self.inferir()
+
+        aprovadas = self.base_fatos.get_fato("disciplinas_aprovadas", [])
+        if len(aprovadas) >= len(self.gerenciador.curriculo):
+            return self.inferir()
+
+        situacao = self._avaliar_situacao_geral()
+        if situacao["reprovado_ano"] or situacao["matricula_automatica"]:
+            self.regras_disparadas = []
+            self.explicacoes = []
+            return self.inferir()
+
+        # Disciplinas cuja avaliação pode ter mudado
+        afetadas = {disciplina_id}
+        if mudou_aprovacao:
+            afetadas.update(compilado.pre_requisitos.get(disciplina_id, ()))
+            for dependente in compilado.dependentes.get(disciplina_id, ()):
+                afetadas.add(dependente)
+                afetadas.update(compilado.pre_requisitos[dependente])
+        for fato in alterados:
+            if fato.startswith("area_forte_"):
+                area = fato[len("area_forte_"):]
+                afetadas.update(d["id"] for d in self.gerenciador.curriculo if d["area"] == area)
+        # Heurística que lê um fato do aluno que mudou: reavalia todas
+        lidos = self._fatos_aluno_heuristicas()
+        todas = lidos is None or bool(lidos & alterados)
+        # Sem explicações não se sabe quais regras cada disciplina disparou
+        todas_sugestoes = todas or self.nivel_explicacao is NivelExplicacao.NENHUMA
+
+        # Passo 3: reavaliar só as afetadas, na ordem do currículo
+        entradas_anteriores = {}
+        for categoria, entradas in (("aprovadas", anterior.disciplinas_aprovadas),
+                                    ("elegiveis", anterior.disciplinas_elegiveis),
+                                    ("bloqueadas", anterior.disciplinas_bloqueadas)):
+            for entrada in entradas:
+                entradas_anteriores[entrada["id"]] = (categoria, entrada)
+
+        ano_aluno = self.base_fatos.get_fato("aluno_ano", 1)
+        mascara = self.base_fatos.get_fato("_mascara_aprovadas", 0)
+        notas = self.base_fatos.get_fato("notas", {})
+        avaliadas = {"elegiveis": [], "bloqueadas": [], "aprovadas": []}
+        for disciplina in self.gerenciador.curriculo:
+            if todas or disciplina["id"] in afetadas:
+                item = self._avaliar_disciplina(disciplina, compilado, ano_aluno, mascara, notas)
+            else:
+                item = entradas_anteriores.get(disciplina["id"])
+            if item is not None:
+                avaliadas[item[0]].append(item[1])
+
+        # Passo 4: sugestões e explicações das afetadas; as demais são reaproveitadas
+        sugestoes_anteriores = {s["id"]: s for s in anterior.disciplinas_sugeridas}
+        explicacoes_anteriores: Dict[str, List[Dict]] = {}
+        for explicacao in anterior.explicacao:
+            if "contexto" in explicacao:
+                disc_id = explicacao["contexto"].get("id")
+            else:
+                disc_id = explicacao.get("disciplina_id")
+            explicacoes_anteriores.setdefault(disc_id, []).append(explicacao)
+
+        sessao = self._sessao_regras(self.base_fatos.fatos)
+        sugestoes = []
+        for disc in avaliadas["elegiveis"]:
+            if todas_sugestoes or disc["id"] in afetadas:
+                sugestoes.append(self._sugestao(disc, sessao, compilado, mascara))
+                continue
+            sugestoes.append(dict(sugestoes_anteriores[disc["id"]]))
+            for explicacao in explicacoes_anteriores.get(disc["id"], ()):
+                if explicacao["regra_id"] not in self.regras_disparadas:
+                    self.regras_disparadas.append(explicacao["regra_id"])
+                self.explicacoes.append(explicacao)
+
+        resultado = ResultadoInferencia(
+            status=StatusInferencia.AGUARDANDO,
+            mensagem="Processando...",
+            novo_ano=ano_aluno,
+            disciplinas_elegiveis=avaliadas["elegiveis"],
+            disciplinas_bloqueadas=avaliadas["bloqueadas"],
+            disciplinas_aprovadas=avaliadas["aprovadas"],
+            disciplinas_sugeridas=self._ordenar_sugestoes(sugestoes),
+        )
+        return self._concluir(resultado)
+
+    def _fatos_aluno_heuristicas(self) -> Optional[frozenset]:
+        """
+        Fatos do aluno (fora do contexto da disciplina) lidos pelas
+        heurísticas ou exibidos nas explicações; None se alguma heurística
+        não tem forma declarativa (pode ler qualquer fato).
+        """
+        if self._lidos_heuristicas is False:
+            heuristicas = [r for r in self.rede.regras if r.tipo == TipoRegra.HEURISTICA]
+            if any(not r.condicoes for r in heuristicas):
+                self._lidos_heuristicas = None
+            else:
+                contexto = self.gerenciador.preparar_fatos_disciplina(
+                    self.gerenciador.curriculo[0]["id"]
+                ) if self.gerenciador.curriculo else {}
+                lidos = set(_FATOS_EXPLICACAO)
+                for regra in heuristicas:
+                    for cond in regra.condicoes:
+                        lidos.update(cond.fatos_testados)
+                self._lidos_heuristicas = frozenset(lidos - contexto.keys())
+        return self._lidos_heuristicas
+
+    @classmethod
+    def inferir_lote(cls, snapshots: Iterable[StudentSnapshot], pausar_gc: bool = True,
+                     cache: Optional[CacheInferencia] = None,
+                     nivel_explicacao: NivelExplicacao = NivelExplicacao.COMPLETA
+                     ) -> List[ResultadoInferencia]:
+        """
+        Executa a inferência para uma turma inteira.
+
+        O currículo compilado, as regras, a rede de discriminação e sua
+        memória de trabalho são obtidos uma única vez e o mesmo
+        gerenciador/motor é reaproveitado; cada aluno recebe apenas uma
+        BaseFatos nova. O resultado de cada aluno é idêntico ao de inferir()
+        executado isoladamente.
+
+        Com pausar_gc, o coletor cíclico fica desligado durante o lote (a
+        inferência não cria ciclos; as varreduras disparadas pelos milhares
+        de dicts alocados custam ~15-20% da vazão) e volta ao estado anterior.
+
+        Com um cache, alunos de histórico idêntico são calculados uma só vez
+        (exceto no nível COMPLETA, como em inferir()).
+        """
+        base_fatos = BaseFatos()
+        gerenciador = GerenciadorFatosAluno(base_fatos)
+        motor = cls(base_fatos, gerenciador, cache, nivel_explicacao)
+
+        gc_ativo = gc.isenabled()
+        if pausar_gc:
+            gc.disable()
+        try:
+            resultados = []
+            for snapshot in snapshots:
+                motor.novo_aluno()
+                gerenciador.inicializar_aluno_do_snapshot(snapshot)
+                resultados.append(motor.inferir())
+            return resultados
+        finally:
+            if gc_ativo:
+                gc.enable()
+
+    def novo_aluno(self) -> BaseFatos:
+        """
+        Troca a base de fatos por uma nova para avaliar outro aluno com o
+        mesmo motor (currículo, regras e rede já carregados). Retorna a base.
+        """
+        base_fatos = BaseFatos()
+        self._reiniciar(base_fatos)
+        return base_fatos
+
+    def _reiniciar(self, base_fatos: BaseFatos) -> None:
+        """Prepara o motor (e seu gerenciador) para avaliar outro aluno"""
+        self.base_fatos = base_fatos
+        self.gerenciador.base_fatos = base_fatos
+        self.regras_disparadas = []
+        self.explicacoes = []
+
+    def _sessao_regras(self, fatos: Dict[str, Any]) -> SessaoRede:
+        """Memória de trabalho da rede, reaproveitada entre avaliações e alunos"""
+        if self._sessao is None:
+            self._sessao = self.rede.sessao(fatos)
+        else:
+            self._sessao.redefinir(fatos)
+        return self._sessao
+
     def _avaliar_situacao_geral(self) -> Dict[str, Any]:
         """Avalia a situação geral do aluno aplicando regras de progressão"""
-        fatos = self.base_fatos.get_todos_fatos()
+        fatos = self.base_fatos.visao()
         resultado = {
             "reprovado_ano": False,
             "matricula_automatica": False,
@@ -148,24 +400,24 @@ class MotorInferencia:
             "novo_ano": fatos.get("aluno_ano", 1)
         }
 
+        sessao = self._sessao_regras(self.base_fatos.fatos)
+
         # Aplicar regras de reprovação de ano (maior prioridade)
-        for regra in get_regras_por_tipo(TipoRegra.REPROVACAO_ANO):
-            if regra.avaliar(fatos):
-                acao = regra.executar(fatos)
-                resultado["reprovado_ano"] = True
-                resultado["mensagem"] = acao["mensagem"]
-                self._registrar_disparo(regra, fatos, acao)
-                return resultado
+        for regra in sessao.ativas(TipoRegra.REPROVACAO_ANO):
+            acao = regra.executar(fatos)
+            resultado["reprovado_ano"] = True
+            resultado["mensagem"] = acao["mensagem"]
+            self._registrar_disparo(regra, fatos, acao)
+            return resultado
 
         # Aplicar regras de matrícula automática (em ordem de prioridade)
-        for regra in get_regras_por_tipo(TipoRegra.MATRICULA_AUTOMATICA):
-            if regra.avaliar(fatos):
-                acao = regra.executar(fatos)
-                resultado["matricula_automatica"] = True
-                resultado["mensagem"] = acao["mensagem"]
-                resultado["novo_ano"] = acao.get("novo_ano", resultado["novo_ano"])
-                self._registrar_disparo(regra, fatos, acao)
-                return resultado
+        for regra in sessao.ativas(TipoRegra.MATRICULA_AUTOMATICA):
+            acao = regra.executar(fatos)
+            resultado["matricula_automatica"] = True
+            resultado["mensagem"] = acao["mensagem"]
+            resultado["novo_ano"] = acao.get("novo_ano", resultado["novo_ano"])
+            self._registrar_disparo(regra, fatos, acao)
+            return resultado
 
         return resultado
 
@@ -184,79 +436,89 @@ class MotorInferencia:
             "aprovadas": []
         }
 
-        curriculo = self.gerenciador.get_curriculo()
+        compilado = self.gerenciador.compilado
         ano_aluno = self.base_fatos.get_fato("aluno_ano", 1)
-        aprovadas = self.base_fatos.get_fato("disciplinas_aprovadas", [])
+        aprovadas = self.base_fatos.get_fato("_mascara_aprovadas", 0)
+        notas = self.base_fatos.get_fato("notas", {})
 
-        for disciplina in curriculo:
-            disc_id = disciplina["id"]
-
-            # Disciplinas já aprovadas
-            if disc_id in aprovadas:
-                resultado["aprovadas"].append({
-                    "id": disc_id,
-                    "nome": disciplina["nome"],
-                    "ano": disciplina["ano"],
-                    "area": disciplina["area"],
-                    "carga_horaria": disciplina.get("carga_horaria", 60),
-                    "nota": self.base_fatos.get_fato("notas", {}).get(disc_id)
-                })
-                continue
+        for disciplina in self.gerenciador.get_curriculo():
+            item = self._avaliar_disciplina(disciplina, compilado, ano_aluno, aprovadas, notas)
+            if item is not None:
+                resultado[item[0]].append(item[1])
 
-            # *** CORREÇÃO: Avaliar até ano+1 para sugerir disciplinas do próximo ano ***
-            if disciplina["ano"] > ano_aluno + 1:
-                continue
+        return resultado
 
-            # *** CORREÇÃO CRÍTICA: Consultar pré-requisitos diretamente do curriculum.json ***
-            pre_requisitos = disciplina.get("pre_requisitos", [])
-            pre_requisitos_faltantes = [pr for pr in pre_requisitos if pr not in aprovadas]
-            tem_pre_requisito = len(pre_requisitos) > 0
-            pre_requisitos_cumpridos = len(pre_requisitos_faltantes) == 0
-
-            # *** LÓGICA CORRIGIDA: Se tem pré-requisitos não cumpridos = BLOQUEADA ***
-            if tem_pre_requisito and not pre_requisitos_cumpridos:
-                # Buscar nomes legíveis dos pré-requisitos faltantes
-                nomes_faltantes = []
-                for pr_id in pre_requisitos_faltantes:
-                    disc_pr = next((d for d in curriculo if d["id"] == pr_id), None)
-                    if disc_pr:
-                        nomes_faltantes.append(disc_pr["nome"])
-
-                resultado["bloqueadas"].append({
-                    "id": disc_id,
-                    "nome": disciplina["nome"],
-                    "ano": disciplina["ano"],
-                    "area": disciplina["area"],
-                    "carga_horaria": disciplina.get("carga_horaria", 60),
-                    "motivo": f"Faltam pré-requisitos: {', '.join(nomes_faltantes)}",
-                    "prerequisitos_faltantes": pre_requisitos_faltantes,
-                    "prerequisitos_faltantes_nomes": nomes_faltantes
-                })
-                continue
+    def _avaliar_disciplina(self, disciplina: Dict, compilado, ano_aluno: int,
+                            aprovadas: int, notas: Dict[str, float]) -> Optional[Tuple[str, Dict]]:
+        """
+        Classifica uma disciplina: ("aprovadas" | "bloqueadas" | "elegiveis", entrada),
+        ou None se está além do próximo ano.
+        """
+        disc_id = disciplina["id"]
 
-            # *** Se não está bloqueada, é ELEGÍVEL ***
-            motivo_elegibilidade = "Sem pré-requisitos"
-            if tem_pre_requisito:
-                motivo_elegibilidade = "Pré-requisitos cumpridos"
+        # Disciplinas já aprovadas
+        if aprovadas & compilado.bit(disc_id):
+            return "aprovadas", {
+                "id": disc_id,
+                "nome": disciplina["nome"],
+                "ano": disciplina["ano"],
+                "area": disciplina["area"],
+                "carga_horaria": disciplina.get("carga_horaria", 60),
+                "nota": notas.get(disc_id)
+            }
 
-            # Adicionar flags para priorização
-            eh_ano_seguinte = disciplina["ano"] == ano_aluno + 1
-            eh_ano_atual = disciplina["ano"] == ano_aluno
+        # *** CORREÇÃO: Avaliar até ano+1 para sugerir disciplinas do próximo ano ***
+        if disciplina["ano"] > ano_aluno + 1:
+            return None
 
-            resultado["elegiveis"].append({
+        # *** CORREÇÃO CRÍTICA: Consultar pré-requisitos diretamente do curriculum.json ***
+        pre_requisitos = disciplina.get("pre_requisitos", [])
+        pendentes = compilado.mascara_pre_requisitos[disc_id] & ~aprovadas
+        tem_pre_requisito = len(pre_requisitos) > 0
+        pre_requisitos_cumpridos = not pendentes
+
+        # *** LÓGICA CORRIGIDA: Se tem pré-requisitos não cumpridos = BLOQUEADA ***
+        if tem_pre_requisito and not pre_requisitos_cumpridos:
+            pre_requisitos_faltantes = [
+                pr for pr in pre_requisitos if compilado.bit(pr) & pendentes
+            ]
+
+            # Buscar nomes legíveis dos pré-requisitos faltantes
+            nomes = compilado.nomes
+            nomes_faltantes = [nomes[pr_id] for pr_id in pre_requisitos_faltantes if pr_id in nomes]
+
+            return "bloqueadas", {
                 "id": disc_id,
                 "nome": disciplina["nome"],
                 "ano": disciplina["ano"],
                 "area": disciplina["area"],
                 "carga_horaria": disciplina.get("carga_horaria", 60),
-                "motivo_elegibilidade": motivo_elegibilidade,
-                "prioridade": 0,  # Será calculada nas heurísticas
-                "motivos_sugestao": [],
-                "eh_ano_seguinte": eh_ano_seguinte,
-                "eh_ano_atual": eh_ano_atual
-            })
+                "motivo": f"Faltam pré-requisitos: {', '.join(nomes_faltantes)}",
+                "prerequisitos_faltantes": pre_requisitos_faltantes,
+                "prerequisitos_faltantes_nomes": nomes_faltantes
+            }
 
-        return resultado
+        # *** Se não está bloqueada, é ELEGÍVEL ***
+        motivo_elegibilidade = "Sem pré-requisitos"
+        if tem_pre_requisito:
+            motivo_elegibilidade = "Pré-requisitos cumpridos"
+
+        # Adicionar flags para priorização
+        eh_ano_seguinte = disciplina["ano"] == ano_aluno + 1
+        eh_ano_atual = disciplina["ano"] == ano_aluno
+
+        return "elegiveis", {
+            "id": disc_id,
+            "nome": disciplina["nome"],
+            "ano": disciplina["ano"],
+            "area": disciplina["area"],
+            "carga_horaria": disciplina.get("carga_horaria", 60),
+            "motivo_elegibilidade": motivo_elegibilidade,
+            "prioridade": 0,  # Será calculada nas heurísticas
+            "motivos_sugestao": [],
+            "eh_ano_seguinte": eh_ano_seguinte,
+            "eh_ano_atual": eh_ano_atual
+        }
 
     def _gerar_sugestoes(self, elegiveis: List[Dict]) -> List[Dict]:
         """
@@ -271,62 +533,65 @@ class MotorInferencia:
         if not elegiveis:
             return []
 
-        curriculo = self.gerenciador.get_curriculo()
-        aprovadas = self.base_fatos.get_fato("disciplinas_aprovadas", [])
+        compilado = self.gerenciador.compilado
+        aprovadas = self.base_fatos.get_fato("_mascara_aprovadas", 0)
+        # Memória de trabalho: fatos do aluno na base, fatos da disciplina no contexto
+        sessao = self._sessao_regras(self.base_fatos.fatos)
+
+        sugestoes = [self._sugestao(disc, sessao, compilado, aprovadas) for disc in elegiveis]
+        return self._ordenar_sugestoes(sugestoes)
+
+    def _sugestao(self, disc: Dict, sessao: SessaoRede, compilado, aprovadas: int) -> Dict:
+        """Calcula a prioridade de uma disciplina elegível (registrando as heurísticas disparadas)"""
+        prioridade = 0
+        motivos = []
+
+        # PRIORIDADE 1: Disciplinas do ano atual
+        if disc.get("eh_ano_atual", False):
+            prioridade += 10
+            motivos.append("📚 Disciplina do seu ano atual")
+
+        # PRIORIDADE 2: É pré-requisito de outras disciplinas?
+        # (índice reverso de pré-requisitos: só as dependentes diretas são visitadas)
+        disciplinas_desbloqueadas = [
+            compilado.nomes[d_id]
+            for d_id in compilado.desbloqueadas_por(disc["id"], aprovadas)
+        ]
+
+        if disciplinas_desbloqueadas:
+            prioridade += 5
+            if len(disciplinas_desbloqueadas) <= 2:
+                motivos.append(f"🔓 Desbloqueia: {', '.join(disciplinas_desbloqueadas)}")
+            else:
+                motivos.append(f"🔓 Desbloqueia {len(disciplinas_desbloqueadas)} disciplinas")
+
+        # PRIORIDADE 3: Aplicar heurísticas das regras SWRL (se existirem)
+        sessao.definir_contexto(self.gerenciador.preparar_fatos_disciplina(disc["id"]))
+        disparadas = sessao.ativas(TipoRegra.HEURISTICA)
+        fatos_completos = sessao.fatos() if disparadas else None
+
+        for regra in disparadas:
+            acao = regra.executar(fatos_completos)
+            bonus = acao.get("bonus_prioridade", 0)
+            prioridade += bonus
+            motivos.append(acao["mensagem"])
+            self._registrar_disparo(regra, fatos_completos, acao)
+
+        # PRIORIDADE 4: Disciplinas do próximo ano
+        if disc.get("eh_ano_seguinte", False):
+            prioridade += 2
+            motivos.append("⏭️ Adiante-se no próximo ano")
 
-        sugestoes = []
-
-        for disc in elegiveis:
-            prioridade = 0
-            motivos = []
-
-            # PRIORIDADE 1: Disciplinas do ano atual
-            if disc.get("eh_ano_atual", False):
-                prioridade += 10
-                motivos.append("📚 Disciplina do seu ano atual")
-
-            # PRIORIDADE 2: É pré-requisito de outras disciplinas?
-            disciplinas_desbloqueadas = []
-            for outras_disc in curriculo:
-                if outras_disc["id"] not in aprovadas:
-                    pre_reqs = outras_disc.get("pre_requisitos", [])
-                    if disc["id"] in pre_reqs:
-                        # Verificar se só falta esse pré-requisito
-                        faltantes = [pr for pr in pre_reqs if pr not in aprovadas and pr != disc["id"]]
-                        if len(faltantes) == 0:
-                            disciplinas_desbloqueadas.append(outras_disc["nome"])
-
-            if disciplinas_desbloqueadas:
-                prioridade += 5
-                if len(disciplinas_desbloqueadas) <= 2:
-                    motivos.append(f"🔓 Desbloqueia: {', '.join(disciplinas_desbloqueadas)}")
-                else:
-                    motivos.append(f"🔓 Desbloqueia {len(disciplinas_desbloqueadas)} disciplinas")
-
-            # PRIORIDADE 3: Aplicar heurísticas das regras SWRL (se existirem)
-            fatos_disc = self.gerenciador.preparar_fatos_disciplina(disc["id"])
-            fatos_completos = {**self.base_fatos.get_todos_fatos(), **fatos_disc}
-
-            for regra in get_regras_por_tipo(TipoRegra.HEURISTICA):
-                if regra.avaliar(fatos_completos):
-                    acao = regra.executar(fatos_completos)
-                    bonus = acao.get("bonus_prioridade", 0)
-                    prioridade += bonus
-                    motivos.append(acao["mensagem"])
-                    self._registrar_disparo(regra, fatos_completos, acao)
-
-            # PRIORIDADE 4: Disciplinas do próximo ano
-            if disc.get("eh_ano_seguinte", False):
-                prioridade += 2
-                motivos.append("⏭️ Adiante-se no próximo ano")
-
-            sugestoes.append({
-                **disc,
-                "prioridade": prioridade,
-                "motivos_sugestao": motivos,
-                "ranking": 0  # Será atualizado após ordenação
-            })
+        return {
+            **disc,
+            "prioridade": prioridade,
+            "motivos_sugestao": motivos,
+            "ranking": 0  # Será atualizado após ordenação
+        }
 
+    @staticmethod
+    def _ordenar_sugestoes(sugestoes: List[Dict]) -> List[Dict]:
+        """Ordena por prioridade (estável) e atribui o ranking"""
         # Ordenar por prioridade (maior primeiro)
         sugestoes.sort(key=lambda x: x["prioridade"], reverse=True)
 
@@ -340,20 +605,30 @@ class MotorInferencia:
         """Retorna IDs das disciplinas de um ano específico"""
         return [d["id"] for d in self.gerenciador.get_disciplinas_ano(ano)]
 
-    def _registrar_disparo(self, regra: Regra, fatos: Dict, resultado: Dict) -> None:
+    def _registrar_disparo(self, regra: Regra, fatos: Mapping[str, Any], resultado: Dict) -> None:
         """Registra o disparo de uma regra para explicação"""
         if regra.id not in self.regras_disparadas:
             self.regras_disparadas.append(regra.id)
 
+        nivel = self.nivel_explicacao
+        if nivel is NivelExplicacao.NENHUMA:
+            return
+        if nivel is NivelExplicacao.RESUMO:
+            # Sem contexto de fatos nem histórico na BaseFatos
+            self.explicacoes.append({
+                "regra_id": regra.id,
+                "regra_nome": regra.nome,
+                "tipo": regra.tipo.value,
+                "resultado": resultado["mensagem"],
+                "disciplina_id": fatos.get("id")
+            })
+            return
+
         # Filtrar fatos relevantes para a explicação
-        fatos_relevantes = {
-            k: v for k, v in fatos.items()
-            if not k.startswith('_') and k in [
-                'id', 'nome', 'aluno_ano', 'tem_pre_requisito',
-                'pre_requisitos_cumpridos', 'eh_dependencia',
-                'area_forte', 'mesmo_ano_aluno', 'area'
-            ]
-        }
+        if isinstance(fatos, VisaoFatos):
+            fatos_relevantes = fatos.selecionar(_FATOS_EXPLICACAO)
+        else:
+            fatos_relevantes = {k: v for k, v in fatos.items() if k in _FATOS_EXPLICACAO}
 
         self.explicacoes.append({
             "regra_id": regra.id,
@@ -0,0 +1,267 @@
+"""
+Rede de Discriminação (estilo Rete) para o casamento de regras
+
+Em vez de testar cada regra inteira contra o dicionário completo de fatos,
+a rede indexa as condições declarativas (Regra.condicoes) pelos fatos que
+elas leem:
+
+- Nós alfa: um por Condicao distinta, compartilhados entre regras
+  (ex.: "eh_dependencia == False" serve R10 e qualquer outra regra igual).
+  A memória alfa guarda o último resultado do teste.
+- Nós de junção: um por regra; a regra está ativa quando todas as suas
+  memórias alfa estão satisfeitas (contador de condições satisfeitas).
+
+Quando um fato muda, apenas os nós alfa que dependem dele são retestados
+e apenas as regras ligadas a esses nós têm o contador ajustado. Testes de
+igualdade com constante (ex.: area == "Técnica") são despachados por
+tabela hash: só os nós do valor antigo e do novo são retestados.
+Regras sem forma declarativa continuam sendo avaliadas pela lambda.
+
+Com as 11 regras atuais o ganho é pequeno (o custo fixo da rede equivale
+ao das lambdas); a diferença aparece conforme a base de regras cresce -
+veja benchmarks/casamento_regras.py.
+"""
+import threading
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from facts_base.student_facts import VisaoFatos
+from knowledge_base.rules import Condicao, Regra, TipoRegra, registro_regras
+
+
+_AUSENTE = object()
+
+
+def _despachavel(cond: Condicao) -> bool:
+    """Igualdade com constante hashable e sem padrão: indexável por valor"""
+    if cond.operador != "==" or cond.ref or cond.padrao is not None:
+        return False
+    try:
+        hash(cond.valor)
+    except TypeError:
+        return False
+    return True
+
+
+class RedeDiscriminacao:
+    """Estrutura compilada (imutável) da rede para um conjunto de regras"""
+
+    def __init__(self, regras: Sequence[Regra], versao: str = ""):
+        self.versao = versao
+        self.regras: Tuple[Regra, ...] = tuple(regras)
+
+        alfas: Dict[Condicao, int] = {}
+        self._juncoes: List[Tuple[int, ...]] = []
+        for regra in self.regras:
+            nos = []
+            for cond in regra.condicoes:
+                if cond not in alfas:
+                    alfas[cond] = len(alfas)
+                nos.append(alfas[cond])
+            self._juncoes.append(tuple(sorted(set(nos))))
+
+        self.alfas: Tuple[Condicao, ...] = tuple(alfas)
+
+        # fato -> nós alfa que o leem
+        por_fato: Dict[str, List[int]] = {}
+        for indice, cond in enumerate(self.alfas):
+            for fato in cond.fatos_testados:
+                por_fato.setdefault(fato, []).append(indice)
+        self.alfas_por_fato: Mapping[str, Tuple[int, ...]] = {
+            fato: tuple(nos) for fato, nos in por_fato.items()
+        }
+        self.fatos_indexados: Tuple[str, ...] = tuple(self.alfas_por_fato)
+
+        # Testes de igualdade com constante ficam em uma tabela hash por fato:
+        # quando o valor muda de `a` para `b`, só os nós "== a" e "== b" mudam.
+        por_valor: Dict[str, Dict[Any, List[int]]] = {}
+        gerais: Dict[str, List[int]] = {fato: [] for fato in por_fato}
+        for indice, cond in enumerate(self.alfas):
+            if _despachavel(cond):
+                por_valor.setdefault(cond.fato, {}).setdefault(cond.valor, []).append(indice)
+            for fato in cond.fatos_testados:
+                if not _despachavel(cond) or fato != cond.fato:
+                    gerais[fato].append(indice)
+        self._por_valor = {
+            fato: {valor: tuple(nos) for valor, nos in tabela.items()}
+            for fato, tabela in por_valor.items()
+        }
+        self._gerais = {fato: tuple(nos) for fato, nos in gerais.items()}
+
+        # nó alfa -> regras (índices) que dependem dele
+        sucessores: List[List[int]] = [[] for _ in self.alfas]
+        for indice_regra, nos in enumerate(self._juncoes):
+            for no in nos:
+                sucessores[no].append(indice_regra)
+        self._sucessores: Tuple[Tuple[int, ...], ...] = tuple(tuple(s) for s in sucessores)
+
+        # O índice da regra reflete a prioridade (a ordem de `regras`)
+        self._tamanho: Tuple[int, ...] = tuple(len(nos) for nos in self._juncoes)
+        self._tipo: Tuple[TipoRegra, ...] = tuple(r.tipo for r in self.regras)
+        self._opacas: Dict[Optional[TipoRegra], Tuple[int, ...]] = {
+            tipo: tuple(i for i, r in enumerate(self.regras) if not r.condicoes and r.tipo == tipo)
+            for tipo in TipoRegra
+        }
+        self._opacas[None] = tuple(i for i, r in enumerate(self.regras) if not r.condicoes)
+
+    def sessao(self, fatos: Optional[Dict[str, Any]] = None) -> "SessaoRede":
+        """Cria uma memória de trabalho sobre esta rede"""
+        return SessaoRede(self, fatos or {})
+
+
+class SessaoRede:
+    """
+    Memória de trabalho de uma inferência.
+
+    Os fatos ficam em duas camadas: a base (fatos do aluno) e o contexto
+    (fatos da disciplina sendo avaliada), que sobrepõe a base. Trocar o
+    contexto só retesta os nós alfa dos fatos cujo valor mudou.
+
+    A sessão não copia a base: se o dicionário for alterado por fora, chame
+    redefinir() com ele para retestar os nós afetados.
+    """
+
+    def __init__(self, rede: RedeDiscriminacao, fatos: Dict[str, Any]):
+        self.rede = rede
+        self._base: Dict[str, Any] = fatos
+        self._contexto: Dict[str, Any] = {}
+        # Valores efetivos apenas dos fatos lidos por algum nó alfa
+        self._indexados: Dict[str, Any] = {
+            k: self._base[k] for k in rede.fatos_indexados if k in self._base
+        }
+        self._memoria_alfa: List[bool] = [False] * len(rede.alfas)
+        self._satisfeitas: List[int] = [0] * len(rede.regras)
+        # Memórias de junção: regras com todas as condições satisfeitas, por tipo
+        self._completas: Dict[TipoRegra, set] = {tipo: set() for tipo in TipoRegra}
+        self.testes_alfa = 0
+
+        efetivos = self._indexados
+        for indice, cond in enumerate(rede.alfas):
+            if cond.testar(efetivos):
+                self._memoria_alfa[indice] = True
+                for r in rede._sucessores[indice]:
+                    self._satisfeitas[r] += 1
+        self.testes_alfa += len(rede.alfas)
+
+        for r, tamanho in enumerate(rede._tamanho):
+            if tamanho and self._satisfeitas[r] == tamanho:
+                self._completas[rede._tipo[r]].add(r)
+
+    def redefinir(self, fatos: Dict[str, Any]) -> None:
+        """
+        Troca toda a memória de trabalho (ex.: próximo aluno de um lote),
+        retestando só os nós alfa dos fatos indexados que mudaram.
+        """
+        self._base = fatos
+        self._contexto = {}
+        base = self._base
+        self._trocar([(fato, base.get(fato, _AUSENTE)) for fato in self.rede.fatos_indexados])
+
+    def fatos(self) -> VisaoFatos:
+        """Fatos efetivos (base sobreposta pelo contexto), sem cópia"""
+        return VisaoFatos(self._base, self._contexto) if self._contexto else VisaoFatos(self._base)
+
+    def atualizar(self, fatos: Dict[str, Any]) -> None:
+        """Altera fatos da base (ex.: aluno aprovado em uma disciplina)"""
+        # Cópia na escrita: o dicionário recebido em redefinir() não é alterado
+        self._base = {**self._base, **fatos}
+        self._trocar([
+            (fato, self._contexto.get(fato, valor)) for fato, valor in fatos.items()
+            if fato in self.rede.alfas_por_fato
+        ])
+
+    def definir_contexto(self, fatos: Dict[str, Any]) -> None:
+        """
+        Substitui a camada de contexto (fatos da disciplina em avaliação).
+        O dicionário passa a pertencer à sessão e não deve ser alterado.
+        """
+        self._contexto = fatos
+        base = self._base
+        self._trocar([
+            (fato, fatos[fato] if fato in fatos else base.get(fato, _AUSENTE))
+            for fato in self.rede.fatos_indexados
+        ])
+
+    def _trocar(self, valores: List[Tuple[str, Any]]) -> None:
+        """Aplica novos valores efetivos e retesta só os nós alfa afetados"""
+        rede = self.rede
+        indexados = self._indexados
+        nos = set()
+        for fato, valor in valores:
+            anterior = indexados.get(fato, _AUSENTE)
+            if anterior == valor:
+                continue
+            if valor is _AUSENTE:
+                del indexados[fato]
+            else:
+                indexados[fato] = valor
+            nos.update(rede._gerais[fato])
+
+            tabela = rede._por_valor.get(fato)
+            if tabela:
+                try:
+                    for v in (anterior, valor):
+                        nos.update(tabela.get(None if v is _AUSENTE else v, ()))
+                except TypeError:
+                    # Valor não hashable: retesta todos os nós de igualdade do fato
+                    for indices in tabela.values():
+                        nos.update(indices)
+        if not nos:
+            return
+
+        memoria = self._memoria_alfa
+        satisfeitas = self._satisfeitas
+        completas = self._completas
+        tamanho = rede._tamanho
+        tipo = rede._tipo
+        for indice in nos:
+            novo = rede.alfas[indice].testar(indexados)
+            if novo is memoria[indice]:
+                continue
+            memoria[indice] = novo
+            if novo:
+                for r in rede._sucessores[indice]:
+                    satisfeitas[r] += 1
+                    if satisfeitas[r] == tamanho[r]:
+                        completas[tipo[r]].add(r)
+            else:
+                for r in rede._sucessores[indice]:
+                    if satisfeitas[r] == tamanho[r]:
+                        completas[tipo[r]].discard(r)
+                    satisfeitas[r] -= 1
+        self.testes_alfa += len(nos)
+
+    def ativas(self, tipo: Optional[TipoRegra] = None) -> List[Regra]:
+        """Regras ativas (do tipo, se informado), em ordem de prioridade"""
+        rede = self.rede
+        if tipo is None:
+            indices = set().union(*self._completas.values())
+        else:
+            indices = set(self._completas[tipo])
+
+        opacas = rede._opacas[tipo]
+        if opacas:
+            # Regras opacas: avalia a lambda sobre os fatos completos
+            efetivos = self.fatos()
+            indices.update(i for i in opacas if rede.regras[i].avaliar(efetivos))
+
+        return [rede.regras[i] for i in sorted(indices)]
+
+
+_lock = threading.Lock()
+_rede: Optional[RedeDiscriminacao] = None
+
+
+def obter_rede() -> RedeDiscriminacao:
+    """Rede compilada para a versão atual do registro de regras"""
+    global _rede
+    rede = _rede
+    if rede is not None and rede.versao == registro_regras.versao:
+        return rede
+    with _lock:
+        if _rede is None or _rede.versao != registro_regras.versao:
+            versao = registro_regras.versao
+            _rede = RedeDiscriminacao(registro_regras.todas(), versao)
+        return _rede
+
+
+__all__ = ['RedeDiscriminacao', 'SessaoRede', 'obter_rede']
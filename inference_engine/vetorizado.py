@@ -0,0 +1,301 @@
+"""
+Avaliação Vetorizada de Turmas (NumPy)
+
+Para a virada de ano, avalia uma turma inteira com operações de matriz em
+vez de aluno a aluno:
+- linhas = alunos, colunas = posições do currículo (CurriculoCompilado.posicao)
+- A (aprovadas) e R (reprovadas) são matrizes booleanas
+- pré-requisitos viram uma matriz disciplina x posição
+
+Reproduz as decisões de MotorInferencia._avaliar_situacao_geral (R1, R2,
+R3, R5) e _avaliar_disciplinas (bloqueio R4, elegibilidade R6/R7), além de
+reprovacoes_ano, passou_todas_ano_atual e a contagem de dependências.
+Sugestões, heurísticas e explicações continuam com o motor escalar.
+
+Alunos que a forma matricial não representa fielmente (ids repetidos ou
+fora do currículo no histórico, ano não inteiro) e turmas avaliadas sem
+NumPy instalado caem no motor escalar.
+
+Verificação de equivalência com o motor escalar (alunos aleatórios):
+    python -m inference_engine.vetorizado --alunos 5000
+"""
+import argparse
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional: sem ele tudo vai para o motor escalar
+    np = None
+
+from database import StudentSnapshot
+from facts_base.student_facts import BaseFatos, GerenciadorFatosAluno
+from inference_engine.engine import MotorInferencia, StatusInferencia
+from knowledge_base.curriculo import CurriculoCompilado, obter_curriculo
+from knowledge_base.rules import TipoRegra
+
+
+NUMPY_DISPONIVEL = np is not None
+
+_TIPOS_SITUACAO = (TipoRegra.REPROVACAO_ANO.value, TipoRegra.MATRICULA_AUTOMATICA.value)
+
+
+@dataclass
+class DecisaoAluno:
+    """Decisões de progressão e matrícula de um aluno"""
+    aluno_id: str
+    status: StatusInferencia
+    novo_ano: int
+    regra_situacao: Optional[str] = None
+    aprovadas: List[str] = field(default_factory=list)
+    elegiveis: List[str] = field(default_factory=list)
+    bloqueadas: List[str] = field(default_factory=list)
+    matriculadas: List[str] = field(default_factory=list)
+    reprovacoes_ano: int = 0
+    passou_todas_ano_atual: bool = False
+    quantidade_dependencias: int = 0
+    vetorizado: bool = True
+
+    def chave(self) -> tuple:
+        """Campos comparados na verificação de equivalência"""
+        return (
+            self.aluno_id, self.status, self.novo_ano, self.regra_situacao,
+            self.aprovadas, self.elegiveis, self.bloqueadas, self.matriculadas,
+            self.reprovacoes_ano, self.passou_todas_ano_atual,
+            self.quantidade_dependencias,
+        )
+
+
+def decidir_escalar(snapshot: StudentSnapshot) -> DecisaoAluno:
+    """Decisões de um aluno pelo motor escalar (referência e fallback)"""
+    base_fatos = BaseFatos()
+    gerenciador = GerenciadorFatosAluno(base_fatos)
+    gerenciador.inicializar_aluno_do_snapshot(snapshot)
+    resultado = MotorInferencia(base_fatos, gerenciador).inferir()
+
+    regra_situacao = next(
+        (e["regra_id"] for e in resultado.explicacao if e["tipo"] in _TIPOS_SITUACAO), None
+    )
+    return DecisaoAluno(
+        aluno_id=snapshot.aluno_id,
+        status=resultado.status,
+        novo_ano=resultado.novo_ano,
+        regra_situacao=regra_situacao,
+        aprovadas=[d["id"] for d in resultado.disciplinas_aprovadas],
+        elegiveis=[d["id"] for d in resultado.disciplinas_elegiveis],
+        bloqueadas=[d["id"] for d in resultado.disciplinas_bloqueadas],
+        matriculadas=list(resultado.disciplinas_matriculadas),
+        reprovacoes_ano=base_fatos.get_fato("reprovacoes_ano", 0),
+        passou_todas_ano_atual=base_fatos.get_fato("passou_todas_ano_atual", False),
+        quantidade_dependencias=base_fatos.get_fato("quantidade_dependencias", 0),
+        vetorizado=False,
+    )
+
+
+class AvaliadorTurma:
+    """Matrizes do currículo (montadas uma vez) e avaliação vetorizada"""
+
+    def __init__(self, compilado: CurriculoCompilado = None):
+        self.compilado = compilado or obter_curriculo()
+        self.ids = [d["id"] for d in self.compilado.disciplinas]
+        self.largura = len(self.compilado.posicao)
+
+        if NUMPY_DISPONIVEL:
+            posicao = self.compilado.posicao
+            # Coluna (posição) de cada disciplina, na ordem do currículo
+            self.colunas = np.array([posicao[d_id] for d_id in self.ids], dtype=np.intp)
+            self.ano_disciplina = np.array(
+                [d["ano"] for d in self.compilado.disciplinas], dtype=np.int64
+            )
+            self.tem_pre_requisito = np.array(
+                [len(d.get("pre_requisitos", ())) > 0 for d in self.compilado.disciplinas]
+            )
+            # pre_requisitos[i, p] = 1 se a posição p é pré-requisito da disciplina i
+            self.pre_requisitos = np.zeros((len(self.ids), self.largura), dtype=np.float32)
+            for i, d in enumerate(self.compilado.disciplinas):
+                for pr in d.get("pre_requisitos", ()):
+                    self.pre_requisitos[i, posicao[pr]] = 1
+
+    def _regular(self, snapshot: StudentSnapshot) -> bool:
+        """O aluno pode ser representado sem perda nas matrizes?"""
+        if not isinstance(snapshot.aluno.get("ano_atual"), int):
+            return False
+        posicao = self.compilado.posicao
+        for chave in ("aprovadas", "reprovadas"):
+            ids = snapshot.ids_por_status(chave)
+            if len(set(ids)) != len(ids) or any(d_id not in posicao for d_id in ids):
+                return False
+        return True
+
+    def avaliar(self, snapshots: Sequence[StudentSnapshot]) -> List[DecisaoAluno]:
+        """Decisões de todos os alunos, na ordem recebida"""
+        decisoes: List[Optional[DecisaoAluno]] = [None] * len(snapshots)
+        regulares = []
+        for i, snapshot in enumerate(snapshots):
+            if NUMPY_DISPONIVEL and self._regular(snapshot):
+                regulares.append(i)
+            else:
+                decisoes[i] = decidir_escalar(snapshot)
+
+        if regulares:
+            vetor = self._avaliar_matricial([snapshots[i] for i in regulares])
+            for i, decisao in zip(regulares, vetor):
+                decisoes[i] = decisao
+        return decisoes
+
+    def _avaliar_matricial(self, snapshots: Sequence[StudentSnapshot]) -> List[DecisaoAluno]:
+        m = len(snapshots)
+        posicao = self.compilado.posicao
+        aprovadas = np.zeros((m, self.largura), dtype=bool)
+        reprovadas = np.zeros((m, self.largura), dtype=bool)
+        ano = np.empty(m, dtype=np.int64)
+        novo = np.empty(m, dtype=bool)
+        for i, s in enumerate(snapshots):
+            aprovadas[i, [posicao[d] for d in s.ids_por_status("aprovadas")]] = True
+            reprovadas[i, [posicao[d] for d in s.ids_por_status("reprovadas")]] = True
+            ano[i] = s.aluno["ano_atual"]
+            novo[i] = s.aluno["tipo"] == "novo"
+
+        # Visão por disciplina do currículo (m x n)
+        aprov_disc = aprovadas[:, self.colunas]
+        reprov_disc = reprovadas[:, self.colunas]
+        ano_disc = self.ano_disciplina[None, :]
+        do_ano = ano_disc == ano[:, None]
+
+        # Fatos derivados
+        concluido = aprovadas.sum(axis=1) >= len(self.ids)
+        reprovacoes_ano = (reprov_disc & do_ano).sum(axis=1)
+        passou_todas = do_ano.any(axis=1) & ~(do_ano & ~aprov_disc).any(axis=1)
+        dependencias = ((ano_disc < ano[:, None]) & ~aprov_disc).sum(axis=1)
+
+        # Situação geral, na ordem de prioridade do motor
+        r5 = reprovacoes_ano > 3
+        r1 = (ano == 1) & novo
+        r2 = passou_todas & (ano < 3) & ~novo
+        r3 = (dependencias > 0) & (reprovacoes_ano <= 3) & (ano < 3) & ~novo & ~passou_todas
+
+        # R4/R6/R7: pré-requisitos pendentes = produto com o complemento de A
+        pendentes = (~aprovadas).astype(np.float32) @ self.pre_requisitos.T
+        avaliavel = ~aprov_disc & (ano_disc <= ano[:, None] + 1)
+        bloqueada = avaliavel & self.tem_pre_requisito[None, :] & (pendentes > 0)
+        elegivel = avaliavel & ~bloqueada
+
+        ids = np.array(self.ids, dtype=object)
+        decisoes = []
+        for i, s in enumerate(snapshots):
+            decisao = DecisaoAluno(
+                aluno_id=s.aluno_id,
+                status=StatusInferencia.AGUARDANDO,
+                novo_ano=int(ano[i]),
+                reprovacoes_ano=int(reprovacoes_ano[i]),
+                passou_todas_ano_atual=bool(passou_todas[i]),
+                quantidade_dependencias=int(dependencias[i]),
+            )
+            decisoes.append(decisao)
+
+            if concluido[i]:
+                decisao.status = StatusInferencia.CURSO_CONCLUIDO
+                continue
+
+            if not r5[i] and (r1[i] or r2[i] or r3[i]):
+                decisao.status = StatusInferencia.MATRICULA_AUTOMATICA
+                decisao.regra_situacao = "R1" if r1[i] else "R2" if r2[i] else "R3"
+                if not r1[i]:
+                    decisao.novo_ano = int(ano[i]) + 1
+                decisao.matriculadas = list(ids[self.ano_disciplina == decisao.novo_ano])
+                continue
+
+            decisao.aprovadas = list(ids[aprov_disc[i]])
+            decisao.elegiveis = list(ids[elegivel[i]])
+            decisao.bloqueadas = list(ids[bloqueada[i]])
+            if r5[i]:
+                decisao.status = StatusInferencia.REPROVADO_ANO
+                decisao.regra_situacao = "R5"
+            elif decisao.elegiveis:
+                decisao.status = StatusInferencia.SELECAO_MANUAL
+        return decisoes
+
+
+def verificar_equivalencia(snapshots: Sequence[StudentSnapshot],
+                           avaliador: AvaliadorTurma = None) -> List[str]:
+    """IDs dos alunos em que a avaliação vetorizada diverge do motor escalar"""
+    avaliador = avaliador or AvaliadorTurma()
+    return [
+        vetor.aluno_id
+        for vetor, snapshot in zip(avaliador.avaliar(snapshots), snapshots)
+        if vetor.chave() != decidir_escalar(snapshot).chave()
+    ]
+
+
+def turma_aleatoria(quantidade: int, semente: int = 42) -> List[StudentSnapshot]:
+    """
+    Alunos aleatórios para a verificação, incluindo casos de borda:
+    alunos novos, turma concluída, ids repetidos ou fora do currículo.
+    """
+    rng = random.Random(semente)
+    ids = [d["id"] for d in obter_curriculo().disciplinas]
+    turma = []
+    for i in range(quantidade):
+        perfil = rng.random()
+        if perfil < 0.03:
+            aprovadas = list(ids)
+        else:
+            aprovadas = [x for x in ids if rng.random() < rng.random()]
+        reprovadas = [x for x in ids if x not in aprovadas and rng.random() < rng.random() * 0.4]
+        if 0.03 <= perfil < 0.06:
+            reprovadas += reprovadas[:1] + ["XXX99"]
+
+        snapshot = StudentSnapshot(aluno={
+            "id": f"V{i}",
+            "nome": f"Aluno {i}",
+            "ano_atual": rng.randint(1, 3),
+            "tipo": "novo" if rng.random() < 0.15 else "veterano",
+        })
+        for chave, lista in (("aprovadas", aprovadas), ("reprovadas", reprovadas)):
+            for d_id in lista:
+                snapshot.historico[chave].append({"id": d_id, "nota": 7.0, "ano_cursado": 2025})
+        turma.append(snapshot)
+    return turma
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Equivalência vetorizado x escalar")
+    parser.add_argument("--alunos", type=int, default=2000)
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    if not NUMPY_DISPONIVEL:
+        print("⚠️ NumPy não instalado: a avaliação usa apenas o motor escalar")
+
+    turma = turma_aleatoria(args.alunos, args.semente)
+    avaliador = AvaliadorTurma()
+
+    inicio = time.perf_counter()
+    decisoes = avaliador.avaliar(turma)
+    t_vetor = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    escalares = [decidir_escalar(s) for s in turma]
+    t_escalar = time.perf_counter() - inicio
+
+    divergentes = [
+        v.aluno_id for v, e in zip(decisoes, escalares) if v.chave() != e.chave()
+    ]
+    vetorizados = sum(d.vetorizado for d in decisoes)
+    print(f"{len(turma)} alunos ({vetorizados} vetorizados, {len(turma) - vetorizados} pelo motor escalar)")
+    print(f"vetorizado {t_vetor * 1000:8.1f} ms | escalar {t_escalar * 1000:8.1f} ms")
+    if divergentes:
+        print(f"❌ {len(divergentes)} divergência(s): {', '.join(divergentes[:10])}")
+        return 1
+    print("✓ Decisões idênticas ao motor escalar")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
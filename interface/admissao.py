@@ -0,0 +1,343 @@
+"""
+Controle de Admissão - limite de concorrência e fila com prazo por rota
+
+No dia de abertura da matrícula todos os alunos chamam /api/consultar e
+/api/matricular ao mesmo tempo. Sem controle, as requisições se acumulam
+esperando o lock de escrita do SQLite e acabam estourando o tempo sem
+nenhum sinal claro para o cliente.
+
+Cada rota controlada passa por um Portao:
+- no máximo `limite` requisições em execução ao mesmo tempo
+- até `fila` requisições esperando, por ordem de chegada, no máximo
+  `prazo` segundos cada
+- com a fila cheia ou o prazo esgotado a requisição é recusada na hora
+  (AdmissaoRecusada -> 503 com Retry-After)
+
+As rotas são divididas em classes com configurações próprias. Leituras
+baratas (currículo, regras, busca de aluno) têm portões separados e mais
+folgados que os das escritas, então nunca esperam atrás de uma fila de
+consultas. Os limites valem por processo.
+
+O mesmo Portao atende threads (Flask: `with portao.admitir()`) e o laço de
+eventos (ASGI: `async with portao.admitir_async()`). Respostas em streaming
+assumem a Vaga (Vaga.assumir) e só a devolvem quando o corpo termina.
+"""
+import asyncio
+import math
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager, nullcontext
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, Optional
+
+from database import inteiro_env
+
+LEITURA = "leitura"
+ESCRITA = "escrita"
+LOTE = "lote"
+
+# Classe de cada rota controlada (nome da rota -> classe)
+ROTAS = {
+    "curriculo": LEITURA,
+    "regras": LEITURA,
+    "aluno": LEITURA,
+    "alunos": LEITURA,
+    "explicacao": LEITURA,
+    "consultar": ESCRITA,
+    "matricular": ESCRITA,
+    "consultar_lote": LOTE,
+}
+
+
+@dataclass(frozen=True)
+class ConfigPortao:
+    """Limite de concorrência, tamanho da fila e prazo de espera (segundos)"""
+    limite: int
+    fila: int
+    prazo: float
+
+
+# Padrões por classe; sobrescritos por UNIADVISOR_ADMISSAO_<CLASSE>_<LIMITE|FILA|PRAZO_MS>
+PADROES = {
+    LEITURA: ConfigPortao(limite=32, fila=256, prazo=1.0),
+    # Um único escritor no SQLite: poucas escritas simultâneas bastam para
+    # sobrepor inferência e commit sem formar um comboio no lock
+    ESCRITA: ConfigPortao(limite=4, fila=64, prazo=2.0),
+    LOTE: ConfigPortao(limite=1, fila=4, prazo=5.0),
+}
+
+
+class AdmissaoRecusada(Exception):
+    """Requisição recusada pelo portão (fila cheia ou prazo de espera esgotado)"""
+
+    def __init__(self, rota: str, motivo: str, retry_after: int):
+        super().__init__(f"{rota}: {motivo}")
+        self.rota = rota
+        self.motivo = motivo
+        self.retry_after = retry_after
+
+
+class _Espera(ABC):
+    """Uma requisição na fila; `concedida` é marcado (sob o lock do portão) ao receber a vaga"""
+
+    def __init__(self):
+        self.concedida = False
+
+    @abstractmethod
+    def acordar(self) -> None:
+        """Avisa quem espera que a vaga foi concedida"""
+
+
+class _EsperaThread(_Espera):
+    def __init__(self):
+        super().__init__()
+        self.evento = threading.Event()
+
+    def acordar(self) -> None:
+        self.evento.set()
+
+
+class _EsperaAsync(_Espera):
+    def __init__(self):
+        super().__init__()
+        self.laco = asyncio.get_running_loop()
+        self.futuro = self.laco.create_future()
+
+    def acordar(self) -> None:
+        # A vaga pode ser liberada por uma thread de executor
+        self.laco.call_soon_threadsafe(self._concluir)
+
+    def _concluir(self) -> None:
+        if not self.futuro.done():
+            self.futuro.set_result(None)
+
+
+class Vaga:
+    """
+    Vaga ocupada no portão, entregue pelo `with`. Uma resposta em streaming
+    a assume para devolvê-la só quando o corpo terminar de ser enviado.
+    """
+
+    def __init__(self, portao: Optional["Portao"]):
+        self._portao = portao
+        self.assumida = False
+        self._devolvida = False
+
+    def assumir(self) -> Callable[[], None]:
+        """Tira a devolução do fim do `with`; retorna a função que devolve a vaga"""
+        self.assumida = True
+        return self._devolver
+
+    def _devolver(self) -> None:
+        if self._devolvida:
+            return
+        self._devolvida = True
+        if self._portao is not None:
+            # O tempo do corpo depende do cliente: fica fora da média do Retry-After
+            self._portao._liberar(None)
+
+
+class Portao:
+    """
+    Semáforo com fila limitada (FIFO) e prazo de espera, seguro para
+    threads e para o laço de eventos.
+
+    A vaga de quem termina passa direto para o primeiro da fila, então uma
+    requisição nova nunca fura a fila.
+    """
+
+    def __init__(self, rota: str, classe: str, config: ConfigPortao, amostras: int = 1024):
+        self.rota = rota
+        self.classe = classe
+        self.config = config
+        self._lock = threading.Lock()
+        self._em_andamento = 0
+        self._fila: Deque[_Espera] = deque()
+        self._esperas: Deque[float] = deque(maxlen=amostras)
+        self._servico_medio = 0.0
+        self._stats = {
+            "admitidas": 0,
+            "enfileiradas": 0,
+            "recusadas_fila_cheia": 0,
+            "recusadas_prazo": 0,
+            "canceladas": 0,
+            "fila_maxima": 0,
+        }
+
+    # ===== núcleo (sempre sob self._lock) =====
+
+    def _reservar(self, criar_espera) -> Optional[_Espera]:
+        """Ocupa uma vaga livre (None) ou entra na fila (a espera criada)"""
+        with self._lock:
+            if self._em_andamento < self.config.limite and not self._fila:
+                self._em_andamento += 1
+                self._stats["admitidas"] += 1
+                return None
+            if len(self._fila) >= self.config.fila:
+                self._stats["recusadas_fila_cheia"] += 1
+                raise AdmissaoRecusada(self.rota, "fila_cheia", self._retry_after())
+            espera = criar_espera()
+            self._fila.append(espera)
+            self._stats["enfileiradas"] += 1
+            self._stats["fila_maxima"] = max(self._stats["fila_maxima"], len(self._fila))
+            return espera
+
+    def _desistir(self, espera: _Espera, motivo: str) -> bool:
+        """
+        Retira da fila quem não vai mais esperar. Retorna True se a vaga já
+        tinha sido concedida (a requisição segue admitida).
+        """
+        with self._lock:
+            if espera.concedida:
+                return True
+            self._fila.remove(espera)
+            self._stats[motivo] += 1
+            return False
+
+    def _liberar(self, servico: Optional[float]) -> None:
+        """
+        Devolve a vaga: passa para o primeiro da fila ou a libera.
+        `servico` None (vaga devolvida sem uso) não entra na média.
+        """
+        with self._lock:
+            # Média móvel exponencial do tempo de execução (estimativa do Retry-After)
+            if servico is not None and self._servico_medio:
+                self._servico_medio += 0.1 * (servico - self._servico_medio)
+            elif servico is not None:
+                self._servico_medio = servico
+            if self._fila:
+                espera = self._fila.popleft()
+                espera.concedida = True
+                self._stats["admitidas"] += 1
+                espera.acordar()
+            else:
+                self._em_andamento -= 1
+
+    def _retry_after(self) -> int:
+        """Segundos estimados até haver vaga para uma requisição nova"""
+        estimativa = self._servico_medio * (len(self._fila) + 1) / self.config.limite
+        return min(60, max(1, math.ceil(estimativa)))
+
+    def _registrar_espera(self, inicio: float) -> None:
+        with self._lock:
+            self._esperas.append(time.monotonic() - inicio)
+
+    # ===== threads =====
+
+    @contextmanager
+    def admitir(self):
+        """Bloco executado dentro da vaga (a Vaga); AdmissaoRecusada se não houver"""
+        inicio = time.monotonic()
+        espera = self._reservar(_EsperaThread)
+        if espera is not None and not espera.evento.wait(self.config.prazo):
+            if not self._desistir(espera, "recusadas_prazo"):
+                raise AdmissaoRecusada(self.rota, "prazo_esgotado", self._retry_after())
+        self._registrar_espera(inicio)
+        admitida = time.monotonic()
+        vaga = Vaga(self)
+        try:
+            yield vaga
+        finally:
+            if not vaga.assumida:
+                self._liberar(time.monotonic() - admitida)
+
+    # ===== laço de eventos =====
+
+    @asynccontextmanager
+    async def admitir_async(self):
+        """Como admitir(), mas a espera não bloqueia o laço de eventos"""
+        inicio = time.monotonic()
+        espera = self._reservar(_EsperaAsync)
+        if espera is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(espera.futuro), self.config.prazo)
+            except asyncio.TimeoutError:
+                if not self._desistir(espera, "recusadas_prazo"):
+                    raise AdmissaoRecusada(self.rota, "prazo_esgotado", self._retry_after())
+            except asyncio.CancelledError:
+                # Cliente desconectou enquanto esperava: devolve a vaga se já a recebeu
+                if self._desistir(espera, "canceladas"):
+                    self._liberar(None)
+                raise
+        self._registrar_espera(inicio)
+        admitida = time.monotonic()
+        vaga = Vaga(self)
+        try:
+            yield vaga
+        finally:
+            if not vaga.assumida:
+                self._liberar(time.monotonic() - admitida)
+
+    def estatisticas(self) -> Dict[str, Any]:
+        """Ocupação, fila, tempos de espera (ms) e recusas"""
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["em_andamento"] = self._em_andamento
+            stats["na_fila"] = len(self._fila)
+            esperas = sorted(self._esperas)
+            servico = self._servico_medio
+        stats.update(classe=self.classe, limite=self.config.limite,
+                     fila=self.config.fila, prazo_ms=round(self.config.prazo * 1000))
+        stats["servico_medio_ms"] = round(servico * 1000, 2)
+        stats["espera_ms"] = {
+            "p50": round(esperas[len(esperas) // 2] * 1000, 2) if esperas else 0.0,
+            "p99": round(esperas[int(len(esperas) * 0.99)] * 1000, 2) if esperas else 0.0,
+            "max": round(esperas[-1] * 1000, 2) if esperas else 0.0,
+        }
+        return stats
+
+
+def _config_do_ambiente(classe: str) -> ConfigPortao:
+    padrao = PADROES[classe]
+    prefixo = f"UNIADVISOR_ADMISSAO_{classe.upper()}"
+    return ConfigPortao(
+        limite=max(1, inteiro_env(f"{prefixo}_LIMITE", padrao.limite)),
+        fila=max(0, inteiro_env(f"{prefixo}_FILA", padrao.fila)),
+        prazo=inteiro_env(f"{prefixo}_PRAZO_MS", int(padrao.prazo * 1000)) / 1000,
+    )
+
+
+class ControleAdmissao:
+    """Um Portao por rota controlada; desativado, admite tudo sem contar"""
+
+    def __init__(self, configs: Dict[str, ConfigPortao], ativo: bool = True):
+        self.ativo = ativo
+        self.portoes = {rota: Portao(rota, classe, configs[classe]) for rota, classe in ROTAS.items()}
+
+    @classmethod
+    def do_ambiente(cls) -> "ControleAdmissao":
+        """Configuração lida das variáveis de ambiente (UNIADVISOR_ADMISSAO=0 desativa)"""
+        return cls({classe: _config_do_ambiente(classe) for classe in PADROES},
+                   ativo=os.environ.get("UNIADVISOR_ADMISSAO", "1") != "0")
+
+    def admitir(self, rota: str):
+        """Context manager (threads) da rota"""
+        return self.portoes[rota].admitir() if self.ativo else nullcontext(Vaga(None))
+
+    def admitir_async(self, rota: str):
+        """Context manager assíncrono (laço de eventos) da rota"""
+        return self.portoes[rota].admitir_async() if self.ativo else _nada_async()
+
+    def estatisticas(self) -> Dict[str, Any]:
+        return {
+            "ativo": self.ativo,
+            "rotas": {rota: portao.estatisticas() for rota, portao in self.portoes.items()},
+        }
+
+
+@asynccontextmanager
+async def _nada_async():
+    yield Vaga(None)
+
+
+# Controle compartilhado pelo processo
+controle_admissao = ControleAdmissao.do_ambiente()
+
+
+__all__ = [
+    'AdmissaoRecusada', 'ConfigPortao', 'ControleAdmissao', 'Portao', 'Vaga',
+    'controle_admissao', 'LEITURA', 'ESCRITA', 'LOTE', 'ROTAS', 'PADROES'
+]
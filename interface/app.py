@@ -8,216 +8,164 @@ Interface completamente reestruturada com:
 4. Persistência do histórico do aluno
 5. Busca rápida de alunos pré-cadastrados
 """
-from flask import Flask, render_template, request, jsonify, session
+from flask import Flask, Response, render_template, request, jsonify, session
+import functools
 import sys
 from pathlib import Path
-from datetime import datetime
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from facts_base.student_facts import BaseFatos, GerenciadorFatosAluno
-from inference_engine.engine import MotorInferencia, StatusInferencia
-from database import AlunoRepository, HistoricoRepository, MatriculaRepository, LogRepository, inicializar_banco
+from interface import servicos
+from interface.admissao import AdmissaoRecusada, controle_admissao
+from interface.servicos import criar_motor_inferencia, preaquecer_respostas
 
 app = Flask(__name__)
 app.secret_key = 'uniadvisor-secret-key-2026-ifam'
 
-inicializar_banco()
-
-
-def criar_motor_inferencia(base_fatos: BaseFatos) -> tuple:
-    """Factory para criar o motor de inferência"""
-    gerenciador = GerenciadorFatosAluno(base_fatos)
-    motor = MotorInferencia(base_fatos, gerenciador)
-    return motor, gerenciador
-
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
 
+def _admitido(rota: str):
+    """Passa a rota pelo controle de admissão (503 + Retry-After se recusada)"""
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def rota_admitida(*args, **kwargs):
+            try:
+                with controle_admissao.admitir(rota) as vaga:
+                    resposta = funcao(*args, **kwargs)
+                    if isinstance(resposta, Response) and resposta.is_streamed:
+                        # O corpo é gerado depois do return: a vaga volta ao fechar a resposta
+                        resposta.call_on_close(vaga.assumir())
+                    return resposta
+            except AdmissaoRecusada as e:
+                corpo, status, cabecalhos = servicos.recusa_admissao(e)
+                return jsonify(corpo), status, cabecalhos
+        return rota_admitida
+    return decorador
+
+
+def _dados_json():
+    """Corpo JSON da requisição (None se ausente ou inválido)"""
+    return request.get_json(silent=True)
+
+
+def _pre_calculada(escolher) -> Response:
+    """Resposta pré-calculada (ETag/304/gzip) conforme os cabeçalhos da requisição"""
+    status, cabecalhos, corpo = escolher(request.headers.get('If-None-Match'),
+                                         request.headers.get('Accept-Encoding'))
+    return Response(corpo, status=status, headers=cabecalhos)
+
+
 @app.route('/api/curriculo', methods=['GET'])
+@_admitido('curriculo')
 def get_curriculo():
     """Retorna o currículo completo organizado por ano"""
-    base_fatos = BaseFatos()
-    gerenciador = GerenciadorFatosAluno(base_fatos)
-    curriculo = gerenciador.get_curriculo()
-
-    por_ano = {}
-    for d in curriculo:
-        ano = d['ano']
-        if ano not in por_ano:
-            por_ano[ano] = []
-        por_ano[ano].append(d)
-
-    return jsonify({
-        'curriculo': curriculo,
-        'por_ano': por_ano,
-        'total_disciplinas': len(curriculo),
-        'total_carga_horaria': sum(d.get('carga_horaria', 60) for d in curriculo)
-    })
+    return _pre_calculada(servicos.resposta_curriculo)
 
 
 @app.route('/api/aluno/<aluno_id>', methods=['GET'])
+@_admitido('aluno')
 def buscar_aluno(aluno_id):
     """Busca dados completos de um aluno pelo ID/matrícula"""
-    # Buscar aluno
-    aluno = AlunoRepository.buscar_por_id(aluno_id)
-    if not aluno:
-        return jsonify({'erro': 'Aluno não encontrado'}), 404
-
-    # Buscar histórico
-    historico = HistoricoRepository.buscar_historico_aluno(aluno_id)
-
-    return jsonify({
-        'aluno': aluno,
-        'historico': historico,
-        'sucesso': True
-    })
+    corpo, status = servicos.buscar_aluno(aluno_id)
+    return jsonify(corpo), status
 
 
 @app.route('/api/alunos', methods=['GET'])
+@_admitido('alunos')
 def listar_alunos():
-    """Lista todos os alunos cadastrados"""
-    alunos = AlunoRepository.listar_todos()
-    return jsonify({
-        'alunos': alunos,
-        'total': len(alunos)
-    })
+    """
+    Lista os alunos cadastrados, ordenados por nome.
+
+    Paginação por cursor: ?limite=N&cursor=<proximo_cursor da página anterior>.
+    Com ?stream=1 a lista completa é enviada em uma resposta chunked.
+    """
+    if request.args.get('stream') in ('1', 'true'):
+        return Response(servicos.pedacos_alunos(app.json.dumps), mimetype='application/json')
+
+    corpo, status = servicos.listar_alunos(request.args.get('limite', 100),
+                                           request.args.get('cursor'))
+    return jsonify(corpo), status
 
 
 @app.route('/api/consultar', methods=['POST'])
+@_admitido('consultar')
 def consultar():
-    """Endpoint principal de consulta - retorna recomendação de matrícula"""
-    dados = request.json
-
-    base_fatos = BaseFatos()
-    motor, gerenciador = criar_motor_inferencia(base_fatos)
-
-    tipo_aluno = dados.get('tipo', 'veterano')
-    eh_novo = tipo_aluno == 'novo'
-    ano_atual = dados.get('ano_atual', 1)
-
-    if eh_novo:
-        ano_atual = 1
-
-    aluno_id = dados.get('aluno_id', dados.get('matricula', 'aluno_temp'))
-
-    # ===== PERSISTÊNCIA NO BANCO =====
-    # 1. Criar/Atualizar aluno no banco
-    AlunoRepository.criar_ou_atualizar(
-        aluno_id=aluno_id,
-        nome=dados.get('nome', 'Aluno'),
-        ano=ano_atual,
-        tipo=tipo_aluno
-    )
-
-    # 2. Limpar histórico anterior (se for uma nova consulta)
-   # HistoricoRepository.limpar_historico(aluno_id)
-
-    # 3. Salvar histórico no banco
-    if not eh_novo:
-        ano_cursado = datetime.now().year
-
-        # Salvar aprovações
-        for aprovacao in dados.get('aprovadas', []):
-            disc_id = aprovacao.get('id') or aprovacao.get('disciplina_id')
-            nota = aprovacao.get('nota', 7.0)
-            if disc_id:
-                HistoricoRepository.registrar_disciplina(
-                    aluno_id=aluno_id,
-                    disciplina_id=disc_id,
-                    status='aprovado',
-                    nota=nota,
-                    ano_cursado=ano_cursado
-                )
-
-        # Salvar reprovações
-        for reprovacao in dados.get('reprovadas', []):
-            disc_id = reprovacao.get('id') or reprovacao.get('disciplina_id')
-            nota = reprovacao.get('nota', 4.0)
-            if disc_id:
-                HistoricoRepository.registrar_disciplina(
-                    aluno_id=aluno_id,
-                    disciplina_id=disc_id,
-                    status='reprovado',
-                    nota=nota,
-                    ano_cursado=ano_cursado
-                )
-
-    # ===== PROCESSAMENTO (como antes) =====
-    gerenciador.inicializar_aluno(
-        aluno_id=aluno_id,
-        nome=dados.get('nome', 'Aluno'),
-        ano=ano_atual,
-        novo=eh_novo
-    )
-
-    if not eh_novo:
-        for aprovacao in dados.get('aprovadas', []):
-            disc_id = aprovacao.get('id') or aprovacao.get('disciplina_id')
-            if disc_id:
-                gerenciador.registrar_aprovacao(disc_id, aprovacao.get('nota', 7.0))
-
-        for reprovacao in dados.get('reprovadas', []):
-            disc_id = reprovacao.get('id') or reprovacao.get('disciplina_id')
-            if disc_id:
-                gerenciador.registrar_reprovacao(disc_id, reprovacao.get('nota', 4.0))
-
-    resultado = motor.inferir()
-    explicacao_completa = motor.get_explicacao_completa()
-
-    # 4. Registrar log da inferência
-    LogRepository.registrar_consulta(
-        aluno_id=aluno_id,
-        regras=explicacao_completa['regras_disparadas'],
-        resultado={'status': resultado.status.value, 'mensagem': resultado.mensagem}
-    )
-
-    resposta = {
-        'status': resultado.status.value,
-        'mensagem': resultado.mensagem,
-        'novo_ano': resultado.novo_ano,
-        'disciplinas_matriculadas': resultado.disciplinas_matriculadas,
-        'disciplinas_elegiveis': resultado.disciplinas_elegiveis,
-        'disciplinas_bloqueadas': resultado.disciplinas_bloqueadas,
-        'disciplinas_sugeridas': resultado.disciplinas_sugeridas,
-        'disciplinas_aprovadas': resultado.disciplinas_aprovadas,
-        'explicacao': resultado.explicacao,
-        'estatisticas': resultado.estatisticas,
-        'aluno_salvo': True,  # Indicador de que foi salvo
-        'debug': {
-            'regras_disparadas': explicacao_completa['regras_disparadas'],
-            'total_regras': explicacao_completa['total_regras_sistema']
-        }
-    }
-
-    return jsonify(resposta)
+    """
+    Endpoint principal de consulta - retorna recomendação de matrícula.
+
+    A explicação vem resumida (regra e mensagem) por padrão; use
+    ?explicacao=completa|nenhuma para mudar o nível, ou
+    GET /api/consulta/<consulta_id>/explicacao para obtê-la completa depois.
+    """
+    dados = _dados_json()
+    if not isinstance(dados, dict):
+        return jsonify({'erro': 'Corpo JSON inválido'}), 400
+    try:
+        nivel = servicos.nivel_explicacao(request.args.get('explicacao'), dados)
+    except ValueError:
+        return jsonify({'erro': servicos.ERRO_NIVEL_EXPLICACAO}), 400
+
+    return jsonify(servicos.consultar(dados, nivel))
+
+
+@app.route('/api/consultar/lote', methods=['POST'])
+@_admitido('consultar_lote')
+def consultar_lote():
+    """
+    Consulta de uma turma inteira: recebe uma lista de alunos (mesmo formato
+    de /api/consultar), grava todos em uma única transação e devolve NDJSON
+    com uma linha por aluno, na ordem enviada, e uma linha final de resumo.
+    Falhas de um aluno aparecem na linha dele sem interromper o lote.
+    """
+    itens = _dados_json()
+    try:
+        nivel = servicos.nivel_explicacao(request.args.get('explicacao'), {})
+    except ValueError:
+        return jsonify({'erro': servicos.ERRO_NIVEL_EXPLICACAO}), 400
+    erro = servicos.validar_lote(itens)
+    if erro:
+        return jsonify(erro[0]), erro[1]
+
+    linhas = servicos.consultar_lote(itens, nivel)
+    return Response(servicos.ndjson(linhas), mimetype='application/x-ndjson')
+
+
+@app.route('/api/consulta/<consulta_id>/explicacao', methods=['GET'])
+@_admitido('explicacao')
+def explicar_consulta(consulta_id):
+    """
+    Refaz a inferência de uma consulta registrada com a explicação completa
+    (contexto de cada regra, histórico de inferência e fatos finais).
+    """
+    corpo, status = servicos.explicar_consulta(consulta_id)
+    return jsonify(corpo), status
 
 
 @app.route('/api/matricular', methods=['POST'])
+@_admitido('matricular')
 def matricular():
     """Confirma matrícula nas disciplinas selecionadas"""
-    dados = request.json
-    disciplinas = dados.get('disciplinas', [])
-    aluno_id = dados.get('aluno_id', 'aluno_temp')
-
-    count = MatriculaRepository.registrar_multiplas(aluno_id, disciplinas)
-
-    return jsonify({
-        'sucesso': True,
-        'mensagem': f'Matrícula confirmada em {count} disciplina(s)',
-        'disciplinas': disciplinas
-    })
+    dados = _dados_json()
+    if not isinstance(dados, dict):
+        return jsonify({'erro': 'Corpo JSON inválido'}), 400
+    return jsonify(servicos.matricular(dados))
 
 
 @app.route('/api/regras', methods=['GET'])
+@_admitido('regras')
 def get_regras():
     """Retorna lista de regras do sistema"""
-    base_fatos = BaseFatos()
-    motor, _ = criar_motor_inferencia(base_fatos)
-    return jsonify({'regras': motor.get_resumo_regras()})
+    return _pre_calculada(servicos.resposta_regras)
+
+
+@app.route('/api/metricas', methods=['GET'])
+def get_metricas():
+    """Retorna métricas operacionais (pool, fila do log e caches)"""
+    return jsonify(servicos.metricas())
 
 
 if __name__ == '__main__':
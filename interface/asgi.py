@@ -0,0 +1,316 @@
+"""
+Interface Web - Variante assíncrona (ASGI/Starlette) da API do UniAdvisor
+
+Mesmas rotas e o mesmo contrato JSON da aplicação Flask (interface/app.py):
+as duas chamam as funções de interface/servicos.py. Aqui o laço de eventos
+só recebe conexões e serializa respostas; o trabalho bloqueante vai para
+dois executores com número limitado de threads:
+- banco: chamadas aos repositórios SQLite (leituras e commits)
+- inferência: MotorInferencia.inferir (CPU)
+
+Assim um commit lento no disco ocupa uma thread do executor do banco, mas
+não impede o laço de aceitar e responder outras requisições.
+
+Uso:
+    python main.py --asgi --workers 2
+    uvicorn interface.asgi:app --port 5000
+"""
+import asyncio
+import functools
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+from jinja2 import Environment, FileSystemLoader
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import HTMLResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route
+from starlette.staticfiles import StaticFiles
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from database import escritor_log, fechar_conexoes, inicializar_banco, inteiro_env
+from inference_engine.rete import obter_rede
+from interface import servicos
+from interface.admissao import AdmissaoRecusada, controle_admissao
+from knowledge_base.curriculo import obter_curriculo
+
+DIRETORIO = Path(__file__).parent
+
+
+class ExecutorLimitado:
+    """ThreadPoolExecutor com número fixo de threads e contadores de uso"""
+
+    def __init__(self, nome: str, max_threads: int):
+        self.nome = nome
+        self.max_threads = max_threads
+        self._executor = ThreadPoolExecutor(max_workers=max_threads,
+                                            thread_name_prefix=f"uniadvisor-{nome}")
+        self._lock = threading.Lock()
+        self._stats = {"executadas": 0, "em_andamento": 0, "falhas": 0}
+
+    async def executar(self, funcao: Callable, *args) -> Any:
+        """Executa `funcao(*args)` numa thread do executor sem bloquear o laço"""
+        with self._lock:
+            self._stats["em_andamento"] += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, functools.partial(funcao, *args)
+            )
+        except Exception:
+            with self._lock:
+                self._stats["falhas"] += 1
+            raise
+        finally:
+            with self._lock:
+                self._stats["em_andamento"] -= 1
+                self._stats["executadas"] += 1
+
+    def encerrar(self) -> None:
+        """Aguarda as tarefas em andamento e libera as threads"""
+        self._executor.shutdown(wait=True)
+
+    def estatisticas(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["max_threads"] = self.max_threads
+        return stats
+
+
+executor_banco = ExecutorLimitado(
+    "banco", inteiro_env("UNIADVISOR_ASGI_THREADS_BANCO", 4))
+executor_inferencia = ExecutorLimitado(
+    "inferencia", inteiro_env("UNIADVISOR_ASGI_THREADS_INFERENCIA", os.cpu_count() or 1))
+
+
+def _json(corpo: Any, status: int = 200) -> Response:
+    """Resposta JSON com o mesmo corpo que o jsonify do Flask geraria"""
+    return Response(servicos.serializar(corpo), status_code=status,
+                    media_type="application/json")
+
+
+class _StreamingComVaga(StreamingResponse):
+    """
+    StreamingResponse que devolve a vaga de admissão quando o envio termina,
+    inclusive se o cliente desconectar no meio (o corpo não é fechado nesse caso).
+    """
+
+    def __init__(self, resposta: StreamingResponse, devolver: Callable[[], None]):
+        self.__dict__.update(resposta.__dict__)
+        self._devolver = devolver
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self._devolver()
+
+
+def _admitido(rota: str):
+    """Passa a rota pelo controle de admissão (503 + Retry-After se recusada)"""
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        async def rota_admitida(request: Request) -> Response:
+            try:
+                async with controle_admissao.admitir_async(rota) as vaga:
+                    resposta = await funcao(request)
+                    if isinstance(resposta, StreamingResponse):
+                        # O corpo é gerado depois do return: a vaga volta ao fim do envio
+                        return _StreamingComVaga(resposta, vaga.assumir())
+                    return resposta
+            except AdmissaoRecusada as e:
+                corpo, status, cabecalhos = servicos.recusa_admissao(e)
+                return Response(servicos.serializar(corpo), status_code=status,
+                                headers=cabecalhos, media_type="application/json")
+        return rota_admitida
+    return decorador
+
+
+async def _dados_json(request: Request) -> Any:
+    """Corpo JSON da requisição (None se ausente ou inválido)"""
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+
+def _pagina_inicial() -> str:
+    """Renderiza o index.html (estático: uma única vez por processo)"""
+    ambiente = Environment(loader=FileSystemLoader(DIRETORIO / "templates"), autoescape=True)
+    # Mesmas URLs que o url_for('static', filename=...) do Flask
+    ambiente.globals["url_for"] = lambda endpoint, filename: f"/static/{filename}"
+    return ambiente.get_template("index.html").render()
+
+
+async def index(request: Request) -> Response:
+    return HTMLResponse(request.app.state.pagina_inicial)
+
+
+def _pre_calculada(escolher, request: Request) -> Response:
+    """Resposta pré-calculada (ETag/304/gzip) conforme os cabeçalhos da requisição"""
+    status, cabecalhos, corpo = escolher(request.headers.get("if-none-match"),
+                                         request.headers.get("accept-encoding"))
+    return Response(corpo, status_code=status, headers=cabecalhos)
+
+
+@_admitido("curriculo")
+async def get_curriculo(request: Request) -> Response:
+    """Retorna o currículo completo organizado por ano"""
+    return _pre_calculada(servicos.resposta_curriculo, request)
+
+
+@_admitido("regras")
+async def get_regras(request: Request) -> Response:
+    """Retorna lista de regras do sistema"""
+    return _pre_calculada(servicos.resposta_regras, request)
+
+
+@_admitido("aluno")
+async def buscar_aluno(request: Request) -> Response:
+    """Busca dados completos de um aluno pelo ID/matrícula"""
+    corpo, status = await executor_banco.executar(
+        servicos.buscar_aluno, request.path_params["aluno_id"])
+    return _json(corpo, status)
+
+
+async def _pedacos_alunos():
+    """Pedaços do JSON da lista completa; cada página é lida no executor do banco"""
+    pedacos = servicos.pedacos_alunos(servicos.serializar_item)
+    while True:
+        pedaco = await executor_banco.executar(next, pedacos, None)
+        if pedaco is None:
+            return
+        yield pedaco
+
+
+@_admitido("alunos")
+async def listar_alunos(request: Request) -> Response:
+    """Lista os alunos cadastrados (paginação por cursor ou ?stream=1)"""
+    parametros = request.query_params
+    if parametros.get("stream") in ("1", "true"):
+        return StreamingResponse(_pedacos_alunos(), media_type="application/json")
+
+    corpo, status = await executor_banco.executar(
+        servicos.listar_alunos, parametros.get("limite", 100), parametros.get("cursor"))
+    return _json(corpo, status)
+
+
+@_admitido("consultar")
+async def consultar(request: Request) -> Response:
+    """Endpoint principal de consulta - retorna recomendação de matrícula"""
+    dados = await _dados_json(request)
+    if not isinstance(dados, dict):
+        return _json({"erro": "Corpo JSON inválido"}, 400)
+    try:
+        nivel = servicos.nivel_explicacao(request.query_params.get("explicacao"), dados)
+    except ValueError:
+        return _json({"erro": servicos.ERRO_NIVEL_EXPLICACAO}, 400)
+
+    executada = await executor_inferencia.executar(servicos.executar_consulta, dados, nivel)
+    await executor_banco.executar(servicos.persistir_consulta, executada)
+    return _json(servicos.resposta_consulta(executada))
+
+
+async def _linhas_ndjson(linhas: list):
+    for linha in servicos.ndjson(linhas):
+        yield linha
+
+
+@_admitido("consultar_lote")
+async def consultar_lote(request: Request) -> Response:
+    """Consulta de uma turma inteira (uma transação, resposta NDJSON)"""
+    itens = await _dados_json(request)
+    try:
+        nivel = servicos.nivel_explicacao(request.query_params.get("explicacao"), {})
+    except ValueError:
+        return _json({"erro": servicos.ERRO_NIVEL_EXPLICACAO}, 400)
+    erro = servicos.validar_lote(itens)
+    if erro:
+        return _json(*erro)
+
+    itens_lote = await executor_inferencia.executar(servicos.executar_lote, itens, nivel)
+    await executor_banco.executar(servicos.persistir_lote, itens_lote)
+    linhas = servicos.respostas_lote(itens_lote)
+    return StreamingResponse(_linhas_ndjson(linhas), media_type="application/x-ndjson")
+
+
+@_admitido("explicacao")
+async def explicar_consulta(request: Request) -> Response:
+    """Explicação completa de uma consulta registrada"""
+    consulta_id = request.path_params["consulta_id"]
+    registro = await executor_banco.executar(servicos.buscar_registro_consulta, consulta_id)
+    corpo, status = await executor_inferencia.executar(
+        servicos.refazer_explicacao, consulta_id, registro)
+    return _json(corpo, status)
+
+
+@_admitido("matricular")
+async def matricular(request: Request) -> Response:
+    """Confirma matrícula nas disciplinas selecionadas"""
+    dados = await _dados_json(request)
+    if not isinstance(dados, dict):
+        return _json({"erro": "Corpo JSON inválido"}, 400)
+    return _json(await executor_banco.executar(servicos.matricular, dados))
+
+
+async def get_metricas(request: Request) -> Response:
+    """Retorna métricas operacionais (pool, fila do log, caches e executores)"""
+    metricas = servicos.metricas()
+    metricas["executores"] = {
+        executor.nome: executor.estatisticas()
+        for executor in (executor_banco, executor_inferencia)
+    }
+    return _json(metricas)
+
+
+def _preparar() -> None:
+    """Currículo, regras, schema e respostas pré-calculadas antes da primeira requisição"""
+    obter_curriculo()
+    obter_rede()
+    inicializar_banco()
+    servicos.preaquecer_respostas()
+
+
+@asynccontextmanager
+async def _ciclo_de_vida(aplicacao: Starlette):
+    aplicacao.state.pagina_inicial = _pagina_inicial()
+    await executor_banco.executar(_preparar)
+    yield
+    # O servidor já esperou as requisições em andamento; agora drena o resto
+    executor_inferencia.encerrar()
+    executor_banco.encerrar()
+    escritor_log.parar()
+    fechar_conexoes()
+
+
+app = Starlette(
+    routes=[
+        Route("/", index),
+        Route("/api/curriculo", get_curriculo, methods=["GET"]),
+        Route("/api/aluno/{aluno_id}", buscar_aluno, methods=["GET"]),
+        Route("/api/alunos", listar_alunos, methods=["GET"]),
+        Route("/api/consultar", consultar, methods=["POST"]),
+        Route("/api/consultar/lote", consultar_lote, methods=["POST"]),
+        Route("/api/consulta/{consulta_id}/explicacao", explicar_consulta, methods=["GET"]),
+        Route("/api/matricular", matricular, methods=["POST"]),
+        Route("/api/regras", get_regras, methods=["GET"]),
+        Route("/api/metricas", get_metricas, methods=["GET"]),
+        Mount("/static", StaticFiles(directory=DIRETORIO / "static"), name="static"),
+    ],
+    lifespan=_ciclo_de_vida,
+)
+
+
+def executar(host: str = "0.0.0.0", porta: int = 5000, workers: int = None) -> None:
+    """Inicia o uvicorn com esta aplicação (bloqueia até encerrar)"""
+    import uvicorn
+
+    workers = workers or inteiro_env("UNIADVISOR_WORKERS", 1)
+    print(f"🚀 uvicorn (ASGI) em http://{host}:{porta} ({workers} processo(s))")
+    uvicorn.run("interface.asgi:app", host=host, port=porta, workers=workers,
+                timeout_graceful_shutdown=inteiro_env("UNIADVISOR_TIMEOUT_ENCERRAMENTO", 30))
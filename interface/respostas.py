@@ -0,0 +1,123 @@
+"""
+Respostas Pré-calculadas - corpos JSON servidos com ETag
+
+Endpoints de leitura cujo conteúdo só muda quando muda a versão do
+currículo ou das regras (/api/curriculo, /api/regras) são serializados uma
+única vez por versão. Cada RespostaPreCalculada guarda o corpo pronto, uma
+variante gzip opcional e um ETag forte por representação; a requisição só
+compara o ETag (If-None-Match -> 304) e escolhe a variante pelo
+Accept-Encoding.
+"""
+import gzip
+import hashlib
+import os
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from werkzeug.http import parse_accept_header, parse_etags, quote_etag
+
+from database import inteiro_env
+
+# Corpos menores que isso não compensam a variante gzip
+GZIP_MINIMO = 1024
+
+
+class RespostaPreCalculada:
+    """Corpo JSON serializado, com ETag forte e variante gzip opcional"""
+
+    def __init__(self, corpo: bytes, versao: str, comprimir: bool = True):
+        self.versao = versao
+        self.corpo = corpo
+        self.etag = hashlib.blake2b(corpo, digest_size=12).hexdigest()
+        self.corpo_gzip: Optional[bytes] = None
+        if comprimir and len(corpo) >= GZIP_MINIMO:
+            # mtime fixo: a mesma versão gera sempre os mesmos bytes
+            self.corpo_gzip = gzip.compress(corpo, compresslevel=9, mtime=0)
+
+    def escolher(self, if_none_match: Optional[str], accept_encoding: Optional[str],
+                 max_age: int) -> Tuple[int, Dict[str, str], bytes]:
+        """
+        Status, cabeçalhos e corpo para os cabeçalhos da requisição:
+        304 se o cliente já tem esta representação; senão o corpo (gzip se aceito).
+        Independente do framework (usado pelas aplicações Flask e ASGI).
+        """
+        usar_gzip = (self.corpo_gzip is not None
+                     and parse_accept_header(accept_encoding)["gzip"] > 0)
+        # Representações diferentes precisam de ETags fortes diferentes
+        etag = self.etag + "-gz" if usar_gzip else self.etag
+        cabecalhos = {
+            "ETag": quote_etag(etag),
+            "Cache-Control": f"public, max-age={max_age}, must-revalidate",
+            "Vary": "Accept-Encoding",
+        }
+
+        if parse_etags(if_none_match).contains_weak(etag):
+            return 304, cabecalhos, b""
+        cabecalhos["Content-Type"] = "application/json"
+        if usar_gzip:
+            cabecalhos["Content-Encoding"] = "gzip"
+            return 200, cabecalhos, self.corpo_gzip
+        return 200, cabecalhos, self.corpo
+
+
+class CacheRespostas:
+    """
+    Uma RespostaPreCalculada por nome, reconstruída quando a versão muda.
+
+    `max_age` vai no Cache-Control (segundos que o navegador pode reutilizar
+    a resposta sem revalidar). Seguro para uso por várias threads.
+    """
+
+    def __init__(self, max_age: int = 60, comprimir: bool = True):
+        self.max_age = max_age
+        self.comprimir = comprimir
+        self._lock = threading.Lock()
+        self._respostas: Dict[str, RespostaPreCalculada] = {}
+        self._stats = {"reconstrucoes": 0, "respostas": 0, "nao_modificadas": 0, "gzip": 0}
+
+    def obter(self, nome: str, versao: str,
+              construir: Callable[[], bytes]) -> RespostaPreCalculada:
+        """Resposta pré-calculada de `nome` na `versao`, construindo se preciso"""
+        resposta = self._respostas.get(nome)
+        if resposta is not None and resposta.versao == versao:
+            return resposta
+        with self._lock:
+            resposta = self._respostas.get(nome)
+            if resposta is None or resposta.versao != versao:
+                resposta = RespostaPreCalculada(construir(), versao, self.comprimir)
+                self._respostas[nome] = resposta
+                self._stats["reconstrucoes"] += 1
+            return resposta
+
+    def escolher(self, nome: str, versao: str, construir: Callable[[], bytes],
+                 if_none_match: Optional[str], accept_encoding: Optional[str]
+                 ) -> Tuple[int, Dict[str, str], bytes]:
+        """Status, cabeçalhos e corpo da resposta pré-calculada de `nome`"""
+        status, cabecalhos, corpo = self.obter(nome, versao, construir).escolher(
+            if_none_match, accept_encoding, self.max_age
+        )
+        with self._lock:
+            self._stats["respostas"] += 1
+            if status == 304:
+                self._stats["nao_modificadas"] += 1
+            elif "Content-Encoding" in cabecalhos:
+                self._stats["gzip"] += 1
+        return status, cabecalhos, corpo
+
+    def estatisticas(self) -> Dict[str, Any]:
+        """Contadores de respostas, 304, gzip e a versão de cada corpo guardado"""
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["versoes"] = {nome: r.versao for nome, r in self._respostas.items()}
+        stats["max_age"] = self.max_age
+        return stats
+
+
+# Cache compartilhado pelo processo (configurável por variáveis de ambiente)
+respostas_pre_calculadas = CacheRespostas(
+    max_age=inteiro_env("UNIADVISOR_RESPOSTAS_MAX_AGE", 60),
+    comprimir=os.environ.get("UNIADVISOR_RESPOSTAS_GZIP", "1") != "0",
+)
+
+
+__all__ = ['CacheRespostas', 'RespostaPreCalculada', 'respostas_pre_calculadas', 'GZIP_MINIMO']
@@ -0,0 +1,514 @@
+"""
+Serviços da API - regras de cada rota, independentes do framework web
+
+A aplicação Flask (interface/app.py) e a variante assíncrona ASGI
+(interface/asgi.py) chamam as mesmas funções daqui e só cuidam de ler a
+requisição e serializar a resposta. As funções retornam dicionários
+prontos para JSON ou, quando a rota pode falhar, uma tupla
+(corpo, status HTTP).
+
+A consulta é dividida em etapas para que a variante assíncrona possa
+executar cada uma no executor adequado:
+- executar_consulta: inferência (CPU)
+- persistir_consulta: gravação do aluno e do histórico (banco)
+- resposta_consulta: enfileira o log e monta o corpo da resposta
+"""
+import base64
+import json
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from flask.json.provider import DefaultJSONProvider
+
+from facts_base.student_facts import BaseFatos, GerenciadorFatosAluno
+from inference_engine.engine import MotorInferencia, NivelExplicacao, ResultadoInferencia
+from inference_engine.cache import cache_inferencia
+from knowledge_base.curriculo import estatisticas_curriculo, obter_curriculo
+from knowledge_base.rules import registro_regras
+from database import (
+    AlunoRepository, HistoricoRepository, MatriculaRepository, LogRepository,
+    unidade_de_trabalho, ponto_de_restauracao, escritor_log, estatisticas_pool,
+    inteiro_env
+)
+from interface.admissao import AdmissaoRecusada, controle_admissao
+from interface.respostas import respostas_pre_calculadas
+
+Resposta = Tuple[Dict[str, Any], int]
+
+ERRO_NIVEL_EXPLICACAO = 'Nível de explicação inválido (use nenhuma, resumo ou completa)'
+
+# Máximo de alunos por requisição em /api/consultar/lote
+LOTE_MAX = inteiro_env("UNIADVISOR_LOTE_MAX", 500)
+
+
+def criar_motor_inferencia(base_fatos: BaseFatos,
+                           nivel: NivelExplicacao = NivelExplicacao.RESUMO) -> tuple:
+    """Factory para criar o motor de inferência"""
+    gerenciador = GerenciadorFatosAluno(base_fatos)
+    motor = MotorInferencia(base_fatos, gerenciador, cache=cache_inferencia,
+                            nivel_explicacao=nivel)
+    return motor, gerenciador
+
+
+# ===== SERIALIZAÇÃO =====
+
+def serializar_item(corpo: Any) -> str:
+    """JSON de um valor como app.json.dumps do Flask (chaves ordenadas, ASCII)"""
+    return json.dumps(corpo, ensure_ascii=True, sort_keys=True,
+                      default=DefaultJSONProvider.default)
+
+
+def serializar(corpo: Any) -> bytes:
+    """Corpo de resposta idêntico ao do jsonify do Flask fora do modo debug"""
+    return (json.dumps(corpo, ensure_ascii=True, sort_keys=True, separators=(",", ":"),
+                       default=DefaultJSONProvider.default) + "\n").encode("utf-8")
+
+
+# ===== CURRÍCULO E REGRAS =====
+
+def dados_curriculo() -> Dict[str, Any]:
+    """Currículo completo, agrupado por ano, com totais"""
+    curriculo = obter_curriculo().disciplinas
+
+    por_ano = {}
+    for d in curriculo:
+        ano = d['ano']
+        if ano not in por_ano:
+            por_ano[ano] = []
+        por_ano[ano].append(d)
+
+    return {
+        'curriculo': curriculo,
+        'por_ano': por_ano,
+        'total_disciplinas': len(curriculo),
+        'total_carga_horaria': sum(d.get('carga_horaria', 60) for d in curriculo)
+    }
+
+
+def dados_regras() -> Dict[str, Any]:
+    """Resumo das regras do sistema"""
+    motor, _ = criar_motor_inferencia(BaseFatos())
+    return {'regras': motor.get_resumo_regras()}
+
+
+def corpo_curriculo() -> bytes:
+    """Serializa o currículo organizado por ano (uma vez por versão)"""
+    return serializar(dados_curriculo())
+
+
+def corpo_regras() -> bytes:
+    """Serializa o resumo das regras (uma vez por versão)"""
+    return serializar(dados_regras())
+
+
+def resposta_curriculo(if_none_match: Optional[str], accept_encoding: Optional[str]
+                       ) -> Tuple[int, Dict[str, str], bytes]:
+    """Resposta pré-calculada de /api/curriculo (status, cabeçalhos, corpo)"""
+    return respostas_pre_calculadas.escolher(
+        'curriculo', obter_curriculo().versao, corpo_curriculo, if_none_match, accept_encoding
+    )
+
+
+def resposta_regras(if_none_match: Optional[str], accept_encoding: Optional[str]
+                    ) -> Tuple[int, Dict[str, str], bytes]:
+    """Resposta pré-calculada de /api/regras (status, cabeçalhos, corpo)"""
+    return respostas_pre_calculadas.escolher(
+        'regras', registro_regras.versao, corpo_regras, if_none_match, accept_encoding
+    )
+
+
+def preaquecer_respostas() -> None:
+    """Serializa de antemão as respostas pré-calculadas (antes do fork dos workers)"""
+    respostas_pre_calculadas.obter('curriculo', obter_curriculo().versao, corpo_curriculo)
+    respostas_pre_calculadas.obter('regras', registro_regras.versao, corpo_regras)
+
+
+# ===== ALUNOS =====
+
+def buscar_aluno(aluno_id: str) -> Resposta:
+    """Dados completos de um aluno pelo ID/matrícula"""
+    # Buscar aluno e histórico em uma única consulta
+    snapshot = AlunoRepository.buscar_snapshot(aluno_id)
+    if not snapshot:
+        return {'erro': 'Aluno não encontrado'}, 404
+
+    return {
+        'aluno': snapshot.aluno,
+        'historico': snapshot.historico,
+        'sucesso': True
+    }, 200
+
+
+def codificar_cursor(cursor: tuple) -> str:
+    """Transforma o cursor (nome, id) em um token opaco para a URL"""
+    return base64.urlsafe_b64encode(json.dumps(list(cursor)).encode('utf-8')).decode('ascii')
+
+
+def decodificar_cursor(token: str) -> tuple:
+    """Inverso de codificar_cursor (ValueError se o token for inválido)"""
+    try:
+        nome, aluno_id = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+    except Exception:
+        raise ValueError('cursor inválido')
+    return nome, aluno_id
+
+
+def listar_alunos(limite: Any = 100, token: Optional[str] = None) -> Resposta:
+    """Uma página de alunos (ordem nome, id) e o cursor da próxima"""
+    try:
+        limite = int(limite)
+        apos = decodificar_cursor(token) if token else None
+    except ValueError as e:
+        return {'erro': f'Parâmetros de paginação inválidos: {e}'}, 400
+
+    alunos, proximo = AlunoRepository.listar_pagina(limite, apos)
+    return {
+        'alunos': alunos,
+        'total': len(alunos),
+        'proximo_cursor': codificar_cursor(proximo) if proximo else None
+    }, 200
+
+
+def pedacos_alunos(dumps: Callable[[Any], str], tamanho_lote: int = 500) -> Iterator[str]:
+    """
+    Gera o JSON da lista completa de alunos em pedaços (memória constante),
+    um pedaço por página do banco. Cada pedaço busca a sua página sem
+    segurar a conexão, então o gerador pode ser avançado por threads
+    diferentes.
+    """
+    yield '{"alunos": ['
+    total = 0
+    apos = None
+    while True:
+        alunos, apos = AlunoRepository.listar_pagina(tamanho_lote, apos)
+        if alunos:
+            yield (', ' if total else '') + ', '.join(dumps(a) for a in alunos)
+            total += len(alunos)
+        if apos is None:
+            break
+    yield f'], "total": {total}}}'
+
+
+def matricular(dados: dict) -> Dict[str, Any]:
+    """Confirma matrícula nas disciplinas selecionadas"""
+    disciplinas = dados.get('disciplinas', [])
+    aluno_id = dados.get('aluno_id', 'aluno_temp')
+
+    count = MatriculaRepository.registrar_multiplas(aluno_id, disciplinas)
+
+    return {
+        'sucesso': True,
+        'mensagem': f'Matrícula confirmada em {count} disciplina(s)',
+        'disciplinas': disciplinas
+    }
+
+
+# ===== CONSULTA =====
+
+def preparar_consulta(dados: dict, motor: MotorInferencia,
+                      gerenciador: GerenciadorFatosAluno) -> dict:
+    """
+    Carrega na base de fatos o aluno e o histórico enviados na consulta.
+    Retorna aluno_id, ano_atual, tipo e o histórico a persistir.
+    """
+    tipo_aluno = dados.get('tipo', 'veterano')
+    eh_novo = tipo_aluno == 'novo'
+    ano_atual = dados.get('ano_atual', 1)
+
+    if eh_novo:
+        ano_atual = 1
+
+    aluno_id = dados.get('aluno_id', dados.get('matricula', 'aluno_temp'))
+
+    gerenciador.inicializar_aluno(
+        aluno_id=aluno_id,
+        nome=dados.get('nome', 'Aluno'),
+        ano=ano_atual,
+        novo=eh_novo
+    )
+
+    historico = []
+    if not eh_novo:
+        ano_cursado = datetime.now().year
+
+        for aprovacao in dados.get('aprovadas', []):
+            disc_id = aprovacao.get('id') or aprovacao.get('disciplina_id')
+            if disc_id:
+                nota = aprovacao.get('nota', 7.0)
+                gerenciador.registrar_aprovacao(disc_id, nota)
+                historico.append({'id': disc_id, 'status': 'aprovado',
+                                  'nota': nota, 'ano_cursado': ano_cursado})
+
+        for reprovacao in dados.get('reprovadas', []):
+            disc_id = reprovacao.get('id') or reprovacao.get('disciplina_id')
+            if disc_id:
+                nota = reprovacao.get('nota', 4.0)
+                gerenciador.registrar_reprovacao(disc_id, nota)
+                historico.append({'id': disc_id, 'status': 'reprovado',
+                                  'nota': nota, 'ano_cursado': ano_cursado})
+
+    return {'aluno_id': aluno_id, 'ano_atual': ano_atual,
+            'tipo': tipo_aluno, 'historico': historico}
+
+
+def nivel_explicacao(parametro: Optional[str], dados: dict) -> NivelExplicacao:
+    """Nível pedido em ?explicacao= ou no campo "explicacao" (padrão: resumo)"""
+    valor = parametro or dados.get('explicacao') or 'resumo'
+    return NivelExplicacao(valor)
+
+
+@dataclass
+class ConsultaExecutada:
+    """Estado de uma consulta entre a inferência e a resposta"""
+    dados: dict
+    consulta: dict
+    motor: MotorInferencia
+    gerenciador: GerenciadorFatosAluno
+    resultado: ResultadoInferencia
+    explicacao: Dict[str, Any]
+
+
+def executar_consulta(dados: dict, nivel: NivelExplicacao) -> ConsultaExecutada:
+    """Carrega os fatos enviados e executa a inferência (sem tocar no banco)"""
+    base_fatos = BaseFatos()
+    motor, gerenciador = criar_motor_inferencia(base_fatos, nivel)
+    consulta = preparar_consulta(dados, motor, gerenciador)
+    resultado = motor.inferir()
+    return ConsultaExecutada(dados, consulta, motor, gerenciador,
+                             resultado, motor.get_explicacao_completa())
+
+
+def _gravar_consulta(executada: ConsultaExecutada) -> None:
+    """Grava aluno e histórico (na transação corrente)"""
+    consulta = executada.consulta
+    # 1. Criar/Atualizar aluno no banco
+    AlunoRepository.criar_ou_atualizar(
+        aluno_id=consulta['aluno_id'],
+        nome=executada.dados.get('nome', 'Aluno'),
+        ano=consulta['ano_atual'],
+        tipo=consulta['tipo']
+    )
+
+    # 2. Salvar histórico (aprovações e reprovações em um executemany)
+    HistoricoRepository.registrar_multiplas(consulta['aluno_id'], consulta['historico'])
+
+
+def persistir_consulta(executada: ConsultaExecutada) -> None:
+    """Grava aluno e histórico da consulta em uma única transação"""
+    with unidade_de_trabalho():
+        _gravar_consulta(executada)
+
+
+def resposta_consulta(executada: ConsultaExecutada) -> Dict[str, Any]:
+    """Enfileira o log da consulta e monta o corpo da resposta"""
+    resultado = executada.resultado
+    explicacao_completa = executada.explicacao
+
+    # 3. Registrar log da inferência (gravado em lote por uma thread de fundo)
+    # (com a entrada original, para refazer a explicação completa sob demanda)
+    consulta_id = uuid.uuid4().hex
+    escritor_log.registrar(
+        aluno_id=executada.consulta['aluno_id'],
+        regras=explicacao_completa['regras_disparadas'],
+        resultado={'status': resultado.status.value, 'mensagem': resultado.mensagem},
+        consulta_id=consulta_id,
+        entrada={
+            'dados': executada.dados,
+            'versao_curriculo': executada.gerenciador.compilado.versao,
+            'versao_regras': executada.motor.rede.versao
+        }
+    )
+
+    return {
+        'consulta_id': consulta_id,
+        'status': resultado.status.value,
+        'mensagem': resultado.mensagem,
+        'novo_ano': resultado.novo_ano,
+        'disciplinas_matriculadas': resultado.disciplinas_matriculadas,
+        'disciplinas_elegiveis': resultado.disciplinas_elegiveis,
+        'disciplinas_bloqueadas': resultado.disciplinas_bloqueadas,
+        'disciplinas_sugeridas': resultado.disciplinas_sugeridas,
+        'disciplinas_aprovadas': resultado.disciplinas_aprovadas,
+        'explicacao': resultado.explicacao,
+        'estatisticas': resultado.estatisticas,
+        'aluno_salvo': True,  # Indicador de que foi salvo
+        'debug': {
+            'regras_disparadas': explicacao_completa['regras_disparadas'],
+            'total_regras': explicacao_completa['total_regras_sistema']
+        }
+    }
+
+
+def consultar(dados: dict, nivel: NivelExplicacao) -> Dict[str, Any]:
+    """Consulta completa: inferência, persistência e resposta"""
+    executada = executar_consulta(dados, nivel)
+    persistir_consulta(executada)
+    return resposta_consulta(executada)
+
+
+# ===== CONSULTA EM LOTE =====
+
+@dataclass
+class ItemLote:
+    """Um aluno do lote: a consulta executada ou o motivo da falha"""
+    indice: int
+    executada: Optional[ConsultaExecutada] = None
+    erro: Optional[str] = None
+
+
+def validar_lote(itens: Any) -> Optional[Resposta]:
+    """Erro (corpo, status) se o lote não puder ser processado; None se válido"""
+    if not isinstance(itens, list):
+        return {'erro': 'O corpo deve ser uma lista de alunos'}, 400
+    if len(itens) > LOTE_MAX:
+        return {'erro': f'Lote com {len(itens)} alunos excede o máximo de {LOTE_MAX}'}, 413
+    return None
+
+
+def executar_lote(itens: List[Any], nivel: NivelExplicacao) -> List[ItemLote]:
+    """
+    Inferência de todos os alunos do lote com um único motor (currículo,
+    regras e rede carregados uma vez). Um item inválido ou que falhe vira
+    um ItemLote com erro, sem afetar os demais.
+    """
+    motor, gerenciador = criar_motor_inferencia(BaseFatos(), nivel)
+    itens_lote = []
+    for indice, dados in enumerate(itens):
+        if not isinstance(dados, dict):
+            itens_lote.append(ItemLote(indice, erro='Cada aluno deve ser um objeto JSON'))
+            continue
+        motor.novo_aluno()
+        try:
+            consulta = preparar_consulta(dados, motor, gerenciador)
+            resultado = motor.inferir()
+        except Exception as e:
+            itens_lote.append(ItemLote(indice, erro=f'Falha na inferência: {e}'))
+            continue
+        executada = ConsultaExecutada(dados, consulta, motor, gerenciador,
+                                      resultado, motor.get_explicacao_completa())
+        itens_lote.append(ItemLote(indice, executada=executada))
+    return itens_lote
+
+
+def persistir_lote(itens_lote: List[ItemLote]) -> None:
+    """
+    Grava todos os alunos do lote em uma única transação. Cada aluno fica
+    em um SAVEPOINT: se a gravação dele falhar, só ela é desfeita e o item
+    passa a ter erro.
+    """
+    with unidade_de_trabalho():
+        for item in itens_lote:
+            if item.executada is None:
+                continue
+            try:
+                with ponto_de_restauracao():
+                    _gravar_consulta(item.executada)
+            except Exception as e:
+                item.executada = None
+                item.erro = f'Falha ao gravar: {e}'
+
+
+def respostas_lote(itens_lote: List[ItemLote]) -> List[Dict[str, Any]]:
+    """
+    Uma linha por aluno (resultado igual ao de /api/consultar, ou o erro)
+    e uma linha final de resumo. Enfileira o log de cada consulta gravada.
+    """
+    linhas = []
+    for item in itens_lote:
+        if item.executada is not None:
+            linhas.append({'indice': item.indice, 'sucesso': True,
+                           'resultado': resposta_consulta(item.executada)})
+        else:
+            linhas.append({'indice': item.indice, 'sucesso': False, 'erro': item.erro})
+    sucesso = sum(1 for item in itens_lote if item.executada is not None)
+    linhas.append({'resumo': {'total': len(itens_lote), 'sucesso': sucesso,
+                              'erros': len(itens_lote) - sucesso}})
+    return linhas
+
+
+def consultar_lote(itens: List[Any], nivel: NivelExplicacao) -> List[Dict[str, Any]]:
+    """Lote completo: inferência, persistência (uma transação) e linhas da resposta"""
+    itens_lote = executar_lote(itens, nivel)
+    persistir_lote(itens_lote)
+    return respostas_lote(itens_lote)
+
+
+def ndjson(linhas: List[Dict[str, Any]]) -> Iterator[bytes]:
+    """Serializa as linhas sob demanda, uma por linha (NDJSON)"""
+    for linha in linhas:
+        yield serializar(linha)
+
+
+def buscar_registro_consulta(consulta_id: str) -> Optional[Dict]:
+    """Registro da consulta no log (None se não existir ou não tiver a entrada)"""
+    registro = LogRepository.buscar_consulta(consulta_id)
+    if registro is None and escritor_log.pendente(consulta_id):
+        # Consulta deste processo ainda na fila do log assíncrono: espera a
+        # gravação dela (com prazo). Ids desconhecidos vão direto para o 404.
+        escritor_log.flush(timeout=1.0)
+        registro = LogRepository.buscar_consulta(consulta_id)
+    if registro is None or not registro['entrada']:
+        return None
+    return registro
+
+
+def refazer_explicacao(consulta_id: str, registro: Optional[Dict]) -> Resposta:
+    """
+    Refaz a inferência de uma consulta registrada com a explicação completa
+    (contexto de cada regra, histórico de inferência e fatos finais).
+    """
+    if registro is None:
+        return {'erro': 'Consulta não encontrada'}, 404
+
+    entrada = registro['entrada']
+    base_fatos = BaseFatos()
+    motor, gerenciador = criar_motor_inferencia(base_fatos, NivelExplicacao.COMPLETA)
+    preparar_consulta(entrada['dados'], motor, gerenciador)
+    resultado = motor.inferir()
+    explicacao = motor.get_explicacao_completa()
+
+    versoes = {'curriculo': gerenciador.compilado.versao, 'regras': motor.rede.versao}
+    return {
+        'consulta_id': consulta_id,
+        'aluno_id': registro['aluno_id'],
+        'data_consulta': registro['data_consulta'],
+        'status': resultado.status.value,
+        'explicacao': explicacao['explicacoes'],
+        'regras_disparadas': explicacao['regras_disparadas'],
+        'fatos_finais': explicacao['fatos_finais'],
+        'historico_inferencia': base_fatos.get_explicacao(),
+        'versoes': versoes,
+        # False se currículo ou regras mudaram desde a consulta original
+        'mesmas_versoes': versoes == {'curriculo': entrada.get('versao_curriculo'),
+                                      'regras': entrada.get('versao_regras')}
+    }, 200
+
+
+def explicar_consulta(consulta_id: str) -> Resposta:
+    """Explicação completa de uma consulta registrada"""
+    return refazer_explicacao(consulta_id, buscar_registro_consulta(consulta_id))
+
+
+def metricas() -> Dict[str, Any]:
+    """Métricas operacionais (pool, fila do log e caches)"""
+    return {
+        'pool_conexoes': estatisticas_pool(),
+        'log_inferencias': escritor_log.estatisticas(),
+        'curriculo': estatisticas_curriculo(),
+        'regras': registro_regras.estatisticas(),
+        'cache_inferencia': cache_inferencia.estatisticas(),
+        'respostas_pre_calculadas': respostas_pre_calculadas.estatisticas(),
+        'admissao': controle_admissao.estatisticas()
+    }
+
+
+def recusa_admissao(erro: AdmissaoRecusada) -> Tuple[Dict[str, Any], int, Dict[str, str]]:
+    """Corpo, status (503) e cabeçalhos de uma requisição recusada pelo controle de admissão"""
+    return {
+        'erro': 'Servidor ocupado, tente novamente em instantes',
+        'rota': erro.rota,
+        'motivo': erro.motivo,
+        'retry_after': erro.retry_after
+    }, 503, {'Retry-After': str(erro.retry_after)}
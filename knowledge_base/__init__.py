@@ -1,3 +1,11 @@
-from .rules import Regra, TipoRegra, criar_regras, get_regras_por_tipo, get_todas_regras
+from .rules import (
+    Regra, TipoRegra, criar_regras, get_regras_por_tipo, get_todas_regras,
+    RegistroRegras, registro_regras, get_versao_regras, reconstruir_regras
+)
+from .curriculo import CurriculoCompilado, obter_curriculo, estatisticas_curriculo
 
-__all__ = ['Regra', 'TipoRegra', 'criar_regras', 'get_regras_por_tipo', 'get_todas_regras']
+__all__ = [
+    'Regra', 'TipoRegra', 'criar_regras', 'get_regras_por_tipo', 'get_todas_regras',
+    'RegistroRegras', 'registro_regras', 'get_versao_regras', 'reconstruir_regras',
+    'CurriculoCompilado', 'obter_curriculo', 'estatisticas_curriculo'
+]
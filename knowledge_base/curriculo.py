@@ -0,0 +1,213 @@
+"""
+Currículo Compilado - cache imutável do curriculum.json por processo
+
+O arquivo é lido e indexado uma única vez e o resultado é compartilhado por
+todas as instâncias de GerenciadorFatosAluno. A cada acesso apenas o mtime e
+o tamanho do arquivo são conferidos (os.stat); o JSON só é relido quando eles
+mudam, e só é recompilado se o hash do conteúdo também mudou.
+"""
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, Iterable, List, Mapping, Optional, Tuple
+
+
+CAMINHO_CURRICULO = Path(__file__).parent / "curriculum.json"
+
+
+class DisciplinaCongelada(dict):
+    """
+    Dicionário somente leitura (continua serializável como JSON).
+    Qualquer tentativa de alteração levanta TypeError.
+    """
+
+    def _somente_leitura(self, *args, **kwargs):
+        raise TypeError("Disciplinas do currículo compilado são imutáveis")
+
+    __setitem__ = __delitem__ = _somente_leitura
+    clear = pop = popitem = setdefault = update = _somente_leitura
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return dict(self)
+
+
+def _congelar(valor: Any) -> Any:
+    """Converte listas em tuplas e dicts em DisciplinaCongelada, recursivamente"""
+    if isinstance(valor, dict):
+        return DisciplinaCongelada({k: _congelar(v) for k, v in valor.items()})
+    if isinstance(valor, list):
+        return tuple(_congelar(v) for v in valor)
+    return valor
+
+
+@dataclass(frozen=True)
+class CurriculoCompilado:
+    """Currículo indexado e imutável"""
+    disciplinas: Tuple[Dict, ...]
+    por_id: Mapping[str, Dict]
+    por_ano: Mapping[int, Tuple[Dict, ...]]
+    versao: str
+    carga_horaria_total: int
+    # id -> nome da disciplina
+    nomes: Mapping[str, str]
+    # id -> conjunto de pré-requisitos
+    pre_requisitos: Mapping[str, FrozenSet[str]]
+    # id -> disciplinas que o têm como pré-requisito (índice reverso, na ordem do currículo)
+    dependentes: Mapping[str, Tuple[str, ...]]
+    # Representação em bits: cada disciplina tem uma posição fixa (ordenada por
+    # ano e depois pela ordem do currículo); pré-requisitos que não constam do
+    # currículo recebem posições no final.
+    posicao: Mapping[str, int]
+    mascara_pre_requisitos: Mapping[str, int]
+    mascara_ano: Mapping[int, int]
+
+    @classmethod
+    def compilar(cls, dados: list, versao: str) -> "CurriculoCompilado":
+        """Monta os índices a partir da lista de disciplinas do JSON"""
+        disciplinas = tuple(_congelar(d) for d in dados)
+
+        por_ano: Dict[int, list] = {}
+        dependentes: Dict[str, list] = {}
+        for d in disciplinas:
+            por_ano.setdefault(d["ano"], []).append(d)
+            for pr in dict.fromkeys(d.get("pre_requisitos", ())):
+                dependentes.setdefault(pr, []).append(d["id"])
+
+        posicao: Dict[str, int] = {}
+        for d in sorted(disciplinas, key=lambda d: d["ano"]):
+            posicao.setdefault(d["id"], len(posicao))
+        for pr in dependentes:
+            posicao.setdefault(pr, len(posicao))
+
+        def mascara(ids) -> int:
+            m = 0
+            for d_id in ids:
+                m |= 1 << posicao[d_id]
+            return m
+
+        return cls(
+            disciplinas=disciplinas,
+            por_id=MappingProxyType({d["id"]: d for d in disciplinas}),
+            por_ano=MappingProxyType({ano: tuple(ds) for ano, ds in por_ano.items()}),
+            versao=versao,
+            carga_horaria_total=sum(d.get("carga_horaria", 0) for d in disciplinas),
+            nomes=MappingProxyType({d["id"]: d["nome"] for d in disciplinas}),
+            pre_requisitos=MappingProxyType({
+                d["id"]: frozenset(d.get("pre_requisitos", ())) for d in disciplinas
+            }),
+            dependentes=MappingProxyType({pr: tuple(ids) for pr, ids in dependentes.items()}),
+            posicao=MappingProxyType(posicao),
+            mascara_pre_requisitos=MappingProxyType({
+                d["id"]: mascara(d.get("pre_requisitos", ())) for d in disciplinas
+            }),
+            mascara_ano=MappingProxyType({
+                ano: mascara(d["id"] for d in ds) for ano, ds in por_ano.items()
+            }),
+        )
+
+    def bit(self, disciplina_id: str) -> int:
+        """Máscara com apenas o bit da disciplina (0 se ela não tem posição)"""
+        p = self.posicao.get(disciplina_id)
+        return 0 if p is None else 1 << p
+
+    def mascara(self, ids: Iterable[str]) -> int:
+        """Converte uma lista de ids em máscara (ids sem posição são ignorados)"""
+        posicao = self.posicao
+        m = 0
+        for d_id in ids:
+            p = posicao.get(d_id)
+            if p is not None:
+                m |= 1 << p
+        return m
+
+    def ids_da_mascara(self, mascara: int) -> List[str]:
+        """Converte uma máscara de volta em ids (ordem: ano, depois currículo)"""
+        return [d_id for d_id, p in self.posicao.items() if mascara >> p & 1]
+
+    def desbloqueadas_por(self, disciplina_id: str, aprovadas: int) -> List[str]:
+        """
+        Disciplinas ainda não aprovadas que ficam liberadas ao aprovar
+        `disciplina_id` (é o único pré-requisito que falta), na ordem do currículo.
+        `aprovadas` é a máscara de bits das disciplinas aprovadas.
+        """
+        resolvidas = aprovadas | self.bit(disciplina_id)
+        posicao = self.posicao
+        mascara_pr = self.mascara_pre_requisitos
+        return [
+            d_id for d_id in self.dependentes.get(disciplina_id, ())
+            if not aprovadas >> posicao[d_id] & 1
+            and not mascara_pr[d_id] & ~resolvidas
+        ]
+
+
+class CacheCurriculo:
+    """Mantém o CurriculoCompilado do processo e o recarrega quando o arquivo muda"""
+
+    def __init__(self, caminho: Path = CAMINHO_CURRICULO):
+        self.caminho = Path(caminho)
+        self._lock = threading.Lock()
+        self._compilado: Optional[CurriculoCompilado] = None
+        self._assinatura: Optional[Tuple[int, int]] = None
+        self._stats = {"acertos": 0, "recargas": 0, "leituras_sem_mudanca": 0}
+
+    def obter(self) -> CurriculoCompilado:
+        """Retorna o currículo compilado, recarregando-o se o arquivo mudou"""
+        info = os.stat(self.caminho)
+        assinatura = (info.st_mtime_ns, info.st_size)
+
+        compilado = self._compilado
+        if compilado is not None and assinatura == self._assinatura:
+            self._stats["acertos"] += 1
+            return compilado
+
+        with self._lock:
+            if self._compilado is not None and assinatura == self._assinatura:
+                self._stats["acertos"] += 1
+                return self._compilado
+
+            conteudo = self.caminho.read_bytes()
+            versao = hashlib.sha256(conteudo).hexdigest()[:16]
+
+            if self._compilado is not None and versao == self._compilado.versao:
+                # Arquivo "tocado" sem mudança de conteúdo: só atualiza a assinatura
+                self._stats["leituras_sem_mudanca"] += 1
+            else:
+                self._compilado = CurriculoCompilado.compilar(
+                    json.loads(conteudo.decode("utf-8")), versao
+                )
+                self._stats["recargas"] += 1
+
+            self._assinatura = assinatura
+            return self._compilado
+
+    def estatisticas(self) -> Dict[str, Any]:
+        """Retorna contadores de acerto/recarga e a versão atual"""
+        stats = dict(self._stats)
+        stats["versao"] = self._compilado.versao if self._compilado else None
+        return stats
+
+
+_cache = CacheCurriculo()
+
+
+def obter_curriculo() -> CurriculoCompilado:
+    """Retorna o currículo compilado compartilhado pelo processo"""
+    return _cache.obter()
+
+
+def estatisticas_curriculo() -> Dict[str, Any]:
+    """Retorna as estatísticas do cache do currículo"""
+    return _cache.estatisticas()
+
+
+__all__ = [
+    'CurriculoCompilado', 'CacheCurriculo', 'DisciplinaCongelada',
+    'obter_curriculo', 'estatisticas_curriculo'
+]
@@ -9,9 +9,13 @@ CORREÇÕES REALIZADAS:
 2. Nomes de fatos padronizados
 3. Regras de elegibilidade funcionando para TODAS as disciplinas
 """
-from typing import Dict, List, Callable, Any
+from typing import Dict, List, Callable, Any, Optional, Sequence, Tuple
 from dataclasses import dataclass
+import operator
 from enum import Enum
+from types import CodeType
+import hashlib
+import threading
 
 
 class TipoRegra(Enum):
@@ -23,16 +27,82 @@ class TipoRegra(Enum):
     REPROVACAO_ANO = "reprovacao_ano"
 
 
+_OPERADORES: Dict[str, Callable[[Any, Any], bool]] = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "in": lambda a, b: a in b,
+    "nao": lambda a, _: not a,
+}
+
+
+@dataclass(frozen=True)
+class Condicao:
+    """
+    Teste atômico sobre um único fato, na forma declarativa usada pela
+    rede de discriminação (inference_engine/rete.py).
+
+    Compara `fato` (ou `padrao`, se ausente) com `valor` ou, quando `ref`
+    é informado, com o valor de outro fato (ou `ref_padrao`).
+    """
+    fato: str
+    operador: str
+    valor: Any = None
+    padrao: Any = None
+    ref: Optional[str] = None
+    ref_padrao: Any = None
+
+    def testar(self, fatos: Dict) -> bool:
+        """Avalia o teste; erros de comparação contam como não satisfeito"""
+        direita = fatos.get(self.ref, self.ref_padrao) if self.ref else self.valor
+        try:
+            return bool(_OPERADORES[self.operador](fatos.get(self.fato, self.padrao), direita))
+        except TypeError:
+            return False
+
+    @property
+    def fatos_testados(self) -> Tuple[str, ...]:
+        return (self.fato, self.ref) if self.ref else (self.fato,)
+
+
+def _conjuncao(condicoes: Tuple[Condicao, ...]) -> Callable[[Dict], bool]:
+    """Condição equivalente à conjunção das condições declarativas"""
+    def condicao(fatos: Dict) -> bool:
+        return all(c.testar(fatos) for c in condicoes)
+    return condicao
+
+
 @dataclass
 class Regra:
-    """Representa uma regra SE-ENTÃO do sistema"""
+    """
+    Representa uma regra SE-ENTÃO do sistema.
+
+    A condição é declarada em `condicoes` (conjunção), a mesma forma que a
+    rede de discriminação lê; `condicao` é gerada a partir delas. Só uma
+    regra opaca (sem `condicoes`) informa `condicao` diretamente.
+    """
     id: str
     nome: str
     tipo: TipoRegra
     descricao: str
-    condicao: Callable[[Dict], bool]
-    acao: Callable[[Dict], Any]
+    condicao: Optional[Callable[[Dict], bool]] = None
+    # Obrigatória; o padrão só existe porque `condicao` (antes dela) é opcional
+    acao: Optional[Callable[[Dict], Any]] = None
     prioridade: int = 0
+    condicoes: Tuple[Condicao, ...] = ()
+
+    def __post_init__(self):
+        if self.acao is None:
+            raise ValueError(f"Regra {self.id}: sem acao")
+        if self.condicoes:
+            if self.condicao is not None:
+                raise ValueError(f"Regra {self.id}: informe condicoes ou condicao, não as duas")
+            self.condicao = _conjuncao(self.condicoes)
+        elif self.condicao is None:
+            raise ValueError(f"Regra {self.id}: sem condicoes nem condicao")
     
     def avaliar(self, fatos: Dict) -> bool:
         """Avalia se a condição da regra é satisfeita"""
@@ -85,16 +155,16 @@ def criar_regras() -> List[Regra]:
         nome="Matrícula Primeiro Ano",
         tipo=TipoRegra.MATRICULA_AUTOMATICA,
         descricao="Aluno novo no 1º ano → matrícula automática em todas as disciplinas do ano 1",
-        condicao=lambda f: (
-            f.get("aluno_ano") == 1 and 
-            f.get("aluno_novo", False) == True
-        ),
         acao=lambda f: {
             "acao": "matricular_todas",
             "ano": 1,
             "mensagem": "✅ Aluno novo matriculado automaticamente em todas as disciplinas do 1º ano"
         },
-        prioridade=100
+        prioridade=100,
+        condicoes=(
+            Condicao("aluno_ano", "==", 1),
+            Condicao("aluno_novo", "==", True, padrao=False),
+        )
     ))
     
     # ═══════════════════════════════════════════════════════════════
@@ -105,17 +175,17 @@ def criar_regras() -> List[Regra]:
         nome="Progressão de Ano - Aprovação Total",
         tipo=TipoRegra.MATRICULA_AUTOMATICA,
         descricao="Aluno aprovou em todas → avança de ano com matrícula automática",
-        condicao=lambda f: (
-            f.get("passou_todas_ano_atual", False) == True and
-            f.get("aluno_ano", 1) < 3 and
-            not f.get("aluno_novo", False)
-        ),
         acao=lambda f: {
             "acao": "avancar_ano_completo",
             "novo_ano": f.get("aluno_ano", 1) + 1,
             "mensagem": f"🎉 Parabéns! Aprovado em todas. Avançando para o {f.get('aluno_ano', 1) + 1}º ano com matrícula automática"
         },
-        prioridade=90
+        prioridade=90,
+        condicoes=(
+            Condicao("passou_todas_ano_atual", "==", True, padrao=False),
+            Condicao("aluno_ano", "<", 3, padrao=1),
+            Condicao("aluno_novo", "nao", padrao=False),
+        )
     ))
     
     # ═══════════════════════════════════════════════════════════════
@@ -126,20 +196,20 @@ def criar_regras() -> List[Regra]:
         nome="Progressão com Dependência",
         tipo=TipoRegra.MATRICULA_AUTOMATICA,
         descricao="Aluno com até 3 dependências → avança mantendo dependências",
-        condicao=lambda f: (
-            f.get("tem_dependencia", False) == True and
-            f.get("reprovacoes_ano", 0) <= 3 and
-            f.get("aluno_ano", 1) < 3 and
-            not f.get("aluno_novo", False) and
-            not f.get("passou_todas_ano_atual", False)
-        ),
         acao=lambda f: {
             "acao": "avancar_com_dependencia",
             "novo_ano": f.get("aluno_ano", 1) + 1,
             "dependencias": f.get("lista_dependencias", []),
             "mensagem": f"📚 Aluno avança para o {f.get('aluno_ano', 1) + 1}º ano, mas deve cursar {len(f.get('lista_dependencias', []))} dependência(s)"
         },
-        prioridade=80
+        prioridade=80,
+        condicoes=(
+            Condicao("tem_dependencia", "==", True, padrao=False),
+            Condicao("reprovacoes_ano", "<=", 3, padrao=0),
+            Condicao("aluno_ano", "<", 3, padrao=1),
+            Condicao("aluno_novo", "nao", padrao=False),
+            Condicao("passou_todas_ano_atual", "nao", padrao=False),
+        )
     ))
     
     # ═══════════════════════════════════════════════════════════════
@@ -150,17 +220,17 @@ def criar_regras() -> List[Regra]:
         nome="Bloqueio por Pré-requisito",
         tipo=TipoRegra.BLOQUEIO,
         descricao="Disciplina com pré-requisito não aprovado → BLOQUEADA",
-        condicao=lambda f: (
-            f.get("tem_pre_requisito", False) == True and
-            f.get("pre_requisitos_cumpridos", True) == False
-        ),
         acao=lambda f: {
             "acao": "bloquear_disciplina",
             "disciplina_id": f.get("id"),
             "prerequisito": f.get("pre_requisitos_faltantes", []),
             "mensagem": f"🚫 Bloqueada: falta aprovar {', '.join(f.get('pre_requisitos_faltantes', ['pré-requisito']))}"
         },
-        prioridade=100
+        prioridade=100,
+        condicoes=(
+            Condicao("tem_pre_requisito", "==", True, padrao=False),
+            Condicao("pre_requisitos_cumpridos", "==", False, padrao=True),
+        )
     ))
     
     # ═══════════════════════════════════════════════════════════════
@@ -171,14 +241,16 @@ def criar_regras() -> List[Regra]:
         nome="Reprovação de Ano",
         tipo=TipoRegra.REPROVACAO_ANO,
         descricao="Mais de 3 reprovações no ano → repete o ano",
-        condicao=lambda f: f.get("reprovacoes_ano", 0) > 3,
         acao=lambda f: {
             "acao": "repetir_ano",
             "ano": f.get("aluno_ano"),
             "total_reprovacoes": f.get("reprovacoes_ano"),
             "mensagem": f"⚠️ Aluno reprovado de ano! {f.get('reprovacoes_ano')} reprovações (máximo permitido: 3)"
         },
-        prioridade=100
+        prioridade=100,
+        condicoes=(
+            Condicao("reprovacoes_ano", ">", 3, padrao=0),
+        )
     ))
     
     # ═══════════════════════════════════════════════════════════════
@@ -189,17 +261,17 @@ def criar_regras() -> List[Regra]:
         nome="Elegibilidade por Pré-requisito Cumprido",
         tipo=TipoRegra.ELEGIBILIDADE,
         descricao="Pré-requisitos aprovados → disciplina ELEGÍVEL",
-        condicao=lambda f: (
-            f.get("tem_pre_requisito", False) == True and
-            f.get("pre_requisitos_cumpridos", False) == True and
-            f.get("ja_aprovada", True) == False
-        ),
         acao=lambda f: {
             "acao": "tornar_elegivel",
             "disciplina_id": f.get("id"),
             "mensagem": f"✓ Elegível: pré-requisitos cumpridos"
         },
-        prioridade=50
+        prioridade=50,
+        condicoes=(
+            Condicao("tem_pre_requisito", "==", True, padrao=False),
+            Condicao("pre_requisitos_cumpridos", "==", True, padrao=False),
+            Condicao("ja_aprovada", "==", False, padrao=True),
+        )
     ))
     
     # ═══════════════════════════════════════════════════════════════
@@ -210,17 +282,17 @@ def criar_regras() -> List[Regra]:
         nome="Elegibilidade sem Pré-requisito",
         tipo=TipoRegra.ELEGIBILIDADE,
         descricao="Disciplina sem pré-requisito do ano atual ou anterior → ELEGÍVEL",
-        condicao=lambda f: (
-            f.get("tem_pre_requisito", True) == False and
-            f.get("ano_disciplina", 99) <= f.get("aluno_ano", 1) and
-            f.get("ja_aprovada", True) == False
-        ),
         acao=lambda f: {
             "acao": "tornar_elegivel",
             "disciplina_id": f.get("id"),
             "mensagem": f"✓ Elegível: sem pré-requisito"
         },
-        prioridade=50
+        prioridade=50,
+        condicoes=(
+            Condicao("tem_pre_requisito", "==", False, padrao=True),
+            Condicao("ano_disciplina", "<=", padrao=99, ref="aluno_ano", ref_padrao=1),
+            Condicao("ja_aprovada", "==", False, padrao=True),
+        )
     ))
     
     # ═══════════════════════════════════════════════════════════════
@@ -231,14 +303,16 @@ def criar_regras() -> List[Regra]:
         nome="Heurística - Área Forte",
         tipo=TipoRegra.HEURISTICA,
         descricao="Média > 8.0 na área → priorizar disciplinas desta área",
-        condicao=lambda f: f.get("area_forte", False) == True,
         acao=lambda f: {
             "acao": "priorizar_area",
             "area": f.get("area"),
             "bonus_prioridade": 3,
             "mensagem": f"⭐ Priorizada: você tem bom desempenho em {f.get('area', 'esta área')}"
         },
-        prioridade=30
+        prioridade=30,
+        condicoes=(
+            Condicao("area_forte", "==", True, padrao=False),
+        )
     ))
     
     # ═══════════════════════════════════════════════════════════════
@@ -249,14 +323,16 @@ def criar_regras() -> List[Regra]:
         nome="Heurística - Priorizar Dependências",
         tipo=TipoRegra.HEURISTICA,
         descricao="Disciplina em dependência → alta prioridade",
-        condicao=lambda f: f.get("eh_dependencia", False) == True,
         acao=lambda f: {
             "acao": "priorizar_dependencia",
             "disciplina_id": f.get("id"),
             "bonus_prioridade": 5,
             "mensagem": f"🔴 Alta prioridade: dependência de ano anterior"
         },
-        prioridade=40
+        prioridade=40,
+        condicoes=(
+            Condicao("eh_dependencia", "==", True, padrao=False),
+        )
     ))
     
     # ═══════════════════════════════════════════════════════════════
@@ -267,17 +343,17 @@ def criar_regras() -> List[Regra]:
         nome="Heurística - Disciplina do Ano Atual",
         tipo=TipoRegra.HEURISTICA,
         descricao="Disciplina do ano atual → prioridade moderada",
-        condicao=lambda f: (
-            f.get("mesmo_ano_aluno", False) == True and
-            f.get("eh_dependencia", True) == False
-        ),
         acao=lambda f: {
             "acao": "priorizar_ano_atual",
             "disciplina_id": f.get("id"),
             "bonus_prioridade": 2,
             "mensagem": f"📌 Disciplina do seu ano atual"
         },
-        prioridade=20
+        prioridade=20,
+        condicoes=(
+            Condicao("mesmo_ano_aluno", "==", True, padrao=False),
+            Condicao("eh_dependencia", "==", False, padrao=True),
+        )
     ))
     
     # ═══════════════════════════════════════════════════════════════
@@ -288,32 +364,119 @@ def criar_regras() -> List[Regra]:
         nome="Heurística - Disciplina Técnica",
         tipo=TipoRegra.HEURISTICA,
         descricao="Disciplina da área técnica → prioridade extra para formação profissional",
-        condicao=lambda f: f.get("area") in ["Tecnica", "Técnica"],
         acao=lambda f: {
             "acao": "priorizar_tecnica",
             "disciplina_id": f.get("id"),
             "bonus_prioridade": 1,
             "mensagem": f"💼 Importante para formação técnica"
         },
-        prioridade=10
+        prioridade=10,
+        condicoes=(
+            Condicao("area", "in", ("Tecnica", "Técnica")),
+        )
     ))
     
     return regras
 
 
-def get_regras_por_tipo(tipo: TipoRegra) -> List[Regra]:
+def _assinatura_codigo(codigo: CodeType, h) -> None:
+    """Alimenta o hash com o bytecode de uma função (e das funções aninhadas)"""
+    h.update(codigo.co_code)
+    h.update(repr(codigo.co_names).encode("utf-8"))
+    for const in codigo.co_consts:
+        if isinstance(const, CodeType):
+            _assinatura_codigo(const, h)
+        else:
+            h.update(repr(const).encode("utf-8"))
+
+
+def calcular_versao(regras: Sequence[Regra]) -> str:
+    """
+    Versão do conjunto de regras: hash dos metadados e do bytecode das
+    condições/ações. É estável entre processos e só muda quando alguma
+    regra muda de fato.
+    """
+    h = hashlib.sha256()
+    for r in regras:
+        h.update(f"{r.id}|{r.nome}|{r.tipo.value}|{r.descricao}|{r.prioridade}".encode("utf-8"))
+        h.update(repr(r.condicoes).encode("utf-8"))
+        if not r.condicoes:
+            _assinatura_codigo(r.condicao.__code__, h)
+        _assinatura_codigo(r.acao.__code__, h)
+    return h.hexdigest()[:16]
+
+
+class RegistroRegras:
+    """
+    Base de regras construída uma única vez, ordenada por prioridade e
+    pré-agrupada por TipoRegra. Use reconstruir() para recriá-la.
+    """
+
+    def __init__(self, fabrica: Callable[[], List[Regra]] = criar_regras):
+        self._fabrica = fabrica
+        self._lock = threading.Lock()
+        self.reconstrucoes = 0
+        self.reconstruir()
+
+    def reconstruir(self) -> str:
+        """Recria as regras a partir da fábrica e retorna a nova versão"""
+        regras = tuple(sorted(self._fabrica(), key=lambda r: r.prioridade, reverse=True))
+        por_tipo = {tipo: tuple(r for r in regras if r.tipo == tipo) for tipo in TipoRegra}
+        versao = calcular_versao(regras)
+
+        with self._lock:
+            # Troca atômica: leitores veem o conjunto antigo ou o novo, nunca uma mistura
+            self._estado = (regras, por_tipo, versao)
+            self.reconstrucoes += 1
+        return versao
+
+    @property
+    def versao(self) -> str:
+        return self._estado[2]
+
+    def todas(self) -> Tuple[Regra, ...]:
+        """Todas as regras, ordenadas por prioridade (maior primeiro)"""
+        return self._estado[0]
+
+    def por_tipo(self, tipo: TipoRegra) -> Tuple[Regra, ...]:
+        """Regras de um tipo, ordenadas por prioridade (maior primeiro)"""
+        return self._estado[1][tipo]
+
+    def estatisticas(self) -> Dict[str, Any]:
+        regras, por_tipo, versao = self._estado
+        return {
+            "versao": versao,
+            "reconstrucoes": self.reconstrucoes,
+            "total_regras": len(regras),
+            "por_tipo": {tipo.value: len(rs) for tipo, rs in por_tipo.items()},
+        }
+
+
+registro_regras = RegistroRegras()
+
+
+def get_regras_por_tipo(tipo: TipoRegra) -> Tuple[Regra, ...]:
     """Retorna regras filtradas por tipo, ordenadas por prioridade"""
-    return sorted(
-        [r for r in criar_regras() if r.tipo == tipo],
-        key=lambda r: r.prioridade,
-        reverse=True
-    )
+    return registro_regras.por_tipo(tipo)
 
 
-def get_todas_regras() -> List[Regra]:
+def get_todas_regras() -> Tuple[Regra, ...]:
     """Retorna todas as regras ordenadas por prioridade"""
-    return sorted(criar_regras(), key=lambda r: r.prioridade, reverse=True)
+    return registro_regras.todas()
+
+
+def get_versao_regras() -> str:
+    """Retorna a versão do conjunto de regras em uso"""
+    return registro_regras.versao
+
+
+def reconstruir_regras() -> str:
+    """Reconstrói a base de regras e retorna a nova versão"""
+    return registro_regras.reconstruir()
 
 
 # Exportar para uso no motor de inferência
-__all__ = ['Regra', 'TipoRegra', 'criar_regras', 'get_regras_por_tipo', 'get_todas_regras']
+__all__ = [
+    'Regra', 'TipoRegra', 'Condicao', 'criar_regras', 'get_regras_por_tipo', 'get_todas_regras',
+    'RegistroRegras', 'registro_regras', 'get_versao_regras', 'reconstruir_regras'
+]
@@ -4,7 +4,13 @@ UniAdvisor - Sistema Baseado em Conhecimento para Orientação Acadêmica
 IFAM - Instituto Federal do Amazonas
 
 Ponto de entrada principal da aplicação.
+
+Uso:
+    python main.py               # servidor de desenvolvimento (Werkzeug)
+    python main.py --producao    # gunicorn com vários processos (servidor.py)
+    python main.py --asgi        # variante assíncrona (interface/asgi.py, uvicorn)
 """
+import argparse
 import sys
 from pathlib import Path
 
@@ -14,12 +20,35 @@ sys.path.insert(0, str(Path(__file__).parent))
 from interface.app import app
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="UniAdvisor")
+    parser.add_argument("--producao", action="store_true",
+                        help="Usa o servidor de produção (gunicorn) em vez do de desenvolvimento")
+    parser.add_argument("--asgi", action="store_true",
+                        help="Usa a variante assíncrona (Starlette + uvicorn)")
+    parser.add_argument("--porta", type=int, default=5000)
+    parser.add_argument("--workers", type=int, help="Processos (--producao ou --asgi)")
+    parser.add_argument("--threads", type=int, help="Threads por processo (somente --producao)")
+    args = parser.parse_args()
+
     print("=" * 60)
     print("🎓 UniAdvisor - Sistema Especialista de Matrícula")
     print("   Sistema Baseado em Conhecimento com Forward Chaining")
     print("=" * 60)
     print("\n✅ Iniciando servidor...")
-    print("📍 Acesse: http://localhost:5000")
+    print(f"📍 Acesse: http://localhost:{args.porta}")
     print("\nPressione Ctrl+C para encerrar\n")
-    
-    app.run(host='0.0.0.0', port=5000, debug=True)
+
+    if args.producao:
+        try:
+            import servidor
+        except ImportError as e:
+            sys.exit(f"❌ Servidor de produção indisponível ({e}). Instale com: pip install gunicorn")
+        servidor.executar(porta=args.porta, workers=args.workers, threads=args.threads)
+    elif args.asgi:
+        try:
+            from interface import asgi
+        except ImportError as e:
+            sys.exit(f"❌ Modo ASGI indisponível ({e}). Instale com: pip install starlette uvicorn")
+        asgi.executar(porta=args.porta, workers=args.workers)
+    else:
+        app.run(host='0.0.0.0', port=args.porta, debug=True)
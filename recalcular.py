@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+UniAdvisor - Recálculo em massa das recomendações
+
+Percorre todos os alunos do banco em lotes (ordem de id), distribui os
+lotes para um pool de processos e grava o resultado da inferência de cada
+aluno em `resultados_inferencia`, uma transação por lote.
+
+Cada processo carrega o currículo compilado e a rede de regras uma única
+vez (no inicializador) e usa MotorInferencia.inferir_lote em cada lote.
+
+O progresso fica em `recalculo_checkpoint`: o checkpoint só avança sobre
+lotes concluídos em sequência, então --retomar recomeça logo após o último
+aluno garantidamente gravado (lotes refeitos apenas sobrescrevem o
+resultado, que é idêntico).
+
+Uso:
+    python recalcular.py                      # todos os núcleos
+    python recalcular.py --workers 4 --lote 500
+    python recalcular.py --execucao noturna --retomar
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Iterator, List
+
+# Garantir que os módulos estão no path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import database.db as db
+from database import AlunoRepository, RecalculoRepository, configurar_banco
+from inference_engine.engine import MotorInferencia, NivelExplicacao
+from inference_engine.rete import obter_rede
+from knowledge_base.curriculo import obter_curriculo
+
+
+def _iniciar_worker(caminho: str) -> None:
+    """Inicializador de cada processo: banco, currículo e regras uma vez só"""
+    configurar_banco(caminho)
+    obter_curriculo()
+    obter_rede()
+
+
+def processar_lote(aluno_ids: List[str], execucao: str) -> int:
+    """Infere e grava o resultado de um lote de alunos; retorna quantos gravou"""
+    snapshots = AlunoRepository.buscar_snapshots(aluno_ids)
+    # Só os ids das regras são gravados: não é preciso capturar o contexto
+    resultados = MotorInferencia.inferir_lote(snapshots, nivel_explicacao=NivelExplicacao.RESUMO)
+
+    linhas = []
+    for snapshot, resultado in zip(snapshots, resultados):
+        linhas.append((
+            snapshot.aluno["id"],
+            resultado.status.value,
+            resultado.novo_ano,
+            [d["id"] for d in resultado.disciplinas_elegiveis],
+            [
+                {"id": s["id"], "prioridade": s["prioridade"], "ranking": s["ranking"]}
+                for s in resultado.disciplinas_sugeridas
+            ],
+            list(dict.fromkeys(e["regra_id"] for e in resultado.explicacao)),
+            execucao,
+        ))
+    return RecalculoRepository.gravar_resultados(linhas)
+
+
+def _lotes(apos: str, tamanho: int) -> Iterator[List[str]]:
+    """IDs dos alunos em lotes, paginando por chave (sem OFFSET)"""
+    while True:
+        ids = AlunoRepository.listar_ids(apos, tamanho)
+        if not ids:
+            return
+        yield ids
+        apos = ids[-1]
+
+
+class _Progresso:
+    """Imprime contagem, percentual e vazão (alunos/s)"""
+
+    def __init__(self, total: int, ja_processados: int):
+        self.total = total
+        self.base = ja_processados
+        self.inicio = time.perf_counter()
+        self._ultima = 0.0
+
+    def atualizar(self, processados: int, forcar: bool = False) -> None:
+        agora = time.perf_counter()
+        if not forcar and agora - self._ultima < 1.0:
+            return
+        self._ultima = agora
+        feitos = processados - self.base
+        vazao = feitos / max(agora - self.inicio, 1e-9)
+        percentual = 100.0 * feitos / self.total if self.total else 100.0
+        print(f"\r  {processados} alunos ({percentual:5.1f}%) | {vazao:7.0f} alunos/s",
+              end="", flush=True)
+
+
+def recalcular(workers: int, lote: int, execucao: str, retomar: bool) -> int:
+    """Executa o recálculo; retorna o número de alunos processados nesta execução"""
+    apos, processados = "", 0
+    if retomar:
+        checkpoint = RecalculoRepository.obter_checkpoint(execucao)
+        if checkpoint and checkpoint["concluido"]:
+            print(f"✓ Execução '{execucao}' já concluída ({checkpoint['processados']} alunos)")
+            return 0
+        if checkpoint:
+            apos = checkpoint["ultimo_aluno_id"] or ""
+            processados = checkpoint["processados"]
+            print(f"↻ Retomando '{execucao}' após o aluno {apos or '(início)'}"
+                  f" ({processados} já processados)")
+    RecalculoRepository.salvar_checkpoint(execucao, apos or None, processados)
+
+    progresso = _Progresso(AlunoRepository.contar(apos), processados)
+    inicio = processados
+
+    if workers <= 1:
+        for ids in _lotes(apos, lote):
+            processados += processar_lote(ids, execucao)
+            RecalculoRepository.salvar_checkpoint(execucao, ids[-1], processados)
+            progresso.atualizar(processados)
+    else:
+        # Conexões SQLite não podem atravessar um fork: cada processo abre as suas
+        contexto = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=contexto,
+                                 initializer=_iniciar_worker,
+                                 initargs=(str(db.DATABASE_PATH),)) as executor:
+            # Lotes em ordem de envio: o checkpoint avança só sobre o prefixo concluído
+            pendentes: deque = deque()
+            em_voo = set()
+            for ids in _lotes(apos, lote):
+                futuro = executor.submit(processar_lote, ids, execucao)
+                pendentes.append((ids[-1], futuro))
+                em_voo.add(futuro)
+                if len(em_voo) >= workers * 2:
+                    _, em_voo = wait(em_voo, return_when=FIRST_COMPLETED)
+                    processados = _avancar(pendentes, execucao, processados)
+                    progresso.atualizar(processados)
+            wait(em_voo)
+            processados = _avancar(pendentes, execucao, processados)
+
+    RecalculoRepository.salvar_checkpoint(execucao, None, processados, concluido=True)
+    progresso.atualizar(processados, forcar=True)
+    print()
+    return processados - inicio
+
+
+def _avancar(pendentes: deque, execucao: str, processados: int) -> int:
+    """Grava o checkpoint até o último lote concluído sem lacunas antes dele"""
+    ultimo = None
+    while pendentes and pendentes[0][1].done():
+        ultimo, futuro = pendentes.popleft()
+        # Propaga a exceção do worker (o checkpoint fica no último lote bom)
+        processados += futuro.result()
+    if ultimo is not None:
+        RecalculoRepository.salvar_checkpoint(execucao, ultimo, processados)
+    return processados
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Recalcula as recomendações de todos os alunos")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Processos paralelos (1 = executa no processo atual)")
+    parser.add_argument("--lote", type=int, default=500,
+                        help="Alunos por lote (uma transação por lote)")
+    parser.add_argument("--execucao", default="recalculo",
+                        help="Nome da execução (chave do checkpoint)")
+    parser.add_argument("--retomar", action="store_true",
+                        help="Continua a partir do checkpoint da execução")
+    args = parser.parse_args(argv)
+
+    print(f"🔄 Recalculando recomendações ({args.workers} processo(s), lotes de {args.lote})")
+    inicio = time.perf_counter()
+    quantidade = recalcular(args.workers, args.lote, args.execucao, args.retomar)
+    duracao = time.perf_counter() - inicio
+    print(f"✅ {quantidade} aluno(s) recalculado(s) em {duracao:.1f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+UniAdvisor - Servidor de produção (gunicorn, pré-fork)
+
+Sobe a aplicação Flask em vários processos (workers), cada um com um pool
+de threads, em vez do servidor de desenvolvimento do Werkzeug.
+
+Antes do fork, o processo mestre carrega uma única vez o que é só leitura
+e pode ser compartilhado (copy-on-write) pelos workers:
+- currículo compilado e rede de regras
+- schema do banco migrado
+- respostas pré-calculadas de /api/curriculo e /api/regras
+
+Conexões SQLite não podem atravessar um fork: o mestre fecha as suas antes
+de criar os workers e cada worker abre um pool novo (post_fork). No
+encerramento (SIGTERM), cada worker termina as requisições em andamento
+dentro de `graceful_timeout` e drena a fila do log de inferências antes
+de sair.
+
+Uso:
+    python main.py --producao                    # via ponto de entrada
+    python servidor.py --workers 4 --threads 8
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict
+
+# Garantir que os módulos estão no path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from gunicorn.app.base import BaseApplication
+
+import database.db as db
+from database import (configurar_banco, escritor_log, fechar_conexoes, inicializar_banco,
+                      inteiro_env)
+from inference_engine.rete import obter_rede
+from interface.app import app, preaquecer_respostas
+from knowledge_base.curriculo import obter_curriculo
+
+
+def preparar_processo() -> None:
+    """Carrega currículo, regras, schema e respostas no mestre, antes do fork"""
+    obter_curriculo()
+    obter_rede()
+    inicializar_banco()
+    preaquecer_respostas()
+    # Nenhuma conexão aberta pode ser herdada pelos workers
+    fechar_conexoes()
+
+
+def _post_fork(server, worker) -> None:
+    """No worker recém-criado: pool de conexões próprio"""
+    configurar_banco(db.DATABASE_PATH)
+
+
+def _worker_exit(server, worker) -> None:
+    """Ao encerrar o worker: grava o que restou na fila do log e fecha conexões"""
+    escritor_log.parar()
+    fechar_conexoes()
+
+
+class ServidorProducao(BaseApplication):
+    """Aplicação gunicorn configurada por código (sem arquivo de configuração)"""
+
+    def __init__(self, aplicacao, opcoes: Dict[str, Any]):
+        self.aplicacao = aplicacao
+        self.opcoes = opcoes
+        super().__init__()
+
+    def load_config(self) -> None:
+        for chave, valor in self.opcoes.items():
+            self.cfg.set(chave, valor)
+
+    def load(self):
+        return self.aplicacao
+
+
+def executar(host: str = "0.0.0.0", porta: int = 5000, workers: int = None,
+             threads: int = None, timeout_encerramento: int = None) -> None:
+    """Prepara o processo mestre e inicia o gunicorn (bloqueia até encerrar)"""
+    opcoes = {
+        "bind": f"{host}:{porta}",
+        "workers": workers or inteiro_env("UNIADVISOR_WORKERS", os.cpu_count() or 1),
+        # threads > 1 usa o worker gthread
+        "threads": threads or inteiro_env("UNIADVISOR_THREADS", 4),
+        "graceful_timeout": timeout_encerramento or inteiro_env("UNIADVISOR_TIMEOUT_ENCERRAMENTO", 30),
+        "preload_app": True,
+        "post_fork": _post_fork,
+        "worker_exit": _worker_exit,
+        "accesslog": "-",
+    }
+    preparar_processo()
+    print(f"🚀 gunicorn em http://{opcoes['bind']}"
+          f" ({opcoes['workers']} worker(s) x {opcoes['threads']} thread(s))")
+    ServidorProducao(app, opcoes).run()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Servidor de produção do UniAdvisor")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--porta", type=int, default=5000)
+    parser.add_argument("--workers", type=int,
+                        help="Processos (padrão: UNIADVISOR_WORKERS ou nº de núcleos)")
+    parser.add_argument("--threads", type=int,
+                        help="Threads por processo (padrão: UNIADVISOR_THREADS ou 4)")
+    parser.add_argument("--timeout-encerramento", type=int,
+                        help="Segundos para concluir requisições em andamento ao encerrar")
+    args = parser.parse_args(argv)
+
+    executar(args.host, args.porta, args.workers, args.threads, args.timeout_encerramento)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,44 @@
+"""
+Equivalência da avaliação vetorizada com o motor escalar
+
+Roda em várias sementes e tamanhos de turma; sem NumPy o módulo é pulado.
+    python -m pytest tests
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+pytest.importorskip("numpy")
+
+from inference_engine.vetorizado import (  # noqa: E402
+    AvaliadorTurma,
+    turma_aleatoria,
+    verificar_equivalencia,
+)
+
+
+@pytest.fixture(scope="module")
+def avaliador():
+    return AvaliadorTurma()
+
+
+@pytest.mark.parametrize("quantidade", [200, 1000, 3000])
+@pytest.mark.parametrize("semente", [1, 7, 42, 2024])
+def test_decisoes_iguais_ao_motor_escalar(avaliador, semente, quantidade):
+    turma = turma_aleatoria(quantidade, semente)
+
+    # A turma precisa exercitar os dois caminhos: matricial e decidir_escalar
+    regulares = [avaliador._regular(s) for s in turma]
+    assert any(regulares)
+    assert not all(regulares)
+
+    assert verificar_equivalencia(turma, avaliador) == []
+
+
+def test_alunos_irregulares_usam_motor_escalar(avaliador):
+    turma = turma_aleatoria(300, 42)
+    for snapshot, decisao in zip(turma, avaliador.avaliar(turma)):
+        assert decisao.vetorizado == avaliador._regular(snapshot)